@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Any
 
 import click
@@ -82,3 +83,191 @@ def create_user(
     password = password or click.prompt("Password", hide_input=True, confirmation_prompt=True)
 
     anyio.run(_create_user, email, cast("str", password), name, surname)
+
+
+@user_management_group.command(name="import", help="Import users from a CSV or JSON lines file")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "import_format",
+    help="Format of the file (defaults to its extension, JSON lines unless .csv)",
+    type=click.Choice(["csv", "jsonl"]),
+    required=False,
+    show_default=False,
+)
+@click.option(
+    "--on-conflict",
+    help="What to do with users whose email already exists",
+    type=click.Choice(["skip", "update", "fail"]),
+    default="skip",
+    show_default=True,
+)
+@click.option(
+    "--chunk-size",
+    help="Users written per transaction",
+    type=click.IntRange(min=1),
+    default=5000,
+    show_default=True,
+)
+@click.option(
+    "--workers",
+    help="Processes hashing passwords (defaults to the number of CPUs)",
+    type=click.IntRange(min=1),
+    required=False,
+    show_default=False,
+)
+@click.option(
+    "--restart",
+    help="Ignore the progress of an interrupted import and start from the first record",
+    is_flag=True,
+    default=False,
+)
+def import_users(
+    source: str,
+    import_format: str | None,
+    on_conflict: str,
+    chunk_size: int,
+    workers: int | None,
+    restart: bool,
+) -> None:
+    """Import users, resuming an interrupted import of the same file."""
+    import multiprocessing
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from pathlib import Path
+    from typing import cast
+
+    import anyio
+    from rich import get_console
+
+    from app.config.app import alchemy
+    from app.domain.accounts.importer import ImportCheckpoint, ImportProgress, read_user_records
+    from app.domain.accounts.importer import import_users as _import_users
+
+    console = get_console()
+    path = Path(source)
+    workers = workers or os.cpu_count() or 1
+    checkpoint = ImportCheckpoint.for_source(path)
+    if restart:
+        checkpoint.clear()
+    elif position := checkpoint.load():
+        console.print(f"Resuming after record {position}.")
+
+    def _report(progress: ImportProgress) -> None:
+        console.print(f"{progress.position} records imported, {progress.rate:,.0f} records/s")
+
+    console.rule(f"Import users from {path}.")
+    # `spawn` avoids forking an interpreter that already runs an event loop
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        progress = anyio.run(
+            partial(
+                _import_users,
+                read_user_records(path, cast("Any", import_format)),
+                alchemy.get_session,
+                executor,
+                workers=workers,
+                chunk_size=chunk_size,
+                on_conflict=cast("Any", on_conflict),
+                checkpoint=checkpoint,
+                on_progress=_report,
+            )
+        )
+    console.print(
+        f"Imported {progress.read} records ({progress.written} users written) at {progress.rate:,.0f} records/s."
+    )
+
+
+@user_management_group.command(name="calibrate-hashing", help="Calibrate the password hashing cost for this machine")
+@click.option(
+    "--target-ms",
+    help="Target p99 latency of a single password hash, in milliseconds",
+    type=click.FLOAT,
+    default=250.0,
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    help="Number of hashes expected to run at the same time (defaults to HASHING_MAX_WORKERS)",
+    type=click.IntRange(min=1),
+    required=False,
+    show_default=False,
+)
+@click.option(
+    "--max-memory",
+    help="Upper bound for the argon2 memory cost, in MiB",
+    type=click.IntRange(min=8),
+    default=256,
+    show_default=True,
+)
+@click.option(
+    "--parallelism",
+    help="Argon2 lanes per hash (defaults to the CPUs available per concurrent hash)",
+    type=click.IntRange(min=1),
+    required=False,
+    show_default=False,
+)
+@click.option(
+    "--samples",
+    help="Hashes measured per concurrent slot for each candidate profile",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+)
+@click.option(
+    "--env-file",
+    help="Environment file the selected profile is written to",
+    type=click.Path(dir_okay=False),
+    default=".env",
+    show_default=True,
+)
+@click.option(
+    "--write/--no-write",
+    help="Write the selected profile to the environment file",
+    default=True,
+    show_default=True,
+)
+def calibrate_hashing(
+    target_ms: float,
+    concurrency: int | None,
+    max_memory: int,
+    parallelism: int | None,
+    samples: int,
+    env_file: str,
+    write: bool,
+) -> None:
+    """Benchmark argon2 cost parameters against a latency target."""
+    from pathlib import Path
+
+    from dotenv import set_key
+    from rich import get_console
+
+    from app.config import get_settings
+    from app.lib.crypt import HashingProfile, calibrate_hashing_profile
+
+    console = get_console()
+    settings = get_settings()
+    concurrency = concurrency or settings.hashing.MAX_WORKERS
+
+    console.rule("Calibrate password hashing.")
+    current = HashingProfile.from_settings(settings.hashing)
+    console.print(f"Current profile: {current}")
+    with console.status(f"Benchmarking argon2 at concurrency {concurrency} against a {target_ms:g}ms target..."):
+        profile, p99_ms = calibrate_hashing_profile(
+            target_ms=target_ms,
+            concurrency=concurrency,
+            max_memory_cost=max_memory * 1024,
+            parallelism=parallelism,
+            samples=samples,
+        )
+    console.print(f"Selected profile: {profile} (p99 {p99_ms:.1f}ms)")
+    if p99_ms > target_ms:
+        console.print("[yellow]The cheapest profile tried still exceeds the target latency.[/]")
+    if not write:
+        return
+    env_path = Path(env_file)
+    env_path.touch(exist_ok=True)
+    for key, value in profile.to_env().items():
+        set_key(env_path, key, value, quote_mode="never")
+    console.print(f"Profile written to {env_path}.")
+    if profile != current:
+        console.print("Existing password hashes are upgraded to the new profile on the next successful login.")
@@ -16,3 +16,13 @@ HEALTH_ENDPOINT = "/health"
 SITE_INDEX = "/"
 """The URL path to use for the OpenAPI documentation."""
 OPENAPI_SCHEMA = "/schema"
+"""The name of the store used by the response cache."""
+RESPONSE_CACHE_STORE = "response_cache"
+"""The route handler `opt` key holding the tags of cached responses."""
+CACHE_TAGS_KEY = "cache_tags"
+"""The route handler `opt` key routing reads to the replicas (`True`) or the primary (`False`)."""
+READ_REPLICA_KEY = "read_replica"
+"""The route handler `opt` key holding the most queries a request of the route may execute."""
+QUERY_BUDGET_KEY = "query_budget"
+"""The route handler `opt` key running the transactions of requests read-only (`True`) or read-write (`False`)."""
+READ_ONLY_KEY = "read_only"
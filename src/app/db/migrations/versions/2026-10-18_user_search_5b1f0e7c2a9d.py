@@ -0,0 +1,84 @@
+# type: ignore
+"""user search
+
+Revision ID: 5b1f0e7c2a9d
+Revises: 838c3ef07ad3
+Create Date: 2026-10-18 16:45:12.314205+00:00
+
+Upgrade notes: on PostgreSQL, adding the stored ``search_vector`` column rewrites ``user_account`` under an
+ACCESS EXCLUSIVE lock, which blocks its reads and writes until the rewrite ends.  Plan a maintenance window
+for large tables.  The indexes are built concurrently afterwards and do not block writes.
+"""
+from __future__ import annotations
+
+import warnings
+from typing import TYPE_CHECKING
+
+import sqlalchemy as sa
+from alembic import op
+from advanced_alchemy.types import EncryptedString, EncryptedText, GUID, ORA_JSONB, DateTimeUTC
+from sqlalchemy import Text  # noqa: F401
+from sqlalchemy.dialects import postgresql
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+__all__ = ["downgrade", "upgrade", "schema_upgrades", "schema_downgrades", "data_upgrades", "data_downgrades"]
+
+sa.GUID = GUID
+sa.DateTimeUTC = DateTimeUTC
+sa.ORA_JSONB = ORA_JSONB
+sa.EncryptedString = EncryptedString
+sa.EncryptedText = EncryptedText
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0e7c2a9d'
+down_revision = '838c3ef07ad3'
+branch_labels = None
+depends_on = None
+
+_SEARCH_FIELDS = ("name", "surname", "email")
+_DOCUMENT = "coalesce(name, '') || ' ' || coalesce(surname, '') || ' ' || coalesce(email, '')"
+
+
+def upgrade() -> None:
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        with op.get_context().autocommit_block():
+            schema_upgrades()
+            data_upgrades()
+
+def downgrade() -> None:
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        with op.get_context().autocommit_block():
+            data_downgrades()
+            schema_downgrades()
+
+def schema_upgrades() -> None:
+    """schema upgrade migrations go here."""
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite can only add virtual generated columns, other databases search with LIKE
+        op.add_column('user_account', sa.Column('search_vector', sa.Text(), sa.Computed(f"lower({_DOCUMENT})", persisted=False), nullable=True))
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # a stored generated column rewrites the table under an ACCESS EXCLUSIVE lock, blocking reads and writes meanwhile
+    op.add_column('user_account', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(f"to_tsvector('simple'::regconfig, {_DOCUMENT})", persisted=True), nullable=True))
+    # built concurrently, so the table stays writable while the indexes are built
+    for field in _SEARCH_FIELDS:
+        op.create_index(f'ix_user_account_{field}_trgm', 'user_account', [field], unique=False, postgresql_using='gin', postgresql_ops={field: 'gin_trgm_ops'}, postgresql_concurrently=True)
+    op.create_index('ix_user_account_search_vector', 'user_account', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+def schema_downgrades() -> None:
+    """schema downgrade migrations go here."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_user_account_search_vector', table_name='user_account', postgresql_concurrently=True)
+        for field in _SEARCH_FIELDS:
+            op.drop_index(f'ix_user_account_{field}_trgm', table_name='user_account', postgresql_concurrently=True)
+    op.drop_column('user_account', 'search_vector')
+
+def data_upgrades() -> None:
+    """Add any optional data upgrade migrations here!"""
+
+def data_downgrades() -> None:
+    """Add any optional data downgrade migrations here!"""
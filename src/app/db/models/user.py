@@ -3,14 +3,31 @@ from __future__ import annotations
 from datetime import datetime  # noqa: TC003
 
 from advanced_alchemy.base import BigIntBase
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DDL, Computed, DateTime, Index, String, Text, event, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.lib.search import pg_trgm_available, search_document
+
+_SEARCH_FIELDS = ("name", "surname", "email")
+
 
 class User(BigIntBase):
     __tablename__ = "user_account"
-    __table_args__ = {"comment": "User accounts"}
+    __table_args__ = (
+        *(
+            Index(
+                f"ix_user_account_{field}_trgm",
+                field,
+                postgresql_using="gin",
+                postgresql_ops={field: "gin_trgm_ops"},
+            ).ddl_if(callable_=pg_trgm_available)
+            for field in _SEARCH_FIELDS
+        ),
+        Index("ix_user_account_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        {"comment": "User accounts"},
+    )
 
     email: Mapped[str] = mapped_column(String(length=255), unique=True, nullable=False)
     name: Mapped[str | None] = mapped_column(nullable=True, default=None)
@@ -20,7 +37,18 @@ class User(BigIntBase):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR().with_variant(Text(), "sqlite"), Computed(search_document(*_SEARCH_FIELDS)), deferred=True
+    )
+    """Full text search document of the search fields, generated by the database."""
 
     @hybrid_property
     def has_password(self) -> bool:
         return self.hashed_password is not None
+
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(callable_=pg_trgm_available),  # type: ignore[no-untyped-call]
+)
@@ -0,0 +1,108 @@
+"""Cache of user records used by authentication and user lookups."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import msgspec
+
+from app.config.base import get_settings
+from app.db import models as m
+from app.domain.accounts.claims import password_stand_in
+from app.lib.cache import cache_manager
+
+if TYPE_CHECKING:
+    from app.lib.cache import SharedCache
+
+__all__ = ("USERS_LIST_TAG", "USER_TAG", "UserCache", "snapshot_user", "user_cache")
+
+USERS_LIST_TAG = "users:list"
+"""Response cache tag of user listings."""
+USER_TAG = "users:{user_id}"
+"""Response cache tag of a single user."""
+
+_USER_COLUMNS = tuple(column.key for column in m.User.__table__.columns if column.computed is None)
+
+
+def snapshot_user(user: m.User) -> m.User:
+    """Copy the column values of a user into a new, session-less instance.
+
+    The password hash is replaced by its :func:`~app.domain.accounts.claims.password_stand_in`, so it is not written
+    to the cache backend.
+
+    Args:
+        user: The user loaded from the database.
+
+    Returns:
+        A transient ``User`` that is safe to share between requests.  Treat it as read-only.
+    """
+    values = {key: getattr(user, key) for key in _USER_COLUMNS}
+    values["hashed_password"] = password_stand_in(user.hashed_password)
+    return m.User(**values)
+
+
+class UserCache:
+    """Cache of user snapshots, reachable by email and by id.
+
+    Entries live in the configured cache backend, so with a shared backend a user
+    loaded or invalidated by one worker is seen by all of them.  They do not hold
+    password hashes, see :func:`snapshot_user`.
+    """
+
+    __slots__ = ("_cache", "ttl")
+
+    def __init__(self, cache: SharedCache, ttl: int) -> None:
+        self._cache = cache
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def _decode(raw: bytes | None) -> m.User | None:
+        return None if raw is None else m.User(**msgspec.msgpack.decode(raw))
+
+    async def get_by_email(self, email: str) -> m.User | None:
+        return self._decode(await self._cache.get(f"email:{email}")) if self.enabled else None
+
+    async def get_by_id(self, user_id: int) -> m.User | None:
+        return self._decode(await self._cache.get(f"id:{user_id}")) if self.enabled else None
+
+    async def add(self, user: m.User) -> m.User:
+        """Cache a snapshot of ``user``.
+
+        Returns:
+            The cached snapshot.
+        """
+        snapshot = snapshot_user(user)
+        if self.enabled:
+            raw = msgspec.msgpack.encode({key: getattr(snapshot, key) for key in _USER_COLUMNS})
+            await self._cache.set(f"email:{snapshot.email}", raw, expires_in=self.ttl)
+            await self._cache.set(f"id:{snapshot.id}", raw, expires_in=self.ttl)
+        return snapshot
+
+    async def invalidate(self, user_id: int | None = None, email: str | None = None) -> None:
+        """Drop a user from the cache of every worker."""
+        keys: set[str] = set()
+        if user_id is not None:
+            keys.add(f"id:{user_id}")
+            # the entry may be cached under an email that has since changed
+            if (cached := await self.get_by_id(user_id)) is not None:
+                keys.add(f"email:{cached.email}")
+        if email is not None:
+            keys.add(f"email:{email}")
+            if (cached := await self.get_by_email(email)) is not None:
+                keys.add(f"id:{cached.id}")
+        if keys:
+            await self._cache.delete(*sorted(keys))
+
+    async def clear(self) -> None:
+        await self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+settings = get_settings()
+user_cache = UserCache(cache_manager.cache("users", maxsize=settings.cache.USER_SIZE * 2), ttl=settings.cache.USER_TTL)
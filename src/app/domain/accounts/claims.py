@@ -0,0 +1,126 @@
+"""User snapshots carried in access tokens ("claims mode").
+
+In claims mode the login endpoint embeds a compact user snapshot in the token
+and authenticated requests rebuild the user from it without a database query.
+Users changed after a token was issued are looked up again, and
+tokens minted for a different password are rejected.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import TYPE_CHECKING, Any
+
+from app.config.base import get_settings
+from app.db import models as m
+from app.lib.cache import cache_manager
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from app.lib.cache import SharedCache
+
+__all__ = (
+    "CLAIMED_PASSWORD",
+    "USER_CLAIMS_KEY",
+    "TokenRevocations",
+    "password_stand_in",
+    "token_revocations",
+    "token_version",
+    "user_claims",
+    "user_from_claims",
+)
+
+USER_CLAIMS_KEY = "usr"
+"""Key of the user snapshot in the token extras."""
+CLAIMED_PASSWORD = "!claims"  # noqa: S105
+"""Stand-in password hash of users rebuilt from claims.  Marks the user as having a password without carrying it."""
+_VERSION_PREFIX = "!tv:"
+_CLAIMS_SCHEMA = 1
+
+
+def token_version(hashed_password: str | None) -> str:
+    """Version of the tokens issued for a password.
+
+    Changes whenever the stored password hash changes, without exposing the hash itself.  The stand-in of a hash has
+    the version of the hash.
+    """
+    if hashed_password is not None and hashed_password.startswith(_VERSION_PREFIX):
+        return hashed_password.removeprefix(_VERSION_PREFIX)
+    return hashlib.sha256((hashed_password or "").encode()).hexdigest()[:12]
+
+
+def password_stand_in(hashed_password: str | None) -> str | None:
+    """Stand-in password hash of users kept outside of the database.
+
+    Carries the :func:`token_version` of the hash, and whether the user has a password, without the hash itself.
+    """
+    return None if hashed_password is None else f"{_VERSION_PREFIX}{token_version(hashed_password)}"
+
+
+def user_claims(user: m.User) -> dict[str, Any]:
+    """Build the token snapshot of a user."""
+    return {
+        "s": _CLAIMS_SCHEMA,
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "surname": user.surname,
+        "pw": user.has_password,
+        "tv": token_version(user.hashed_password),
+    }
+
+
+def user_from_claims(claims: Any) -> m.User | None:
+    """Rebuild a user from its token snapshot.
+
+    Returns:
+        A transient, read-only ``User``, or ``None`` when the snapshot was written by an incompatible version.
+    """
+    if not isinstance(claims, dict) or claims.get("s") != _CLAIMS_SCHEMA:
+        return None
+    try:
+        return m.User(
+            id=int(claims["id"]),
+            email=claims["email"],
+            name=claims.get("name"),
+            surname=claims.get("surname"),
+            hashed_password=CLAIMED_PASSWORD if claims.get("pw") else None,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenRevocations:
+    """Record of users changed after their tokens were issued.
+
+    Entries live in the configured cache backend for the lifetime of a token.  With
+    the per-worker ``memory`` backend, other workers keep trusting the claims of a
+    changed user until the token expires.
+    """
+
+    __slots__ = ("_cache", "ttl")
+
+    def __init__(self, cache: SharedCache, ttl: int) -> None:
+        self._cache = cache
+        self.ttl = ttl
+
+    async def record_change(self, user_id: int) -> None:
+        await self._cache.set(str(user_id), str(time.time()).encode(), expires_in=self.ttl, broadcast=True)
+
+    async def changed_since(self, user_id: int, issued_at: datetime) -> bool:
+        """Whether the user changed after a token issued at ``issued_at``."""
+        changed_at = await self._cache.get(str(user_id))
+        # `iat` is truncated to seconds, so a token from the same second is treated as stale
+        return changed_at is not None and issued_at.timestamp() <= float(changed_at)
+
+    async def clear(self) -> None:
+        await self._cache.clear()
+
+
+settings = get_settings()
+token_revocations = TokenRevocations(
+    cache_manager.cache("token_revocations", maxsize=settings.auth.REVOCATION_SIZE),
+    ttl=settings.auth.TOKEN_EXPIRATION,
+)
@@ -9,14 +9,18 @@ from litestar.di import Provide
 from litestar.enums import RequestEncodingType
 from litestar.params import Body
 
+from app.config.base import get_settings
+from app.config.constants import QUERY_BUDGET_KEY
 from app.domain.accounts import urls
-from app.domain.accounts.deps import provide_users_service
+from app.domain.accounts.claims import USER_CLAIMS_KEY, user_claims
+from app.domain.accounts.deps import provide_login_admission, provide_request_users_service
 from app.domain.accounts.guards import auth
 from app.domain.accounts.schemas import AccountLogin, AccountRegister, User
 
 if TYPE_CHECKING:
     from app.db import models as m
     from app.domain.accounts.services import UserService
+    from app.lib.admission import AdmissionController
 
 
 class AccessController(Controller):
@@ -24,17 +28,22 @@ class AccessController(Controller):
 
     tags = ["Access"]
     dependencies = {
-        "users_service": Provide(provide_users_service),
+        "users_service": Provide(provide_request_users_service, sync_to_thread=False),
+        "login_admission": Provide(provide_login_admission, sync_to_thread=False),
     }
 
     @post(operation_id="AccountLogin", path=urls.ACCOUNT_LOGIN, exclude_from_auth=True)
     async def login(
         self,
         users_service: UserService,
+        login_admission: AdmissionController,
         data: Annotated[AccountLogin, Body(title="JWT Login", media_type=RequestEncodingType.URL_ENCODED)],
     ) -> Response[User]:
         """Authenticate a user."""
-        user = await users_service.authenticate(data.username, data.password)
+        async with login_admission.admit():
+            user = await users_service.authenticate(data.username, data.password)
+        if get_settings().auth.CLAIMS_MODE:
+            return auth.login(user.email, token_extras={USER_CLAIMS_KEY: user_claims(user)})
         return auth.login(user.email)
 
     @post(operation_id="AccountRegister", path=urls.ACCOUNT_REGISTER)
@@ -50,7 +59,7 @@ class AccessController(Controller):
         request.app.emit(event_id="user_created", user_id=user.id)
         return users_service.to_schema(user, schema_type=User)
 
-    @get(operation_id="AccountProfile", path=urls.ACCOUNT_PROFILE)
+    @get(operation_id="AccountProfile", path=urls.ACCOUNT_PROFILE, opt={QUERY_BUDGET_KEY: 1})
     async def profile(self, current_user: m.User, users_service: UserService) -> User:
         """User Profile."""
         return users_service.to_schema(current_user, schema_type=User)
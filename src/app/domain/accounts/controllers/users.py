@@ -4,60 +4,238 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Annotated
 
-from litestar import Controller, delete, get, patch, post
+from advanced_alchemy.service import find_filter
+from litestar import Controller, Request, Response, delete, get, patch, post
 from litestar.di import Provide
+from litestar.exceptions import ValidationException
 from litestar.params import Dependency, Parameter
+from litestar.response import Stream
+from litestar.status_codes import HTTP_200_OK
+from msgspec import Struct
 
+from app.config.app import alchemy
+from app.config.base import get_settings
+from app.config.constants import CACHE_TAGS_KEY, QUERY_BUDGET_KEY, READ_REPLICA_KEY
+from app.db import models as m
 from app.domain.accounts import urls
-from app.domain.accounts.deps import provide_users_service
-from app.domain.accounts.schemas import User, UserCreate, UserUpdate
+from app.domain.accounts.cache import USER_TAG, USERS_LIST_TAG
+from app.domain.accounts.deps import provide_request_users_service
+from app.domain.accounts.schemas import (
+    User,
+    UserBatch,
+    UserBatchError,
+    UserBatchUpdate,
+    UserCreate,
+    UserUpdate,
+)
+from app.lib.cache import cache_manager, response_cache
 from app.lib.deps import create_filter_dependencies
+from app.lib.etag import if_none_match, make_etag, not_modified
+from app.lib.export import ExportFormat, export_statement, stream_export
+from app.lib.fields import FieldSet, create_fields_dependency
+from app.lib.pagination import (
+    COUNT_STRATEGY_HEADER,
+    CountStrategy,
+    CursorPagination,
+    LimitCursor,
+    list_and_count,
+    to_cursor_pagination,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable, Sequence
+
     from advanced_alchemy.filters import FilterTypes
     from advanced_alchemy.service import OffsetPagination
 
     from app.domain.accounts.services import UserService
 
+settings = get_settings()
+
+
+def _check_batch_size(items: Sequence[object]) -> None:
+    if len(items) > settings.app.BATCH_MAX_SIZE:
+        msg = f"A batch holds at most {settings.app.BATCH_MAX_SIZE} items."
+        raise ValidationException(detail=msg)
+
+
+def _duplicates(keys: Sequence[Hashable]) -> dict[int, str]:
+    """Map the position of every repeated key to why it is skipped, the first occurrence is kept."""
+    first: dict[Hashable, int] = {}
+    return {
+        index: f"Duplicate of item {first[key]}."
+        for index, key in enumerate(keys)
+        if first.setdefault(key, index) != index
+    }
+
+
+def _to_batch(
+    users_service: UserService,
+    results: Sequence[m.User | str],
+    ids: Sequence[int | None],
+    skipped: dict[int, str] | None = None,
+) -> UserBatch:
+    """Split the per-item results of a batch into the response items and errors."""
+    skipped = skipped or {}
+    batch = UserBatch(items=[])
+    results_iter = iter(results)
+    for index, user_id in enumerate(ids):
+        result = skipped[index] if index in skipped else next(results_iter)
+        if isinstance(result, str):
+            batch.errors.append(UserBatchError(index=index, detail=result, id=user_id))
+        else:
+            batch.items.append(users_service.to_schema(result, schema_type=User))
+    return batch
+
 
 class UserController(Controller):
     """User Account Controller."""
 
     tags = ["User Accounts"]
-    dependencies = {
-        "users_service": Provide(provide_users_service),
-    } | create_filter_dependencies(
+    signature_namespace = {"Struct": Struct, "Stream": Stream}
+    dependencies = (
         {
-            "id_filter": int,
-            "search": "name,surname,email",
-            "pagination_type": "limit_offset",
-            "pagination_size": 20,
-            "created_at": True,
-            "updated_at": True,
-            "sort_field": "name",
-            "sort_order": "asc",
-        },
+            "users_service": Provide(provide_request_users_service, sync_to_thread=False),
+        }
+        | create_filter_dependencies(
+            {
+                "id_filter": int,
+                "search": "name,surname,email",
+                "search_mode": "trigram",
+                "pagination_type": "limit_offset",
+                "pagination_size": 20,
+                "created_at": True,
+                "updated_at": True,
+                "sort_field": "name",
+                "sort_order": "asc",
+                "count_strategy": "estimate",
+            },
+        )
+        | create_fields_dependency(User, requires={"has_password": ("hashed_password",)})
     )
 
-    @get(operation_id="ListUsers", path=urls.ACCOUNT_LIST, cache=60)
+    @get(
+        operation_id="ListUsers",
+        path=urls.ACCOUNT_LIST,
+        cache=settings.cache.route_ttl("ListUsers"),
+        # cached responses are built from the primary, a lagging replica would keep them stale for their whole TTL
+        opt={CACHE_TAGS_KEY: (USERS_LIST_TAG,), READ_REPLICA_KEY: False},
+    )
     async def list_users(
         self,
+        request: Request,
         users_service: UserService,
         filters: Annotated[list[FilterTypes], Dependency(skip_validation=True)],
-    ) -> OffsetPagination[User]:
+        count_strategy: Annotated[CountStrategy, Dependency(skip_validation=True)],
+        fields: Annotated[FieldSet | None, Dependency(skip_validation=True)],
+    ) -> Response[OffsetPagination[User] | CursorPagination[User]]:
         """List users."""
-        results, total = await users_service.list_and_count(*filters)
-        return users_service.to_schema(data=results, total=total, schema_type=User, filters=filters)
+        # without a count, removals show in the listing tag, renewed by every write through the service, but only
+        # a backend that broadcasts shares its version between the workers
+        count = count_strategy == "exact" or not cache_manager.backend.broadcasts
+        newest, matching = await users_service.list_version(*filters, count=count)
+        generation = matching if count else await response_cache.version(USERS_LIST_TAG)
+        etag = make_etag("users", newest, generation, fields, *filters)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        limit_cursor = find_filter(LimitCursor, filters)
+        schema_type, load = User, None
+        if fields is not None:
+            # cursors are built from the sort field of the last row
+            schema_type = fields.struct  # type: ignore[assignment]
+            load = fields.load(m.User, *(() if limit_cursor is None else (limit_cursor.field_name,)))
+        results, total, counted = await list_and_count(
+            users_service, *filters, count_strategy=count_strategy, total=matching, load=load
+        )
+        headers = {"ETag": etag, COUNT_STRATEGY_HEADER: counted}
+        if limit_cursor is not None:
+            page = to_cursor_pagination(results, limit_cursor, schema_type=schema_type, total=total)
+            return Response(page, headers=headers)
+        return Response(
+            users_service.to_schema(data=results, total=total, schema_type=schema_type, filters=filters),
+            headers=headers,
+        )
+
+    @get(operation_id="ExportUsers", path=urls.ACCOUNT_EXPORT)
+    async def export_users(
+        self,
+        filters: Annotated[list[FilterTypes], Dependency(skip_validation=True)],
+        fields: Annotated[FieldSet | None, Dependency(skip_validation=True)],
+        export_format: Annotated[
+            ExportFormat, Parameter(query="format", description="Format of the export.", required=False)
+        ] = "ndjson",
+    ) -> Stream:
+        """Export every user matching the filters, ignoring pagination."""
+        schema_type = User if fields is None else fields.struct
+        statement = export_statement(m.User, *filters, load=None if fields is None else fields.load(m.User))
+        return stream_export(
+            alchemy.get_session,
+            statement,
+            schema_type=schema_type,
+            export_format=export_format,
+            fetch_size=settings.db.EXPORT_FETCH_SIZE,
+            filename="users",
+        )
 
-    @get(operation_id="GetUser", path=urls.ACCOUNT_DETAIL)
+    @get(operation_id="GetUsersBatch", path=urls.ACCOUNT_BATCH, opt={QUERY_BUDGET_KEY: 2})
+    async def get_users_batch(
+        self,
+        users_service: UserService,
+        user_ids: Annotated[list[int], Parameter(query="id", description="The users to retrieve.")],
+    ) -> UserBatch:
+        """Get several users."""
+        _check_batch_size(user_ids)
+        return _to_batch(users_service, await users_service.get_batch(user_ids), user_ids)
+
+    @post(operation_id="CreateUsersBatch", path=urls.ACCOUNT_BATCH)
+    async def create_users_batch(self, users_service: UserService, data: list[UserCreate]) -> UserBatch:
+        """Create several users in one transaction."""
+        _check_batch_size(data)
+        skipped = _duplicates([obj.email for obj in data])
+        items = [obj.to_dict() for index, obj in enumerate(data) if index not in skipped]
+        results = await users_service.create_batch(items)
+        return _to_batch(users_service, results, [None] * len(data), skipped)
+
+    @patch(operation_id="UpdateUsersBatch", path=urls.ACCOUNT_BATCH)
+    async def update_users_batch(self, users_service: UserService, data: list[UserBatchUpdate]) -> UserBatch:
+        """Update several users in one transaction."""
+        _check_batch_size(data)
+        skipped = _duplicates([obj.id for obj in data])
+        items = [obj.to_dict() for index, obj in enumerate(data) if index not in skipped]
+        results = await users_service.update_batch(items)
+        return _to_batch(users_service, results, [obj.id for obj in data], skipped)
+
+    @delete(operation_id="DeleteUsersBatch", path=urls.ACCOUNT_BATCH, status_code=HTTP_200_OK)
+    async def delete_users_batch(
+        self,
+        users_service: UserService,
+        user_ids: Annotated[list[int], Parameter(query="id", description="The users to delete.")],
+    ) -> UserBatch:
+        """Delete several users in one transaction."""
+        _check_batch_size(user_ids)
+        return _to_batch(users_service, await users_service.delete_batch(user_ids), user_ids)
+
+    @get(
+        operation_id="GetUser",
+        path=urls.ACCOUNT_DETAIL,
+        cache=settings.cache.route_ttl("GetUser"),
+        opt={CACHE_TAGS_KEY: (USER_TAG,), QUERY_BUDGET_KEY: 2, READ_REPLICA_KEY: False},
+    )
     async def get_user(
         self,
+        request: Request,
         users_service: UserService,
         user_id: Annotated[int, Parameter(title="User ID", description="The user to retrieve.")],
-    ) -> User:
+        fields: Annotated[FieldSet | None, Dependency(skip_validation=True)],
+    ) -> Response[User | Struct]:
         """Get a user."""
-        db_obj = await users_service.get(user_id)
-        return users_service.to_schema(db_obj, schema_type=User)
+        # served from the user cache, which holds whole rows, so only the response is trimmed
+        db_obj = await users_service.get_cached(user_id)
+        etag = make_etag("user", db_obj.id, db_obj.updated_at, fields)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        schema_type = User if fields is None else fields.struct
+        return Response(users_service.to_schema(db_obj, schema_type=schema_type), headers={"ETag": etag})
 
     @post(operation_id="CreateUser", path=urls.ACCOUNT_CREATE)
     async def create_user(self, users_service: UserService, data: UserCreate) -> User:
@@ -72,9 +250,8 @@ class UserController(Controller):
         users_service: UserService,
         user_id: int = Parameter(title="User ID", description="The user to update."),
     ) -> User:
-        """Create a new user."""
-        db_obj = await users_service.update(item_id=user_id, data=data.to_dict())
-        return users_service.to_schema(db_obj, schema_type=User)
+        """Update a user."""
+        return await users_service.update_returning(user_id, data.to_dict())
 
     @delete(operation_id="DeleteUser", path=urls.ACCOUNT_DELETE)
     async def delete_user(
@@ -83,4 +260,4 @@ class UserController(Controller):
         user_id: Annotated[int, Parameter(title="User ID", description="The user to delete.")],
     ) -> None:
         """Delete a user from the system."""
-        _ = await users_service.delete(user_id)
+        await users_service.delete_returning(user_id)
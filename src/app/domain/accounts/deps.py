@@ -2,21 +2,46 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import TYPE_CHECKING, Any, cast
 
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.app import alchemy
+from app.config.base import get_settings
 from app.domain.accounts.services import UserService
-from app.lib.deps import create_service_provider
+from app.lib.admission import AdmissionController, concurrency_for_memory
+from app.lib.deps import create_scoped_service_provider, create_service_provider
+from app.lib.health import health_monitor
+from app.lib.metrics import metrics
+from app.lib.pool import warm_pool
 
 if TYPE_CHECKING:
-    from litestar import Request
+    from collections.abc import AsyncGenerator
+
+    from advanced_alchemy.service import ErrorMessages
+    from litestar import Litestar, Request
+    from litestar.datastructures import State
+    from sqlalchemy.ext.asyncio import AsyncConnection
 
     from app.db import models as m
 
+logger = structlog.get_logger()
+
+LOGIN_ADMISSION_STATE_KEY = "login_admission"
+POOL_WARMUP_TASK = "pool_warmup"
+"""The startup task holding readiness until the connection pools are warm."""
+
+_error_messages: ErrorMessages = {"duplicate_key": "This user already exists.", "integrity": "User operation failed."}
+
 # create a hard reference to this since it's used often
-provide_users_service = create_service_provider(
-    UserService,
-    error_messages={"duplicate_key": "This user already exists.", "integrity": "User operation failed."},
-)
+provide_users_service = create_service_provider(UserService, error_messages=_error_messages)
+"""Users service on an explicit session, for use outside of a request."""
+provide_request_users_service = create_scoped_service_provider(UserService, alchemy, error_messages=_error_messages)
+"""Users service shared by authentication and handlers within a request."""
 
 
 async def provide_user(request: Request[m.User, Any, Any]) -> m.User:
@@ -29,3 +54,88 @@ async def provide_user(request: Request[m.User, Any, Any]) -> m.User:
         User
     """
     return request.user
+
+
+@asynccontextmanager
+async def login_admission_lifespan(app: Litestar) -> AsyncGenerator[None, None]:
+    """Size the login admission controller for this worker.
+
+    Each concurrent login runs a memory-hard password verification, so the
+    number of concurrent logins is derived from the argon2 memory cost.
+    """
+    settings = get_settings()
+    admission = AdmissionController(
+        max_concurrency=concurrency_for_memory(
+            task_bytes=settings.hashing.MEMORY_COST * 1024,
+            memory_percent=settings.auth.LOGIN_MEMORY_PERCENT,
+            ceiling=settings.auth.LOGIN_MAX_CONCURRENCY,
+        ),
+        max_waiting=settings.auth.LOGIN_MAX_WAITING,
+        wait_timeout=settings.auth.LOGIN_WAIT_TIMEOUT_MS / 1000,
+        retry_after=settings.auth.LOGIN_RETRY_AFTER,
+    )
+    app.state[LOGIN_ADMISSION_STATE_KEY] = admission
+    metrics.register("login_admission", admission.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("login_admission")
+        app.state.pop(LOGIN_ADMISSION_STATE_KEY, None)
+
+
+async def _prime_connection(connection: AsyncConnection) -> None:
+    async with AsyncSession(bind=connection) as session:
+        await UserService(session=session).prime_statements()
+
+
+async def _warm_up_pools(seconds: int) -> None:
+    settings = get_settings().db
+    engines = [settings.get_engine(), *settings.get_replica_engines()]
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(seconds):
+            await asyncio.gather(*(warm_pool(engine, settings.POOL_SIZE, _prime_connection) for engine in engines))
+    except Exception as exc:  # noqa: BLE001
+        # the database health check decides whether the worker is ready from now on
+        await logger.awarning("Connection pool warm-up failed", error=f"{type(exc).__name__}: {exc}")
+    else:
+        await logger.ainfo(
+            "Connection pools warmed up",
+            pools=len(engines),
+            connections=settings.POOL_SIZE,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+    finally:
+        health_monitor.release(POOL_WARMUP_TASK)
+
+
+@asynccontextmanager
+async def pool_warmup_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Open the connection pools of this worker and prepare the hot user statements on each connection.
+
+    The warm-up runs in the background, and the worker reports not ready until it completes or times out.
+    """
+    settings = get_settings().db
+    if settings.POOL_DISABLED or settings.POOL_WARMUP_TIMEOUT <= 0:
+        yield
+        return
+    health_monitor.hold(POOL_WARMUP_TASK)
+    task = asyncio.create_task(_warm_up_pools(settings.POOL_WARMUP_TIMEOUT))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+def provide_login_admission(state: State) -> AdmissionController:
+    """Get the login admission controller of the current worker.
+
+    Args:
+        state: The application state.
+
+    Returns:
+        AdmissionController
+    """
+    return cast("AdmissionController", state[LOGIN_ADMISSION_STATE_KEY])
@@ -1,22 +1,25 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import TYPE_CHECKING, Any
 
+from litestar.exceptions import PermissionDeniedException
 from litestar.security.jwt import JWTAuth
 
 from app.config import constants
-from app.config.app import alchemy
 from app.config.base import get_settings
 from app.db import models as m
 from app.domain.accounts import urls
-from app.domain.accounts.deps import provide_users_service
+from app.domain.accounts.claims import USER_CLAIMS_KEY, token_revocations, token_version, user_from_claims
+from app.domain.accounts.deps import provide_request_users_service
 
 if TYPE_CHECKING:
     from litestar.connection import ASGIConnection
+    from litestar.handlers.base import BaseRouteHandler
     from litestar.security.jwt import Token
 
 
-__all__ = ("auth", "current_user_from_token")
+__all__ = ("auth", "current_user_from_token", "requires_admin")
 
 
 settings = get_settings()
@@ -25,7 +28,9 @@ settings = get_settings()
 async def current_user_from_token(token: Token, connection: ASGIConnection[Any, Any, Any, Any]) -> m.User | None:
     """Lookup current user from local JWT token.
 
-    Fetches the user information from the database
+    In claims mode the user is rebuilt from the token itself unless this worker saw the user change after the token
+    was issued.  Otherwise the user is fetched from the worker's user cache, falling back to the database, and tokens
+    carrying claims for a previous password are rejected.
 
 
     Args:
@@ -36,13 +41,38 @@ async def current_user_from_token(token: Token, connection: ASGIConnection[Any,
     Returns:
         User: User record mapped to the JWT identifier
     """
-    service = await anext(provide_users_service(alchemy.provide_session(connection.app.state, connection.scope)))
-    return await service.get_one_or_none(email=token.sub)
+    claims = token.extras.get(USER_CLAIMS_KEY)
+    if (
+        settings.auth.CLAIMS_MODE
+        and (claimed := user_from_claims(claims)) is not None
+        and not await token_revocations.changed_since(claimed.id, token.iat)
+    ):
+        return claimed
+    service = provide_request_users_service(connection.app.state, connection.scope)
+    user = await service.get_cached_by_email(token.sub)
+    if user is not None and isinstance(claims, dict) and claims.get("tv") != token_version(user.hashed_password):
+        return None
+    return user
+
+
+def requires_admin(connection: ASGIConnection[Any, m.User, Any, Any], _: BaseRouteHandler) -> None:
+    """Allow only the users listed in ``AUTH_ADMIN_EMAILS``.
+
+    Args:
+        connection (ASGIConnection[Any, m.User, Any, Any]): ASGI connection of an authenticated user.
+        _ (BaseRouteHandler): The route handler.
+
+    Raises:
+        PermissionDeniedException: The user is not an administrator.
+    """
+    if connection.user.email.lower() not in settings.auth.admin_emails:
+        raise PermissionDeniedException(detail="Insufficient privileges")
 
 
 auth = JWTAuth[m.User](
     retrieve_user_handler=current_user_from_token,
     token_secret=settings.app.SECRET_KEY,
+    default_token_expiration=timedelta(seconds=settings.auth.TOKEN_EXPIRATION),
     exclude=[
         constants.HEALTH_ENDPOINT,
         urls.ACCOUNT_LOGIN,
@@ -0,0 +1,195 @@
+"""Bulk import of users from CSV or JSON lines files."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import os
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Literal
+
+import msgspec
+
+from app.domain.accounts.schemas import UserImport
+from app.domain.accounts.services import UserService
+from app.lib import crypt
+from app.lib.exceptions import ApplicationError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor
+    from contextlib import AbstractAsyncContextManager
+    from pathlib import Path
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.domain.accounts.services import ConflictPolicy
+
+__all__ = ("ImportCheckpoint", "ImportFormat", "ImportProgress", "UserImportError", "import_users", "read_user_records")
+
+ImportFormat = Literal["csv", "jsonl"]
+
+
+class UserImportError(ApplicationError):
+    """A record of an import file is not a valid user."""
+
+
+def read_user_records(path: Path, import_format: ImportFormat | None = None) -> Iterator[UserImport]:
+    """Read the users of an import file one record at a time.
+
+    Args:
+        path: A CSV file with a header row, or a file of one JSON object per line.
+        import_format: The format of the file, by default guessed from its extension.
+
+    Raises:
+        UserImportError: A record is not a valid user.
+
+    Yields:
+        The users, in file order.
+    """
+    import_format = import_format or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+    with path.open(newline="" if import_format == "csv" else None, encoding="utf-8") as file:
+        if import_format == "csv":
+            # empty cells are missing values
+            lines: Iterable[Any] = ({key: value or None for key, value in row.items()} for row in csv.DictReader(file))
+            decode: Callable[[Any], UserImport] = partial(msgspec.convert, type=UserImport)
+        else:
+            lines = (line for line in file if line.strip())
+            decode = msgspec.json.Decoder(UserImport).decode
+        for number, line in enumerate(lines, start=1):
+            try:
+                yield decode(line)
+            except msgspec.ValidationError as exc:
+                msg = f"{path}: record {number}: {exc}"
+                raise UserImportError(detail=msg) from exc
+
+
+@dataclass
+class ImportCheckpoint:
+    """Number of records of an import file already committed, kept next to the file until the import completes."""
+
+    path: Path
+
+    @classmethod
+    def for_source(cls, source: Path) -> ImportCheckpoint:
+        return cls(source.with_name(f"{source.name}.progress"))
+
+    def load(self) -> int:
+        return int(self.path.read_text()) if self.path.exists() else 0
+
+    def save(self, position: int) -> None:
+        # replaced atomically, an interruption leaves the previous checkpoint intact
+        staged = self.path.with_name(f"{self.path.name}.tmp")
+        staged.write_text(str(position))
+        staged.replace(self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class ImportProgress:
+    """Progress of a running import."""
+
+    position: int = 0
+    """Records of the file committed, including those of previous runs."""
+    read: int = 0
+    """Records committed by this run."""
+    written: int = 0
+    """Users inserted or updated by this run."""
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rate(self) -> float:
+        """Records committed per second by this run."""
+        return self.read / max(time.perf_counter() - self.started, 1e-9)
+
+
+def _chunks(records: Iterable[UserImport], size: int) -> Iterator[list[UserImport]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def _hash_chunk(chunk: list[UserImport], executor: Executor, workers: int) -> list[dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    passwords = [record.password for record in chunk if record.password is not None]
+    step = max(-(-len(passwords) // workers), 1)
+    batches = await asyncio.gather(
+        *(
+            loop.run_in_executor(executor, crypt.hash_passwords, passwords[start : start + step])
+            for start in range(0, len(passwords), step)
+        )
+    )
+    hashes = iter([hashed for batch in batches for hashed in batch])
+    return [
+        {
+            "email": record.email,
+            "name": record.name,
+            "surname": record.surname,
+            "hashed_password": None if record.password is None else next(hashes),
+        }
+        for record in chunk
+    ]
+
+
+async def import_users(
+    records: Iterable[UserImport],
+    session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+    executor: Executor,
+    *,
+    workers: int | None = None,
+    chunk_size: int = 5000,
+    on_conflict: ConflictPolicy = "skip",
+    checkpoint: ImportCheckpoint | None = None,
+    on_progress: Callable[[ImportProgress], None] | None = None,
+) -> ImportProgress:
+    """Import users in chunks, each hashed on ``executor`` and committed in its own transaction.
+
+    The passwords of the next chunk are hashed while the current chunk is written.  After every commit the number of
+    records consumed is saved to ``checkpoint``, and an interrupted import resumes after the last committed chunk.
+
+    Args:
+        records: The users to import, see :func:`read_user_records`.
+        session_factory: Opens the session of each chunk.
+        executor: Hashes passwords, ideally a process pool with a worker per core.
+        workers: Number of batches the passwords of a chunk are split into, by default the number of cores.
+        chunk_size: Records per transaction.
+        on_conflict: What to do with users whose email already exists.
+        checkpoint: Where progress is recorded, cleared once every record is imported.
+        on_progress: Called after every committed chunk.
+
+    Returns:
+        The final progress.
+    """
+    workers = workers or os.cpu_count() or 1
+    progress = ImportProgress(position=checkpoint.load() if checkpoint else 0)
+    chunks = _chunks(islice(records, progress.position, None), chunk_size)
+    pending: asyncio.Future[list[dict[str, Any]]] | None = None
+    if (chunk := next(chunks, None)) is not None:
+        pending = asyncio.ensure_future(_hash_chunk(chunk, executor, workers))
+    try:
+        while pending is not None:
+            rows = await pending
+            pending = None
+            if (chunk := next(chunks, None)) is not None:
+                pending = asyncio.ensure_future(_hash_chunk(chunk, executor, workers))
+            async with session_factory() as session, UserService.new(session=session) as users_service:
+                written = await users_service.import_batch(rows, on_conflict)
+                await session.commit()
+            progress.position += len(rows)
+            progress.read += len(rows)
+            progress.written += len(written)
+            if checkpoint is not None:
+                checkpoint.save(progress.position)
+            if on_progress is not None:
+                on_progress(progress)
+    finally:
+        if pending is not None:
+            pending.cancel()
+    if checkpoint is not None:
+        checkpoint.clear()
+    return progress
@@ -8,7 +8,11 @@ __all__ = (
     "AccountLogin",
     "AccountRegister",
     "User",
+    "UserBatch",
+    "UserBatchError",
+    "UserBatchUpdate",
     "UserCreate",
+    "UserImport",
     "UserUpdate",
 )
 
@@ -30,6 +34,15 @@ class UserCreate(CamelizedBaseStruct):
     surname: str | None = None
 
 
+class UserImport(CamelizedBaseStruct):
+    """A user read by the bulk import.  Users without a password cannot log in until one is set."""
+
+    email: str
+    password: str | None = None
+    name: str | None = None
+    surname: str | None = None
+
+
 class UserUpdate(CamelizedBaseStruct, omit_defaults=True):
     email: str | None | msgspec.UnsetType = msgspec.UNSET
     password: str | None | msgspec.UnsetType = msgspec.UNSET
@@ -37,6 +50,30 @@ class UserUpdate(CamelizedBaseStruct, omit_defaults=True):
     surname: str | None | msgspec.UnsetType = msgspec.UNSET
 
 
+class UserBatchUpdate(CamelizedBaseStruct, omit_defaults=True):
+    id: int
+    email: str | None | msgspec.UnsetType = msgspec.UNSET
+    password: str | None | msgspec.UnsetType = msgspec.UNSET
+    name: str | None | msgspec.UnsetType = msgspec.UNSET
+    surname: str | None | msgspec.UnsetType = msgspec.UNSET
+
+
+class UserBatchError(CamelizedBaseStruct):
+    """An item of a batch request that was not applied."""
+
+    index: int
+    """Position of the item in the request."""
+    detail: str
+    id: int | None = None
+
+
+class UserBatch(CamelizedBaseStruct):
+    """Result of a batch request.  Items that failed are reported in ``errors``, the others are applied."""
+
+    items: list[User]
+    errors: list[UserBatchError] = []
+
+
 class AccountLogin(CamelizedBaseStruct):
     username: str
     password: str
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from typing import Any
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, Literal, TypeVar, cast
 
+from advanced_alchemy.exceptions import NotFoundError, wrap_sqlalchemy_exception
+from advanced_alchemy.filters import CollectionFilter, LimitOffset, OrderBy, PaginationFilter
 from advanced_alchemy.repository import (
     SQLAlchemyAsyncRepository,
 )
@@ -12,9 +15,66 @@ from advanced_alchemy.service import (
     schema_dump,
 )
 from litestar.exceptions import PermissionDeniedException
+from sqlalchemy import column, delete, func, null, select, table, text, update, values
+from sqlalchemy.dialects.postgresql import Insert as PostgresInsert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import Insert as SQLiteInsert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from app.config.constants import DEFAULT_PAGINATION_SIZE
 from app.db import models as m
+from app.domain.accounts.cache import USER_TAG, USERS_LIST_TAG, user_cache
+from app.domain.accounts.claims import token_revocations
+from app.domain.accounts.schemas import User
 from app.lib import crypt
+from app.lib.cache import purge_after_commit, response_cache
+from app.lib.pagination import estimate_count
+from app.lib.replicas import read_from_primary
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from datetime import datetime
+
+    from advanced_alchemy.filters import FilterTypes
+    from sqlalchemy import Select, Table
+
+ConflictPolicy = Literal["skip", "update", "fail"]
+"""What a bulk import does with users whose email already exists."""
+
+_IMPORT_COLUMNS = ("email", "name", "surname", "hashed_password")
+
+_USER_TABLE = cast("Table", m.User.__table__)
+_RESPONSE_COLUMNS = (
+    _USER_TABLE.c.id,
+    _USER_TABLE.c.email,
+    _USER_TABLE.c.name,
+    _USER_TABLE.c.surname,
+    _USER_TABLE.c.hashed_password.is_not(None).label("has_password"),
+)
+"""Columns of the ``User`` response struct, returned by the single statement update."""
+
+_InsertT = TypeVar("_InsertT", PostgresInsert, SQLiteInsert)
+
+_NOT_FOUND = "User not found."
+_EMAIL_TAKEN = "A user with this email already exists."
+
+
+def _on_conflict(statement: _InsertT, on_conflict: ConflictPolicy) -> _InsertT:
+    """Add the clause of the ``on_conflict`` policy of a bulk import to an insert into the users table."""
+    if on_conflict == "skip":
+        return statement.on_conflict_do_nothing(index_elements=["email"])
+    if on_conflict == "update":
+        excluded = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=["email"],
+            set_={
+                "name": excluded.name,
+                "surname": excluded.surname,
+                "hashed_password": func.coalesce(excluded.hashed_password, _USER_TABLE.c.hashed_password),
+                "updated_at": func.now(),
+            },
+        )
+    return statement
 
 
 class UserService(SQLAlchemyAsyncRepositoryService[m.User]):
@@ -32,6 +92,289 @@ class UserService(SQLAlchemyAsyncRepositoryService[m.User]):
         data = await self._populate_model(data)
         return await super().to_model(data, operation=operation)
 
+    async def get_cached(self, item_id: int) -> m.User:
+        """Get a user by id, served from the worker's user cache when possible.
+
+        The returned instance is not attached to the session and must not be modified.  Cache misses are read from the
+        primary.
+        """
+        if (cached := await user_cache.get_by_id(item_id)) is not None:
+            return cached
+        with read_from_primary():
+            db_obj = await self.get(item_id)
+        return await user_cache.add(db_obj)
+
+    async def get_cached_by_email(self, email: str) -> m.User | None:
+        """Get a user by email, served from the worker's user cache when possible.
+
+        The returned instance is not attached to the session and must not be modified.  Cache misses are read from the
+        primary.
+        """
+        if (cached := await user_cache.get_by_email(email)) is not None:
+            return cached
+        with read_from_primary():
+            db_obj = await self.get_one_or_none(email=email)
+        return None if db_obj is None else await user_cache.add(db_obj)
+
+    async def list_version(self, *filters: FilterTypes, count: bool = True) -> tuple[datetime | None, int | None]:
+        """Get the newest ``updated_at`` and the number of the users matching ``filters``.
+
+        Pagination and ordering are ignored.  Together the two values change whenever a user is added to, changed in or
+        removed from the filtered set, at the cost of a single aggregate query.  Without ``count`` the number is
+        ``None``, sparing a count of every matching row.
+        """
+        columns = (func.max(m.User.updated_at), func.count() if count else null())
+        statement = cast("Select[Any]", select(*columns).select_from(m.User))
+        for filter_ in filters:
+            if not isinstance(filter_, PaginationFilter | OrderBy):
+                statement = filter_.append_to_statement(statement, m.User)
+        # ranked searches order their matches
+        newest, total = (await self.repository.session.execute(statement.order_by(None))).one()
+        return newest, total
+
+    async def prime_statements(self) -> None:
+        """Run the most frequent queries of the service once, matching no user.
+
+        The connection of the session prepares their statements, so the first requests it serves do not.  The
+        listing queries run with the default pagination and order of the users list.
+        """
+        await self.get_one_or_none(email="")
+        with suppress(NotFoundError):
+            await self.get(0)
+        filters = (LimitOffset(limit=DEFAULT_PAGINATION_SIZE, offset=0), OrderBy(field_name="name", sort_order="asc"))
+        await self.list_version(*filters, count=False)
+        await estimate_count(self.repository.session, m.User, *filters)
+        await self.list(*filters)
+        await self.count(*filters)
+
+    async def create(self, data: ModelDictT[m.User], **kwargs: Any) -> m.User:
+        db_obj = await super().create(data, **kwargs)
+        await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+        await self._purge_responses(USERS_LIST_TAG)
+        return db_obj
+
+    async def update(self, data: ModelDictT[m.User], item_id: Any | None = None, **kwargs: Any) -> m.User:
+        db_obj = await super().update(data, item_id=item_id, **kwargs)
+        # invalidating by id also drops the entry cached under a previous email
+        await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+        await token_revocations.record_change(db_obj.id)
+        await self._purge_responses(USERS_LIST_TAG, USER_TAG.format(user_id=db_obj.id))
+        return db_obj
+
+    async def delete(self, item_id: Any, **kwargs: Any) -> m.User:
+        db_obj = await super().delete(item_id, **kwargs)
+        await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+        await token_revocations.record_change(db_obj.id)
+        await self._purge_responses(USERS_LIST_TAG, USER_TAG.format(user_id=db_obj.id))
+        return db_obj
+
+    async def update_returning(self, item_id: int, data: dict[str, Any]) -> User:
+        """Partially update a user with a single ``UPDATE ... RETURNING``, without loading it first.
+
+        Args:
+            item_id: The user to update.
+            data: The fields to change, a ``password`` is hashed.
+
+        Raises:
+            NotFoundError: No user has this id.
+
+        Returns:
+            The updated user, mapped straight from the returned row.
+        """
+        changes = dict(data)
+        await self._populate_with_hashed_password(changes)
+        statement = update(_USER_TABLE).where(_USER_TABLE.c.id == item_id).returning(*_RESPONSE_COLUMNS)
+        if changes:
+            statement = statement.values(changes)
+        with wrap_sqlalchemy_exception(error_messages=self.repository.error_messages):
+            row = (await self.repository.session.execute(statement)).one_or_none()
+        if row is None:
+            msg = f"No item found when filtering by id={item_id}"
+            raise NotFoundError(msg)
+        user = User(**row._mapping)
+        await user_cache.invalidate(user_id=user.id, email=user.email)
+        await token_revocations.record_change(user.id)
+        await self._purge_responses(USERS_LIST_TAG, USER_TAG.format(user_id=user.id))
+        return user
+
+    async def delete_returning(self, item_id: int) -> None:
+        """Delete a user with a single ``DELETE ... RETURNING``, without loading it first.
+
+        Raises:
+            NotFoundError: No user has this id.
+        """
+        statement = delete(_USER_TABLE).where(_USER_TABLE.c.id == item_id).returning(_USER_TABLE.c.email)
+        with wrap_sqlalchemy_exception(error_messages=self.repository.error_messages):
+            email = (await self.repository.session.execute(statement)).scalar_one_or_none()
+        if email is None:
+            msg = f"No item found when filtering by id={item_id}"
+            raise NotFoundError(msg)
+        await user_cache.invalidate(user_id=item_id, email=email)
+        await token_revocations.record_change(item_id)
+        await self._purge_responses(USERS_LIST_TAG, USER_TAG.format(user_id=item_id))
+
+    async def get_batch(self, ids: Sequence[int]) -> list[m.User | str]:
+        """Get users by id with a single ``IN`` lookup.
+
+        Returns:
+            The user of each id, or why it is missing, in the order of ``ids``.
+        """
+        found = {db_obj.id: db_obj for db_obj in await self.list(CollectionFilter(field_name="id", values=ids))}
+        return [found.get(user_id, _NOT_FOUND) for user_id in ids]
+
+    async def create_batch(self, items: Sequence[dict[str, Any]]) -> list[m.User | str]:
+        """Create users with a single multi-row ``INSERT ... RETURNING``.
+
+        Passwords are hashed in parallel on the hashing workers.  Users whose email is already registered are skipped.
+
+        Args:
+            items: Values of the new users, with distinct emails.
+
+        Returns:
+            The created user of each item, or why it was skipped, in the order of ``items``.
+        """
+        if not items:
+            return []
+        hashes = await crypt.get_password_hashes([item["password"] for item in items])
+        rows = [
+            {key: value for key, value in item.items() if key != "password"} | {"hashed_password": hashed}
+            for item, hashed in zip(items, hashes, strict=True)
+        ]
+        insert = await self._dialect_insert()
+        statement = insert(m.User).values(rows).on_conflict_do_nothing(index_elements=["email"]).returning(m.User)
+        created = {db_obj.email: db_obj for db_obj in await self.repository.session.scalars(statement)}
+        for db_obj in created.values():
+            await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+        if created:
+            await self._purge_responses(USERS_LIST_TAG)
+        return [created.get(item["email"], _EMAIL_TAKEN) for item in items]
+
+    async def update_batch(self, items: Sequence[dict[str, Any]]) -> list[m.User | str]:
+        """Update users with ``UPDATE ... FROM (VALUES ...) RETURNING``, one statement per set of changed fields.
+
+        Args:
+            items: The ``id`` of each user and the values to change, with distinct ids.
+
+        Returns:
+            The updated user of each item, or why it was skipped, in the order of ``items``.
+        """
+        session = self.repository.session
+        passwords = [item["password"] for item in items if item.get("password") is not None]
+        hashes = iter(await crypt.get_password_hashes(passwords))
+        emails = [item["email"] for item in items if item.get("email") is not None]
+        owners: dict[str, int] = {}
+        if emails:
+            owned = select(m.User.email, m.User.id).where(m.User.email.in_(emails))
+            owners = dict((await session.execute(owned)).all())
+        # why each item was skipped, ``None`` for the items sent to the database
+        skipped: list[str | None] = []
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for item in items:
+            row = {key: value for key, value in item.items() if key != "password"}
+            if item.get("password") is not None:
+                row["hashed_password"] = next(hashes)
+            if (email := row.get("email")) is not None and owners.setdefault(email, row["id"]) != row["id"]:
+                skipped.append(_EMAIL_TAKEN)
+                continue
+            skipped.append(None)
+            groups.setdefault(tuple(sorted(row.keys() - {"id"})), []).append(row)
+        updated: dict[int, m.User] = {}
+        for keys, rows in groups.items():
+            source = values(*(column(key, _USER_TABLE.c[key].type) for key in ("id", *keys)), name="batch").data(
+                [tuple(row[key] for key in ("id", *keys)) for row in rows]
+            )
+            statement = update(m.User).where(m.User.id == source.c.id)
+            if keys:
+                statement = statement.values({key: source.c[key] for key in keys})
+            db_objs = await session.scalars(
+                statement.returning(m.User), execution_options={"synchronize_session": False, "populate_existing": True}
+            )
+            updated |= {db_obj.id: db_obj for db_obj in db_objs}
+        tags = [USERS_LIST_TAG]
+        for db_obj in updated.values():
+            await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+            await token_revocations.record_change(db_obj.id)
+            tags.append(USER_TAG.format(user_id=db_obj.id))
+        if updated:
+            await self._purge_responses(*tags)
+        return [
+            updated.get(item["id"], _NOT_FOUND) if reason is None else reason
+            for item, reason in zip(items, skipped, strict=True)
+        ]
+
+    async def delete_batch(self, ids: Sequence[int]) -> list[m.User | str]:
+        """Delete users with a single ``DELETE ... RETURNING``.
+
+        Returns:
+            The deleted user of each id, or why it is missing, in the order of ``ids``.
+        """
+        statement = delete(m.User).where(m.User.id.in_(ids)).returning(m.User)
+        deleted = {
+            db_obj.id: db_obj
+            for db_obj in await self.repository.session.scalars(
+                statement, execution_options={"synchronize_session": False}
+            )
+        }
+        tags = [USERS_LIST_TAG]
+        for db_obj in deleted.values():
+            await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+            await token_revocations.record_change(db_obj.id)
+            tags.append(USER_TAG.format(user_id=db_obj.id))
+        if deleted:
+            await self._purge_responses(*tags)
+        return [deleted.get(user_id, _NOT_FOUND) for user_id in ids]
+
+    async def import_batch(
+        self, rows: Sequence[dict[str, Any]], on_conflict: ConflictPolicy = "skip"
+    ) -> list[tuple[int, str]]:
+        """Insert users in bulk, bypassing the ORM.
+
+        PostgreSQL loads the rows with ``COPY`` into a temporary table and inserts them from there, other databases
+        insert them with a single ``executemany``.  The caller commits.
+
+        Args:
+            rows: Values of the email, name, surname and hashed_password columns.
+            on_conflict: ``skip`` keeps existing users, ``update`` overwrites them (keeping their password when the
+                row has none) and ``fail`` raises an integrity error.
+
+        Returns:
+            The id and email of every inserted or updated user.
+        """
+        if on_conflict == "update":
+            # a statement may not update the same row twice, the last row of an email wins
+            rows = list({row["email"]: row for row in rows}.values())
+        connection = await self.repository.session.connection()
+        returning = (_USER_TABLE.c.id, _USER_TABLE.c.email)
+        if connection.dialect.name == "postgresql":
+            await connection.execute(
+                text(
+                    "CREATE TEMPORARY TABLE IF NOT EXISTS user_import "
+                    "(email varchar, name varchar, surname varchar, hashed_password varchar) ON COMMIT DELETE ROWS"
+                )
+            )
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+                "user_import",
+                records=[tuple(row.get(key) for key in _IMPORT_COLUMNS) for row in rows],
+                columns=_IMPORT_COLUMNS,
+            )
+            staging = table("user_import", *(column(key) for key in _IMPORT_COLUMNS))
+            pg_statement = pg_insert(_USER_TABLE).from_select(_IMPORT_COLUMNS, select(staging))
+            result = await connection.execute(_on_conflict(pg_statement, on_conflict).returning(*returning))
+        else:
+            sqlite_statement = _on_conflict(sqlite_insert(_USER_TABLE), on_conflict)
+            parameters = [{key: row.get(key) for key in _IMPORT_COLUMNS} for row in rows]
+            result = await connection.execute(sqlite_statement.returning(*returning), parameters)
+        written = [(user_id, email) for user_id, email in result.all()]
+        tags = [USERS_LIST_TAG]
+        if on_conflict == "update":
+            for user_id, email in written:
+                await user_cache.invalidate(user_id=user_id, email=email)
+                await token_revocations.record_change(user_id)
+                tags.append(USER_TAG.format(user_id=user_id))
+        await self._purge_responses(*tags)
+        return written
+
     async def authenticate(self, username: str, password: bytes | str) -> m.User:
         """Authenticate a user against the stored hashed password."""
         db_obj = await self.get_one_or_none(email=username)
@@ -41,13 +384,24 @@ class UserService(SQLAlchemyAsyncRepositoryService[m.User]):
         if db_obj.hashed_password is None:
             msg = "User not found or password invalid."
             raise PermissionDeniedException(detail=msg)
-        if not await crypt.verify_password(password, db_obj.hashed_password):
+        valid, new_hash = await crypt.verify_and_update_password(password, db_obj.hashed_password)
+        if not valid:
             msg = "User not found or password invalid"
             raise PermissionDeniedException(detail=msg)
+        if new_hash is not None:
+            # the stored hash predates the current hashing profile
+            db_obj.hashed_password = new_hash
+            db_obj = await self.repository.update(db_obj)
+            await user_cache.invalidate(user_id=db_obj.id)
         return db_obj
 
     async def update_password(self, data: dict[str, Any], db_obj: m.User) -> None:
-        """Modify stored user password."""
+        """Modify stored user password.
+
+        ``db_obj`` may be a shared snapshot, from the user cache or rebuilt from token claims, so the user is loaded
+        again before it is changed.
+        """
+        db_obj = await self.get(db_obj.id)
         if db_obj.hashed_password is None:
             msg = "User not found or password invalid."
             raise PermissionDeniedException(detail=msg)
@@ -56,6 +410,18 @@ class UserService(SQLAlchemyAsyncRepositoryService[m.User]):
             raise PermissionDeniedException(detail=msg)
         db_obj.hashed_password = await crypt.get_password_hash(data["new_password"])
         await self.repository.update(db_obj)
+        await user_cache.invalidate(user_id=db_obj.id, email=db_obj.email)
+        await token_revocations.record_change(db_obj.id)
+        await self._purge_responses(USER_TAG.format(user_id=db_obj.id))
+
+    async def _dialect_insert(self) -> Any:
+        """The ``insert`` construct of the session's dialect, which supports ``ON CONFLICT``."""
+        connection = await self.repository.session.connection()
+        return pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+
+    async def _purge_responses(self, *tags: str) -> None:
+        await response_cache.purge(*tags)
+        purge_after_commit(self.repository.session, *tags)
 
     async def _populate_model(self, data: ModelDictT[m.User]) -> ModelDictT[m.User]:
         data = schema_dump(data)
@@ -6,6 +6,8 @@ import structlog
 from litestar.events import listener
 
 from app.config.app import alchemy
+from app.domain.accounts.cache import USERS_LIST_TAG
+from app.lib.cache import response_cache
 
 from .deps import provide_users_service
 
@@ -25,6 +27,8 @@ async def user_created_event_handler(
         user_id: The primary key of the user that was created.
     """
     await logger.ainfo("Running post signup flow.")
+    # the signup transaction has committed by now, so listings cached meanwhile are stale
+    await response_cache.purge(USERS_LIST_TAG)
     async with alchemy.get_session() as db_session:
         service = await anext(provide_users_service(db_session))
         obj = await service.get_one_or_none(id=user_id)
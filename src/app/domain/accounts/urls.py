@@ -2,6 +2,8 @@ ACCOUNT_LOGIN = "/api/access/login"
 ACCOUNT_REGISTER = "/api/access/signup"
 ACCOUNT_PROFILE = "/api/me"
 ACCOUNT_LIST = "/api/users"
+ACCOUNT_EXPORT = "/api/users/export"
+ACCOUNT_BATCH = "/api/users/batch"
 ACCOUNT_DELETE = "/api/users/{user_id:int}"
 ACCOUNT_DETAIL = "/api/users/{user_id:int}"
 ACCOUNT_UPDATE = "/api/users/{user_id:int}"
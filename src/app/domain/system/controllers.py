@@ -1,17 +1,21 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Literal, TypeVar
+from typing import Annotated, Any, Literal, TypeVar
 
 import structlog
-from litestar import Controller, MediaType, Request, get
+from litestar import Controller, MediaType, get
+from litestar.params import Parameter
 from litestar.response import Response
-from sqlalchemy import text
+from litestar.status_codes import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
 
-from .schemas import SystemHealth
-from .urls import SYSTEM_HEALTH
+from app.config.constants import QUERY_BUDGET_KEY
+from app.domain.accounts.guards import requires_admin
+from app.lib.health import health_monitor
+from app.lib.metrics import metrics
+from app.lib.slow_queries import slow_query_log
 
-if TYPE_CHECKING:
-    from sqlalchemy.ext.asyncio import AsyncSession
+from .schemas import SystemHealth
+from .urls import SYSTEM_HEALTH, SYSTEM_LIVENESS, SYSTEM_METRICS, SYSTEM_READINESS, SYSTEM_SLOW_QUERIES
 
 logger = structlog.get_logger()
 OnlineOffline = TypeVar("OnlineOffline", bound=Literal["online", "offline"])
@@ -26,37 +30,90 @@ class SystemController(Controller):
         path=SYSTEM_HEALTH,
         media_type=MediaType.JSON,
         cache=False,
+        opt={QUERY_BUDGET_KEY: 0},
         tags=["System"],
         summary="Health Check",
-        description="Execute a health check against backend components.  Returns system information including database and cache status.",
+        description="Returns the latest background health checks of the database and cache, and the app information.",
     )
-    async def check_system_health(
-        self,
-        request: Request,
-        db_session: AsyncSession,
-    ) -> Response[SystemHealth]:
-        """Check database available and returns app config info."""
-        try:
-            await db_session.execute(text("select 1"))
-            db_ping = True
-        except ConnectionRefusedError:
-            db_ping = False
-
-        db_status = "online" if db_ping else "offline"
-        healthy = db_ping
+    async def check_system_health(self) -> Response[SystemHealth]:
+        """Return the status of the database and cache from the latest health checks."""
+        db_status = health_monitor.status("database")
+        cache_status = health_monitor.status("cache")
+        healthy = health_monitor.ready
         if healthy:
-            await logger.adebug(
-                "System Health",
-                database_status=db_status,
-            )
+            await logger.adebug("System Health", database_status=db_status, cache_status=cache_status)
         else:
-            await logger.awarn(
-                "System Health Check",
-                database_status=db_status,
-            )
+            await logger.awarn("System Health Check", database_status=db_status, cache_status=cache_status)
 
         return Response(
-            content=SystemHealth(database_status=db_status),  # type: ignore
-            status_code=200 if db_ping else 500,
+            content=SystemHealth(database_status=db_status, cache_status=cache_status),
+            status_code=HTTP_200_OK if healthy else HTTP_503_SERVICE_UNAVAILABLE,
             media_type=MediaType.JSON,
         )
+
+    @get(
+        operation_id="SystemLiveness",
+        name="system:liveness",
+        path=SYSTEM_LIVENESS,
+        media_type=MediaType.JSON,
+        cache=False,
+        opt={QUERY_BUDGET_KEY: 0},
+        summary="Liveness Probe",
+        description="Answers as long as the worker serves requests, whatever the state of its dependencies.",
+    )
+    async def check_liveness(self) -> dict[str, str]:
+        """Report the worker alive."""
+        return {"status": "alive"}
+
+    @get(
+        operation_id="SystemReadiness",
+        name="system:readiness",
+        path=SYSTEM_READINESS,
+        media_type=MediaType.JSON,
+        cache=False,
+        opt={QUERY_BUDGET_KEY: 0},
+        summary="Readiness Probe",
+        description="Returns the latest background health checks of each component, with their latency.  Responds "
+        "with a 503 unless every critical component is online.",
+    )
+    async def check_readiness(self) -> Response[dict[str, Any]]:
+        """Return the latest health checks, without probing the components."""
+        report = health_monitor.stats()
+        return Response(
+            content=report,
+            status_code=HTTP_200_OK if report["ready"] else HTTP_503_SERVICE_UNAVAILABLE,
+            media_type=MediaType.JSON,
+        )
+
+    @get(
+        operation_id="SystemMetrics",
+        name="system:metrics",
+        path=SYSTEM_METRICS,
+        media_type=MediaType.JSON,
+        cache=False,
+        opt={QUERY_BUDGET_KEY: 0},
+        guards=[requires_admin],
+        summary="Worker Metrics",
+        description="Returns the in-process metrics collected by this application worker.",
+    )
+    async def worker_metrics(self) -> dict[str, dict[str, Any]]:
+        """Return the metrics registered by the application components."""
+        return metrics.collect()
+
+    @get(
+        operation_id="SystemSlowQueries",
+        name="system:slow-queries",
+        path=SYSTEM_SLOW_QUERIES,
+        media_type=MediaType.JSON,
+        cache=False,
+        opt={QUERY_BUDGET_KEY: 1},
+        guards=[requires_admin],
+        summary="Slow Queries",
+        description="Returns the slowest recent statements of this application worker, with their plan when sampled.",
+    )
+    async def slow_queries(
+        self,
+        limit: Annotated[int, Parameter(title="Limit", description="The number of statements.", ge=1, le=100)] = 20,
+    ) -> list[dict[str, Any]]:
+        """Return the slow query log of the worker."""
+        return slow_query_log.top(limit)
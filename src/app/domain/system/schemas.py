@@ -12,5 +12,6 @@ settings = get_settings()
 @dataclass
 class SystemHealth:
     database_status: Literal["online", "offline"]
+    cache_status: Literal["online", "offline"]
     app: str = settings.app.NAME
     version: str = current_version
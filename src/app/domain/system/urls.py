@@ -1,2 +1,10 @@
 SYSTEM_HEALTH: str = "/health"
 """Default path for the service health check endpoint."""
+SYSTEM_LIVENESS: str = "/health/live"
+"""Path of the liveness probe, answered while the worker serves requests."""
+SYSTEM_READINESS: str = "/health/ready"
+"""Path of the readiness probe, answered from the latest background health checks."""
+SYSTEM_METRICS: str = "/metrics"
+"""Default path for the in-process metrics endpoint."""
+SYSTEM_SLOW_QUERIES: str = "/slow-queries"
+"""Path of the slow query log of the worker."""
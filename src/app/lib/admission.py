@@ -0,0 +1,139 @@
+"""Admission control for expensive request paths."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from app.lib.exceptions import ServiceOverloadedError, TooManyRequestsError
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+__all__ = ("AdmissionController", "available_memory", "concurrency_for_memory")
+
+_CGROUP_V2_LIMIT = Path("/sys/fs/cgroup/memory.max")
+_CGROUP_V2_USAGE = Path("/sys/fs/cgroup/memory.current")
+_CGROUP_V1_LIMIT = Path("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+_CGROUP_V1_USAGE = Path("/sys/fs/cgroup/memory/memory.usage_in_bytes")
+
+
+def _read_int(path: Path) -> int | None:
+    try:
+        value = path.read_text().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+def available_memory() -> int:
+    """Memory available to this process, in bytes.
+
+    The container (cgroup) limit is preferred over the host memory, so the
+    result reflects what the pod can actually use before being OOM-killed.
+    """
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    host_total = os.sysconf("SC_PHYS_PAGES") * page_size
+    host_available = os.sysconf("SC_AVPHYS_PAGES") * page_size
+    for limit_path, usage_path in ((_CGROUP_V2_LIMIT, _CGROUP_V2_USAGE), (_CGROUP_V1_LIMIT, _CGROUP_V1_USAGE)):
+        limit = _read_int(limit_path)
+        if limit is None or limit >= host_total:
+            # no limit configured (`max`, or the v1 "unlimited" sentinel)
+            continue
+        return max(limit - (_read_int(usage_path) or 0), 0)
+    return host_available
+
+
+def concurrency_for_memory(task_bytes: int, memory_percent: int, ceiling: int = 0) -> int:
+    """Number of concurrent tasks that fit in a share of the available memory.
+
+    Args:
+        task_bytes: Memory used by a single task.
+        memory_percent: Share of the available memory the tasks may use.
+        ceiling: Upper bound for the result.  ``0`` disables the bound.
+
+    Returns:
+        The number of tasks allowed to run at once, never less than one.
+    """
+    slots = max(available_memory() * memory_percent // 100 // max(task_bytes, 1), 1)
+    return min(slots, ceiling) if ceiling > 0 else slots
+
+
+class AdmissionController:
+    """Concurrency limiter with a short, deadline-bound wait queue.
+
+    Requests beyond ``max_concurrency`` wait up to ``wait_timeout`` seconds for a
+    free slot.  When ``max_waiting`` requests are already queued the request is
+    rejected with a ``429``; when the deadline passes it is rejected with a ``503``.
+    Both carry a ``Retry-After`` header.
+    """
+
+    __slots__ = (
+        "_semaphore",
+        "admitted",
+        "max_concurrency",
+        "max_waiting",
+        "rejected_queue_full",
+        "rejected_timeout",
+        "retry_after",
+        "running",
+        "wait_timeout",
+        "waiting",
+    )
+
+    def __init__(self, max_concurrency: int, max_waiting: int, wait_timeout: float, retry_after: int = 1) -> None:
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_waiting = max(max_waiting, 0)
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncGenerator[None, None]:
+        """Hold a slot for the duration of the context.
+
+        Raises:
+            ServiceOverloadedError: No slot became available.
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                self.rejected_queue_full += 1
+                msg = "Too many concurrent requests."
+                raise TooManyRequestsError(detail=msg, retry_after=self.retry_after)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except TimeoutError:
+                self.rejected_timeout += 1
+                msg = "Request could not be admitted in time."
+                raise ServiceOverloadedError(detail=msg, retry_after=self.retry_after) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.admitted += 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_waiting": self.max_waiting,
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
@@ -0,0 +1,556 @@
+"""Caching primitives and the cache backends shared by the application workers."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, Literal, TypeVar, cast
+
+import msgspec
+import structlog
+from litestar.exceptions import ImproperlyConfiguredException
+from litestar.stores.base import StorageObject, Store
+from litestar.stores.file import FileStore
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config.base import get_settings
+from app.lib.metrics import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
+    from datetime import timedelta
+
+    from litestar import Litestar
+    from litestar.channels.backends.base import ChannelsBackend
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session
+
+    from app.config.base import Settings
+
+__all__ = (
+    "CacheBackend",
+    "CacheManager",
+    "LRUMemoryStore",
+    "SharedCache",
+    "TTLCache",
+    "TaggedStore",
+    "cache_lifespan",
+    "cache_manager",
+    "purge_after_commit",
+    "response_cache",
+)
+
+logger = structlog.get_logger()
+
+_PURGE_TAGS_KEY = "response_cache_purge_tags"
+_purge_tasks: set[asyncio.Task[None]] = set()
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Size-bounded LRU cache whose entries expire after a fixed time to live.
+
+    The cache is not shared between processes; every application worker holds its own copy.
+    """
+
+    __slots__ = ("_data", "evictions", "expirations", "hits", "maxsize", "misses", "ttl")
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class LRUMemoryStore(Store):
+    """Size-bounded, in-process store that evicts the least recently used entry first."""
+
+    __slots__ = ("_data", "evictions", "maxsize")
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data: OrderedDict[str, StorageObject] = OrderedDict()
+
+    async def set(self, key: str, value: str | bytes, expires_in: int | timedelta | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        self._data[key] = StorageObject.new(data=value, expires_in=expires_in)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str, renew_for: int | timedelta | None = None) -> bytes | None:
+        storage_obj = self._data.get(key)
+        if storage_obj is None:
+            return None
+        if storage_obj.expired:
+            del self._data[key]
+            return None
+        if renew_for and storage_obj.expires_at:
+            storage_obj = StorageObject.new(data=storage_obj.data, expires_in=renew_for)
+            self._data[key] = storage_obj
+        self._data.move_to_end(key)
+        return storage_obj.data
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def delete_all(self) -> None:
+        self._data.clear()
+
+    async def exists(self, key: str) -> bool:
+        return await self.get(key) is not None
+
+    async def expires_in(self, key: str) -> int | None:
+        storage_obj = self._data.get(key)
+        return None if storage_obj is None else storage_obj.expires_in
+
+
+class CacheBackend:
+    """Creates the stores, and the channel used to broadcast invalidations, of the configured cache backend.
+
+    ``memory`` keeps entries in the worker, ``file`` shares them between the workers of a host and
+    ``redis`` shares them between all workers and broadcasts invalidations over Redis pub/sub.
+    """
+
+    __slots__ = ("_redis", "kind", "path", "prefix")
+
+    def __init__(
+        self,
+        kind: Literal["memory", "file", "redis"] = "memory",
+        prefix: str = "app",
+        path: str | None = None,
+        redis: Redis | None = None,
+    ) -> None:
+        if kind == "redis" and redis is None:
+            msg = "A redis client is required for the redis cache backend."
+            raise ImproperlyConfiguredException(msg)
+        if kind == "file" and path is None:
+            msg = "A path is required for the file cache backend."
+            raise ImproperlyConfiguredException(msg)
+        self.kind = kind
+        self.prefix = prefix
+        self.path = path
+        self._redis = redis
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> CacheBackend:
+        if settings.cache.BACKEND == "redis":
+            from redis.asyncio import Redis
+
+            return cls(kind="redis", prefix=settings.app.slug, redis=Redis.from_url(settings.cache.URL))
+        if settings.cache.BACKEND == "file":
+            return cls(kind="file", prefix=settings.app.slug, path=settings.cache.PATH)
+        return cls(kind="memory", prefix=settings.app.slug)
+
+    @property
+    def broadcasts(self) -> bool:
+        """Whether invalidations reach the other workers."""
+        return self.kind == "redis"
+
+    def store(self, namespace: str, maxsize: int) -> Store:
+        """Create the store of a namespace.
+
+        Args:
+            namespace: Name of the cache the store belongs to.
+            maxsize: Upper bound for the number of entries of in-process stores.
+
+        Returns:
+            The store.
+        """
+        if self.kind == "redis":
+            from litestar.stores.redis import RedisStore
+
+            return RedisStore(cast("Redis", self._redis), namespace=f"{self.prefix}:{namespace}")
+        if self.kind == "file":
+            # entries hold user data, only the user running the workers may read them
+            root = Path(cast("str", self.path))
+            root.mkdir(mode=0o700, parents=True, exist_ok=True)
+            path = root / self.prefix / namespace
+            path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            return FileStore(path)
+        return LRUMemoryStore(maxsize=maxsize)
+
+    def channels(self) -> ChannelsBackend | None:
+        if self.kind != "redis":
+            return None
+        from litestar.channels.backends.redis import RedisChannelsPubSubBackend
+
+        return RedisChannelsPubSubBackend(redis=cast("Redis", self._redis), key_prefix=f"{self.prefix}:channels")
+
+    async def ping(self) -> None:
+        """Check the backend is reachable.
+
+        Raises:
+            OSError: The directory of the ``file`` backend is not writable.
+        """
+        if self._redis is not None:
+            await self._redis.ping()
+        elif self.path is not None and not os.access(self.path, os.W_OK):
+            msg = f"Cache directory {self.path} is not writable."
+            raise OSError(msg)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class SharedCache:
+    """Cache of encoded values kept in a store of the cache backend.
+
+    With a backend that broadcasts invalidations, a short-lived copy of the hot entries, including
+    misses, is also kept in the worker so most lookups don't reach the store.
+    """
+
+    __slots__ = ("_invalidate", "_local", "hits", "local_hits", "misses", "name", "store")
+
+    def __init__(
+        self,
+        name: str,
+        store: Store,
+        local: TTLCache[str, bytes] | None = None,
+        invalidate: Callable[[str, list[str]], Awaitable[None]] | None = None,
+    ) -> None:
+        self.name = name
+        self.store = store
+        self.hits = 0
+        self.local_hits = 0
+        self.misses = 0
+        self._local = local
+        self._invalidate = invalidate
+
+    async def get(self, key: str) -> bytes | None:
+        if self._local is not None and (value := self._local.get(key)) is not None:
+            self.local_hits += 1
+            # an empty value caches a miss
+            return value or None
+        value = await self.store.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if self._local is not None:
+            self._local.set(key, value or b"")
+        return value
+
+    async def set(self, key: str, value: bytes, expires_in: int | None = None, broadcast: bool = False) -> None:
+        """Store a value.
+
+        Args:
+            key: Key of the value.
+            value: The encoded value.  Must not be empty.
+            expires_in: Seconds the value is kept for.
+            broadcast: Drop the copies, including cached misses, other workers hold of ``key``.
+        """
+        await self.store.set(key, value, expires_in=expires_in)
+        if self._local is not None:
+            self._local.set(key, value)
+        if broadcast and self._invalidate is not None:
+            await self._invalidate(self.name, [key])
+
+    async def delete(self, *keys: str) -> None:
+        """Delete values from the store and from the copies every worker holds."""
+        for key in keys:
+            await self.store.delete(key)
+        self.drop_local(keys)
+        if self._invalidate is not None:
+            await self._invalidate(self.name, list(keys))
+
+    async def clear(self) -> None:
+        await self.store.delete_all()
+        if self._local is not None:
+            self._local.clear()
+
+    def drop_local(self, keys: Iterable[str]) -> None:
+        if self._local is not None:
+            for key in keys:
+                self._local.pop(key)
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"hits": self.hits, "local_hits": self.local_hits, "misses": self.misses}
+        if isinstance(self.store, LRUMemoryStore):
+            stats |= {"size": len(self.store._data), "maxsize": self.store.maxsize, "evictions": self.store.evictions}
+        if self._local is not None:
+            stats["local"] = self._local.stats()
+        return stats
+
+
+class TaggedStore(Store):
+    """Store wrapper whose entries can be invalidated by tag.
+
+    Key builders :meth:`tag` a key before it is looked up.  Every tag has a
+    version kept in the wrapped store; entries remember the versions current
+    when they were looked up, before the response was computed, and are
+    discarded once :meth:`purge` gives one of their tags a new version.
+    With the ``memory`` backend every worker keeps its own versions, so
+    purges do not reach the other workers and routes are only cached briefly.
+    """
+
+    __slots__ = ("_key_tags", "_key_versions", "hits", "misses", "purged", "stale", "store", "version_ttl")
+
+    def __init__(self, store: Store, version_ttl: int | None = None, maxsize: int = 1024) -> None:
+        self.store = store
+        self.version_ttl = version_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.purged = 0
+        # both only bridge the few moments between key building, lookup and storing a response
+        self._key_tags: TTLCache[str, tuple[str, ...]] = TTLCache(maxsize=maxsize, ttl=60)
+        self._key_versions: TTLCache[str, list[int]] = TTLCache(maxsize=maxsize, ttl=60)
+
+    def tag(self, key: str, tags: Iterable[str]) -> None:
+        """Associate the entry stored under ``key`` with ``tags``."""
+        self._key_tags.set(key, tuple(tags))
+
+    async def version(self, tag: str) -> int:
+        """Get the current version of ``tag``, renewed by every :meth:`purge`.  ``0`` when it has none."""
+        return int(await self.store.get(f"tag:{tag}") or 0)
+
+    async def _versions(self, key: str) -> list[int]:
+        return [await self.version(tag) for tag in self._key_tags.get(key) or ()]
+
+    async def purge(self, *tags: str) -> None:
+        """Invalidate every entry tagged with any of ``tags``."""
+        version = str(time.time_ns())
+        for tag in tags:
+            # an expired version reads as `0`, which only turns the remaining entries into misses
+            await self.store.set(f"tag:{tag}", version, expires_in=self.version_ttl)
+        self.purged += len(tags)
+
+    async def get(self, key: str, renew_for: int | timedelta | None = None) -> bytes | None:
+        versions = await self._versions(key)
+        raw = await self.store.get(key, renew_for=renew_for)
+        if raw is not None:
+            stored_versions, value = msgspec.msgpack.decode(raw, type=tuple[list[int], bytes])
+            if stored_versions == versions:
+                self.hits += 1
+                return value
+            self.stale += 1
+            await self.store.delete(key)
+        self.misses += 1
+        self._key_versions.set(key, versions)
+        return None
+
+    async def set(self, key: str, value: str | bytes, expires_in: int | timedelta | None = None) -> None:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        versions = self._key_versions.pop(key)
+        if versions is None:
+            versions = await self._versions(key)
+        await self.store.set(key, msgspec.msgpack.encode((versions, value)), expires_in=expires_in)
+
+    async def delete(self, key: str) -> None:
+        await self.store.delete(key)
+
+    async def delete_all(self) -> None:
+        await self.store.delete_all()
+
+    async def exists(self, key: str) -> bool:
+        return await self.store.exists(key)
+
+    async def expires_in(self, key: str) -> int | None:
+        return await self.store.expires_in(key)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "purged_tags": self.purged,
+        }
+
+
+class _Invalidation(msgspec.Struct, array_like=True):
+    cache: str
+    keys: list[str]
+
+
+class CacheManager:
+    """Owns the shared caches of the worker and relays invalidations between workers."""
+
+    CHANNEL = "cache-invalidation"
+
+    __slots__ = ("_caches", "_channels", "_listener", "backend", "local_ttl")
+
+    def __init__(self, backend: CacheBackend, local_ttl: int = 5) -> None:
+        self.backend = backend
+        self.local_ttl = local_ttl
+        self._caches: dict[str, SharedCache] = {}
+        self._channels = backend.channels()
+        self._listener: asyncio.Task[None] | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> CacheManager:
+        return cls(CacheBackend.from_settings(settings), local_ttl=settings.cache.LOCAL_TTL)
+
+    def cache(self, name: str, maxsize: int) -> SharedCache:
+        """Get or create a cache.
+
+        Args:
+            name: Name of the cache, used as the namespace of its store.
+            maxsize: Upper bound for the number of entries held in the worker.
+
+        Returns:
+            The cache.
+        """
+        if name not in self._caches:
+            local: TTLCache[str, bytes] | None = None
+            if self.backend.broadcasts:
+                local = TTLCache(maxsize=maxsize, ttl=self.local_ttl)
+            self._caches[name] = SharedCache(name, self.backend.store(name, maxsize), local, self._publish)
+        return self._caches[name]
+
+    async def _publish(self, cache: str, keys: list[str]) -> None:
+        if self._channels is not None:
+            await self._channels.publish(msgspec.msgpack.encode(_Invalidation(cache, keys)), [self.CHANNEL])
+
+    async def _listen(self, channels: ChannelsBackend) -> None:
+        try:
+            async for _, data in channels.stream_events():
+                try:
+                    message = msgspec.msgpack.decode(data, type=_Invalidation)
+                except msgspec.DecodeError:
+                    continue
+                if (cache := self._caches.get(message.cache)) is not None:
+                    cache.drop_local(message.keys)
+        except Exception:  # noqa: BLE001
+            await logger.aexception("Cache invalidation listener stopped.")
+
+    async def start(self) -> None:
+        if self._channels is None or self._listener is not None:
+            return
+        await self._channels.on_startup()
+        await self._channels.subscribe([self.CHANNEL])
+        self._listener = asyncio.create_task(self._listen(self._channels))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self._channels is not None:
+            await self._channels.on_shutdown()
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": self.backend.kind} | {name: cache.stats() for name, cache in self._caches.items()}
+
+
+settings = get_settings()
+cache_manager = CacheManager.from_settings(settings)
+response_cache = TaggedStore(
+    cache_manager.backend.store("responses", maxsize=settings.cache.RESPONSE_SIZE),
+    version_ttl=settings.cache.max_response_ttl,
+    maxsize=settings.cache.RESPONSE_SIZE,
+)
+
+
+@asynccontextmanager
+async def cache_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Relay cache invalidations from other workers for the lifetime of the application worker."""
+    await cache_manager.start()
+    metrics.register("cache", cache_manager.stats)
+    metrics.register("response_cache", response_cache.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("response_cache")
+        metrics.unregister("cache")
+        await cache_manager.stop()
+        await cache_manager.backend.close()
+
+
+def purge_after_commit(session: AsyncSession | async_scoped_session[AsyncSession] | Session, *tags: str) -> None:
+    """Purge ``tags`` from the response cache again once the session commits.
+
+    A purge issued before the commit leaves a window in which concurrent requests
+    read the previous rows and cache them under the new tag versions.
+    """
+    session.info.setdefault(_PURGE_TAGS_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _purge_committed_tags(session: Session) -> None:
+    tags = session.info.pop(_PURGE_TAGS_KEY, None)
+    if not tags:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(response_cache.purge(*tags))
+    _purge_tasks.add(task)
+    task.add_done_callback(_purge_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_tags(session: Session) -> None:
+    session.info.pop(_PURGE_TAGS_KEY, None)
@@ -2,10 +2,274 @@ from __future__ import annotations  # noqa: A005
 
 import asyncio
 import base64
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, TypeVar
 
 from passlib.context import CryptContext
+from passlib.hash import argon2
 
-password_crypt_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from app.config.base import get_settings
+from app.lib.exceptions import ServiceOverloadedError
+from app.lib.metrics import LatencyHistogram, metrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Callable, Sequence
+
+    from litestar import Litestar
+
+    from app.config.base import HashingSettings
+
+__all__ = (
+    "HashingExecutor",
+    "HashingProfile",
+    "calibrate_hashing_profile",
+    "create_crypt_context",
+    "get_encryption_key",
+    "get_hashing_executor",
+    "get_password_hash",
+    "get_password_hashes",
+    "hash_passwords",
+    "hashing_lifespan",
+    "verify_and_update_password",
+    "verify_password",
+)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HashingProfile:
+    """Argon2 cost parameters."""
+
+    time_cost: int
+    memory_cost: int
+    """Memory cost in KiB."""
+    parallelism: int
+
+    @classmethod
+    def from_settings(cls, settings: HashingSettings) -> HashingProfile:
+        return cls(time_cost=settings.TIME_COST, memory_cost=settings.MEMORY_COST, parallelism=settings.PARALLELISM)
+
+    def to_env(self) -> dict[str, str]:
+        """Return the profile as ``HASHING_*`` environment variables."""
+        return {
+            "HASHING_TIME_COST": str(self.time_cost),
+            "HASHING_MEMORY_COST": str(self.memory_cost),
+            "HASHING_PARALLELISM": str(self.parallelism),
+        }
+
+
+def create_crypt_context(profile: HashingProfile) -> CryptContext:
+    """Create a crypt context for a hashing profile.
+
+    Hashes produced with any other profile are reported as needing an update,
+    so they are transparently migrated the next time they are verified.
+
+    Args:
+        profile: The argon2 cost parameters to hash with.
+
+    Returns:
+        CryptContext: The configured context.
+    """
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__rounds=profile.time_cost,
+        argon2__min_desired_rounds=profile.time_cost,
+        argon2__max_desired_rounds=profile.time_cost,
+        argon2__memory_cost=profile.memory_cost,
+        argon2__parallelism=profile.parallelism,
+    )
+
+
+password_crypt_context = create_crypt_context(HashingProfile.from_settings(get_settings().hashing))
+
+
+def _hash(password: str | bytes) -> str:
+    return password_crypt_context.hash(password)
+
+
+def hash_passwords(passwords: Sequence[str | bytes]) -> list[str]:
+    """Hash a batch of passwords with the current profile.
+
+    Module level, so bulk imports can spread batches over a process pool.
+    """
+    return [password_crypt_context.hash(password) for password in passwords]
+
+
+def _hash_profile(hashed_password: str) -> HashingProfile | None:
+    """The profile of an argon2 hash, ``None`` for other hashes."""
+    if password_crypt_context.identify(hashed_password) != "argon2":
+        return None
+    parsed = argon2.from_string(hashed_password)
+    return HashingProfile(time_cost=parsed.rounds, memory_cost=parsed.memory_cost, parallelism=parsed.parallelism)
+
+
+def _context_profile(context: CryptContext) -> HashingProfile:
+    handler = context.handler("argon2")
+    return HashingProfile(
+        time_cost=handler.default_rounds, memory_cost=handler.memory_cost, parallelism=handler.parallelism
+    )
+
+
+def _verify_and_update(plain_password: str | bytes, hashed_password: str) -> tuple[bool, str | None]:
+    valid, new_hash = password_crypt_context.verify_and_update(plain_password, hashed_password)
+    # passlib does not compare the parallelism of argon2 hashes, so every parameter is compared here
+    profile = _hash_profile(hashed_password)
+    if valid and new_hash is None and profile is not None and profile != _context_profile(password_crypt_context):
+        new_hash = password_crypt_context.hash(plain_password)
+    return valid, new_hash
+
+
+class HashingExecutor:
+    """Bounded executor dedicated to password hashing.
+
+    Jobs beyond ``max_workers + max_queue`` outstanding are rejected with a
+    :class:`ServiceOverloadedError` instead of piling up behind each other.
+    """
+
+    __slots__ = (
+        "_executor",
+        "_pending",
+        "completed",
+        "failed",
+        "kind",
+        "latency",
+        "max_queue",
+        "max_workers",
+        "rejected",
+        "retry_after",
+    )
+
+    def __init__(
+        self,
+        kind: Literal["thread", "process"] = "thread",
+        max_workers: int = 2,
+        max_queue: int = 32,
+        retry_after: int = 1,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.latency = LatencyHistogram()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._executor: Executor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: HashingSettings) -> HashingExecutor:
+        kind: Literal["thread", "process"] = "process" if settings.EXECUTOR == "process" else "thread"
+        return cls(
+            kind=kind,
+            max_workers=max(settings.MAX_WORKERS, 1),
+            max_queue=max(settings.MAX_QUEUE, 0),
+            retry_after=settings.RETRY_AFTER,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        return max(self._pending - self.max_workers, 0)
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            # `spawn` avoids forking an interpreter that already runs an event loop and threads.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hashing")
+
+    def shutdown(self) -> None:
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn`` on the hashing pool.
+
+        Args:
+            fn: A module level (picklable) callable.
+            *args: Arguments passed to ``fn``.
+
+        Raises:
+            ServiceOverloadedError: The hashing queue is full.
+
+        Returns:
+            The result of ``fn``.
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            msg = "Password hashing capacity exhausted, retry later."
+            raise ServiceOverloadedError(detail=msg, retry_after=self.retry_after)
+        self.start()
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            self.latency.observe(time.perf_counter() - started)
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._pending - self.queue_depth,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "latency": self.latency.snapshot(),
+        }
+
+
+_hashing_executor: HashingExecutor | None = None
+
+
+def get_hashing_executor() -> HashingExecutor | None:
+    """Get the hashing executor installed for the running application, if any."""
+    return _hashing_executor
+
+
+@asynccontextmanager
+async def hashing_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Own a hashing executor for the lifetime of the application worker."""
+    global _hashing_executor  # noqa: PLW0603
+    executor = HashingExecutor.from_settings(get_settings().hashing)
+    executor.start()
+    _hashing_executor = executor
+    metrics.register("hashing", executor.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("hashing")
+        _hashing_executor = None
+        executor.shutdown()
+
+
+async def _run_hashing_job(fn: Callable[..., T], *args: Any) -> T:
+    if _hashing_executor is not None:
+        return await _hashing_executor.run(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
 
 
 def get_encryption_key(secret: str) -> bytes:
@@ -30,7 +294,25 @@ async def get_password_hash(password: str | bytes) -> str:
     Returns:
         str: Hashed password
     """
-    return await asyncio.get_running_loop().run_in_executor(None, password_crypt_context.hash, password)
+    return await _run_hashing_job(_hash, password)
+
+
+async def get_password_hashes(passwords: Sequence[str | bytes]) -> list[str]:
+    """Hash several passwords, split in one job per hashing worker.
+
+    Args:
+        passwords: Plain passwords
+    Returns:
+        list[str]: Hashed passwords, in the order of ``passwords``
+    """
+    if not passwords:
+        return []
+    workers = _hashing_executor.max_workers if _hashing_executor is not None else 1
+    step = -(-len(passwords) // workers)
+    batches = await asyncio.gather(
+        *(_run_hashing_job(hash_passwords, passwords[start : start + step]) for start in range(0, len(passwords), step))
+    )
+    return [hashed for batch in batches for hashed in batch]
 
 
 async def verify_password(plain_password: str | bytes, hashed_password: str) -> bool:
@@ -43,10 +325,81 @@ async def verify_password(plain_password: str | bytes, hashed_password: str) ->
     Returns:
         bool: True if password matches hash.
     """
-    valid, _ = await asyncio.get_running_loop().run_in_executor(
-        None,
-        password_crypt_context.verify_and_update,
-        plain_password,
-        hashed_password,
-    )
-    return bool(valid)
+    valid, _ = await verify_and_update_password(plain_password, hashed_password)
+    return valid
+
+
+async def verify_and_update_password(plain_password: str | bytes, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password and rehash it when the stored hash uses an outdated profile.
+
+    Args:
+        plain_password (str | bytes): The string or byte password
+        hashed_password (str): the hash of the password
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matches, and a replacement hash if one is needed.
+    """
+    valid, new_hash = await _run_hashing_job(_verify_and_update, plain_password, hashed_password)
+    return bool(valid), new_hash if valid else None
+
+
+def _measure_profile(profile: HashingProfile, concurrency: int, samples: int) -> list[float]:
+    hasher = create_crypt_context(profile)
+
+    def _timed_hash(_: int) -> float:
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sorted(pool.map(_timed_hash, range(concurrency * samples)))
+
+
+def calibrate_hashing_profile(
+    target_ms: float,
+    concurrency: int = 1,
+    max_memory_cost: int = 262144,
+    min_memory_cost: int = 8192,
+    parallelism: int | None = None,
+    samples: int = 3,
+    max_time_cost: int = 10,
+) -> tuple[HashingProfile, float]:
+    """Find the strongest argon2 profile that meets a latency target on this machine.
+
+    Memory cost is halved from ``max_memory_cost`` until a single pass fits the
+    target at the requested concurrency, then the time cost is raised for as
+    long as the measured p99 stays within the target.
+
+    Args:
+        target_ms: Target p99 hashing latency, in milliseconds.
+        concurrency: Number of hashes expected to run at the same time.
+        max_memory_cost: Upper bound for the memory cost in KiB.
+        min_memory_cost: Lower bound for the memory cost in KiB.
+        parallelism: Lanes per hash.  Defaults to the CPUs available per concurrent hash.
+        samples: Hashes measured per concurrent slot for each candidate.
+        max_time_cost: Upper bound for the time cost.
+
+    Returns:
+        tuple[HashingProfile, float]: The selected profile and its measured p99 latency in milliseconds.
+    """
+    concurrency = max(concurrency, 1)
+    if parallelism is None:
+        parallelism = max(min((os.cpu_count() or 1) // concurrency, 4), 1)
+
+    def _p99(profile: HashingProfile) -> float:
+        timings = _measure_profile(profile, concurrency, samples)
+        return timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000
+
+    memory_cost = max(max_memory_cost, min_memory_cost)
+    best = HashingProfile(time_cost=1, memory_cost=memory_cost, parallelism=parallelism)
+    best_p99 = _p99(best)
+    while best_p99 > target_ms and best.memory_cost // 2 >= min_memory_cost:
+        best = HashingProfile(time_cost=1, memory_cost=best.memory_cost // 2, parallelism=parallelism)
+        best_p99 = _p99(best)
+    for time_cost in range(2, max_time_cost + 1):
+        candidate = HashingProfile(time_cost=time_cost, memory_cost=best.memory_cost, parallelism=parallelism)
+        candidate_p99 = _p99(candidate)
+        if candidate_p99 > target_ms:
+            break
+        best, best_p99 = candidate, candidate_p99
+    return best, best_p99
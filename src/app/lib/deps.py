@@ -34,10 +34,15 @@ from advanced_alchemy.service import (
 from litestar.di import Provide
 from litestar.params import Dependency, Parameter
 
+from .pagination import CountStrategy, LimitCursor
+from .search import FullTextSearchFilter, SearchMode, TrigramSearchFilter
 from .utils.singleton import SingletonMeta
 
 if TYPE_CHECKING:
     from advanced_alchemy.config import SQLAlchemyAsyncConfig, SQLAlchemySyncConfig
+    from advanced_alchemy.extensions.litestar import SQLAlchemyAsyncConfig as SQLAlchemyAsyncPluginConfig
+    from litestar.datastructures import State
+    from litestar.types import Scope
     from sqlalchemy import Select
     from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
@@ -51,6 +56,7 @@ SortOrder = Literal["asc", "desc"]
 SortOrderOrNone = None | SortOrder
 AsyncServiceT_co = TypeVar("AsyncServiceT_co", bound=SQLAlchemyAsyncRepositoryService[Any], covariant=True)
 SyncServiceT_co = TypeVar("SyncServiceT_co", bound=SQLAlchemySyncRepositoryService[Any], covariant=True)
+_SERVICES_SCOPE_KEY = "_app_request_services"
 
 
 class DependencyDefaults:
@@ -62,6 +68,10 @@ class DependencyDefaults:
     """Key for the id filter dependency."""
     LIMIT_OFFSET_DEPENDENCY_KEY: str = "limit_offset"
     """Key for the limit offset dependency."""
+    LIMIT_CURSOR_DEPENDENCY_KEY: str = "limit_cursor"
+    """Key for the cursor pagination dependency."""
+    COUNT_STRATEGY_DEPENDENCY_KEY: str = "count_strategy"
+    """Key for the count strategy dependency."""
     UPDATED_FILTER_DEPENDENCY_KEY: str = "updated_filter"
     """Key for the updated filter dependency."""
     ORDER_BY_DEPENDENCY_KEY: str = "order_by"
@@ -86,14 +96,21 @@ class FilterConfig(TypedDict):
     """The default field to use for the sort filter."""
     sort_order: NotRequired[SortOrder]
     """The default order to use for the sort filter."""
-    pagination_type: NotRequired[Literal["limit_offset"]]
-    """When set, pagination is enabled based on the type specified."""
+    pagination_type: NotRequired[Literal["limit_offset", "cursor"]]
+    """When set, pagination is enabled based on the type specified.
+
+    ``cursor`` pages through ``(sort_field, id_field)`` with the opaque cursors of a :class:`CursorPagination` response.
+    """
     pagination_size: NotRequired[int]
     """The size of the pagination."""
+    count_strategy: NotRequired[CountStrategy]
+    """How list endpoints count the total, provided as the ``count_strategy`` dependency.  Defaults to ``exact``."""
     search: NotRequired[str]
     """When set, search is enabled for the specified fields."""
     search_ignore_case: NotRequired[bool]
     """When set, search is case insensitive by default."""
+    search_mode: NotRequired[SearchMode]
+    """How search matches the fields, ``ilike`` by default.  ``trigram`` and ``fts`` are case insensitive."""
     created_at: NotRequired[bool]
     """When set, created_at filter is enabled."""
     updated_at: NotRequired[bool]
@@ -193,6 +210,51 @@ def create_service_provider(
     return provide_sync_service
 
 
+def create_scoped_service_provider(
+    service_class: type["AsyncServiceT_co"],
+    /,
+    config: "SQLAlchemyAsyncPluginConfig",
+    statement: "Select[tuple[ModelT]] | None" = None,
+    error_messages: "ErrorMessages | EmptyType | None" = Empty,
+    load: "LoadSpec | None" = None,
+    execution_options: "dict[str, Any] | None" = None,
+) -> Callable[["State", "Scope"], "AsyncServiceT_co"]:
+    """Create a provider for a request scoped service.
+
+    The first call within a request creates the service on the request's session and every later call in the same
+    request, including authentication handlers that run before dependency injection, gets the same instance.  The
+    session itself is created lazily by the plugin and closed by its ``before_send_handler``.
+
+    Args:
+        service_class: The service class to provide.
+        config: The SQLAlchemy plugin configuration that owns the request session.
+        statement: The statement to use for the service.
+        error_messages: The error messages to use for the service.
+        load: The load spec to use for the service.
+        execution_options: The execution options to use for the service.
+
+    Returns:
+        A provider that accepts the application state and the connection scope.
+    """
+
+    def provide_scoped_service(state: "State", scope: "Scope") -> "AsyncServiceT_co":
+        session = config.provide_session(state, scope)
+        services = cast("dict[type[Any], Any]", scope.setdefault(_SERVICES_SCOPE_KEY, {}))  # type: ignore[misc]
+        service = services.get(service_class)
+        if service is None or service.repository.session is not session:
+            service = service_class(
+                session=session,
+                statement=statement,
+                error_messages=error_messages,
+                load=load,
+                execution_options=execution_options,
+            )
+            services[service_class] = service
+        return cast("AsyncServiceT_co", service)
+
+    return provide_scoped_service
+
+
 def create_service_dependencies(
     service_class: type[Union["AsyncServiceT_co", "SyncServiceT_co"]],
     /,
@@ -219,7 +281,8 @@ def create_service_dependencies(
         execution_options: The execution options to use for the service.
         filters: The filter configuration to use for the service.
         uniquify: Whether to uniquify the service.
-        count_with_window_function: Whether to count with a window function.
+        count_with_window_function: Whether to count with a window function.  Sets the ``count_strategy`` of
+            ``filters`` when it has none.
         dep_defaults: The dependency defaults to use for the service.
 
     Returns:
@@ -251,6 +314,8 @@ def create_service_dependencies(
         )
         deps = {key: Provide(svc, sync_to_thread=False)}
     if filters:
+        if count_with_window_function is not None and "count_strategy" not in filters:
+            filters = FilterConfig(**filters, count_strategy="window" if count_with_window_function else "exact")
         deps.update(create_filter_dependencies(filters, dep_defaults))
     return deps
 
@@ -336,7 +401,35 @@ def _create_statement_filters(  # noqa: C901
             provide_limit_offset_pagination, sync_to_thread=False
         )
 
+    if config.get("pagination_type") or config.get("count_strategy"):
+        count_strategy = config.get("count_strategy", "exact")
+
+        def provide_count_strategy() -> CountStrategy:
+            return count_strategy
+
+        filters[dep_defaults.COUNT_STRATEGY_DEPENDENCY_KEY] = Provide(provide_count_strategy, sync_to_thread=False)
+
+    if config.get("pagination_type") == "cursor":
+
+        def provide_cursor_pagination(
+            cursor: StringOrNone = Parameter(query="cursor", default=None, required=False),
+            page_size: int = Parameter(
+                query="pageSize",
+                ge=1,
+                default=config.get("pagination_size", dep_defaults.DEFAULT_PAGINATION_SIZE),
+                required=False,
+            ),
+            order_by: OrderBy | None = Dependency(default=None, skip_validation=True),
+        ) -> LimitCursor:
+            id_field = config.get("id_field", "id")
+            if order_by is None or order_by.field_name is None:  # pyright: ignore[reportUnnecessaryComparison]
+                return LimitCursor.from_cursor(cursor, page_size, id_field, "asc", id_field)
+            return LimitCursor.from_cursor(cursor, page_size, order_by.field_name, order_by.sort_order, id_field)
+
+        filters[dep_defaults.LIMIT_CURSOR_DEPENDENCY_KEY] = Provide(provide_cursor_pagination, sync_to_thread=False)
+
     if search_fields := config.get("search"):
+        search_mode = config.get("search_mode", "ilike")
 
         def provide_search_filter(
             search_string: StringOrNone = Parameter(
@@ -352,8 +445,15 @@ def _create_statement_filters(  # noqa: C901
                 required=False,
             ),
         ) -> SearchFilter:
+            field_name = set(search_fields.split(","))
+            if search_mode == "trigram":
+                return TrigramSearchFilter(field_name=field_name, value=search_string)  # type: ignore[arg-type]
+            if search_mode == "fts":
+                # ranking would break the keyset order of cursor pages
+                rank = config.get("pagination_type") != "cursor"
+                return FullTextSearchFilter(field_name=field_name, value=search_string, rank=rank)  # type: ignore[arg-type]
             return SearchFilter(
-                field_name=set(search_fields.split(",")),
+                field_name=field_name,
                 value=search_string,  # type: ignore[arg-type]
                 ignore_case=ignore_case or False,
             )
@@ -446,6 +546,15 @@ def _create_filter_aggregate_function(config: FilterConfig) -> Callable[..., lis
         )
         annotations["limit_offset"] = LimitOffset
 
+    if config.get("pagination_type") == "cursor":
+        parameters["limit_cursor"] = inspect.Parameter(
+            name="limit_cursor",
+            kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=Dependency(skip_validation=True),
+            annotation=LimitCursor,
+        )
+        annotations["limit_cursor"] = LimitCursor
+
     if config.get("sort_field"):
         parameters["order_by"] = inspect.Parameter(
             name="order_by",
@@ -480,7 +589,10 @@ def _create_filter_aggregate_function(config: FilterConfig) -> Callable[..., lis
             and search_filter.value is not None  # pyright: ignore[reportUnnecessaryComparison]
         ):
             filters.append(search_filter)
-        if (
+        if limit_cursor := kwargs.get("limit_cursor"):
+            # the cursor orders by its own sort field and id
+            filters.append(limit_cursor)
+        elif (
             (order_by := cast("OrderBy | None", kwargs.get("order_by")))
             and order_by is not None  # pyright: ignore[reportUnnecessaryComparison]
             and order_by.field_name is not None  # pyright: ignore[reportUnnecessaryComparison]
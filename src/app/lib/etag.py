@@ -0,0 +1,44 @@
+"""Entity tags and conditional ``GET`` handling."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+from litestar import Response
+from litestar.status_codes import HTTP_304_NOT_MODIFIED
+
+if TYPE_CHECKING:
+    from litestar import Request
+
+__all__ = ("if_none_match", "make_etag", "not_modified")
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong entity tag from the values a representation is derived from.
+
+    Args:
+        *parts: Values identifying the representation, e.g. a version column and the query shape.
+
+    Returns:
+        The quoted entity tag.
+    """
+    digest = hashlib.blake2b("\x1f".join(map(repr, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def if_none_match(request: Request[Any, Any, Any], etag: str) -> bool:
+    """Whether the client already holds the representation tagged ``etag``.
+
+    ``If-None-Match`` uses the weak comparison, so ``W/`` prefixes are ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response[Any]:
+    """Respond with ``304 Not Modified`` without rendering a body."""
+    return Response(content=None, status_code=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -18,7 +18,12 @@ from litestar.exceptions import (
 )
 from litestar.exceptions.responses import create_debug_response, create_exception_response
 from litestar.repository.exceptions import ConflictError, NotFoundError, RepositoryError
-from litestar.status_codes import HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR
+from litestar.status_codes import (
+    HTTP_409_CONFLICT,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 from structlog.contextvars import bind_contextvars
 
 if TYPE_CHECKING:
@@ -33,6 +38,9 @@ __all__ = (
     "ApplicationError",
     "AuthorizationError",
     "HealthCheckConfigurationError",
+    "QueryBudgetExceededError",
+    "ServiceOverloadedError",
+    "TooManyRequestsError",
     "after_exception_hook_handler",
 )
 
@@ -86,6 +94,33 @@ class HealthCheckConfigurationError(ApplicationError):
     """An error occurred while registering an health check."""
 
 
+class QueryBudgetExceededError(ApplicationError):
+    """A request executed more queries than the budget of its route."""
+
+
+class ServiceOverloadedError(ApplicationError):
+    """A bounded resource is saturated and the request was shed."""
+
+    status_code: int = HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self, *args: Any, detail: str = "", retry_after: int = 1) -> None:
+        """Initialize ``ServiceOverloadedError``.
+
+        Args:
+            *args: args are converted to :class:`str` before passing to :class:`Exception`
+            detail: detail of the exception.
+            retry_after: seconds the client should wait before retrying.
+        """
+        super().__init__(*args, detail=detail)
+        self.retry_after = retry_after
+
+
+class TooManyRequestsError(ServiceOverloadedError):
+    """The request was shed because too many similar requests are already queued."""
+
+    status_code: int = HTTP_429_TOO_MANY_REQUESTS
+
+
 class _HTTPConflictException(HTTPException):
     """Request conflict with the current state of the target resource."""
 
@@ -122,6 +157,15 @@ def exception_to_http_response(
     Returns:
         Exception response appropriate to the type of original exception.
     """
+    if isinstance(exc, ServiceOverloadedError):
+        return create_exception_response(
+            request,
+            HTTPException(
+                status_code=exc.status_code,
+                detail=exc.detail,
+                headers={"Retry-After": str(exc.retry_after)},
+            ),
+        )
     http_exc: type[HTTPException]
     if isinstance(exc, NotFoundError):
         http_exc = NotFoundException
@@ -0,0 +1,108 @@
+"""Streaming exports of filtered listings as NDJSON or CSV."""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import TYPE_CHECKING, Any, Literal
+
+import msgspec
+from advanced_alchemy.filters import PaginationFilter
+from litestar.response import Stream
+from sqlalchemy import select
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterable, Sequence
+    from contextlib import AbstractAsyncContextManager
+
+    from advanced_alchemy.filters import StatementFilter
+    from sqlalchemy import Select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm.interfaces import ORMOption
+
+__all__ = ("EXPORT_MEDIA_TYPES", "ExportFormat", "export_statement", "stream_export")
+
+ExportFormat = Literal["ndjson", "csv"]
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def export_statement(model: type[Any], *filters: StatementFilter, load: ORMOption | None = None) -> Select[Any]:
+    """Select every row of ``model`` matching ``filters``, ignoring their pagination.
+
+    Args:
+        model: The exported model.
+        *filters: The statement filters of the listing.
+        load: Loader option of the exported rows.
+
+    Returns:
+        The statement to stream.
+    """
+    statement = select(model)
+    for filter_ in filters:
+        if not isinstance(filter_, PaginationFilter):
+            statement = filter_.append_to_statement(statement, model)
+    return statement if load is None else statement.options(load)
+
+
+def _csv_chunk(rows: Iterable[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _encode(
+    session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+    statement: Select[Any],
+    schema_type: type[msgspec.Struct],
+    export_format: ExportFormat,
+    fetch_size: int,
+) -> AsyncIterator[bytes]:
+    columns = [field.encode_name for field in msgspec.structs.fields(schema_type)]
+    if export_format == "csv":
+        yield _csv_chunk([columns])
+    encoder = msgspec.json.Encoder()
+    # the request session is closed once the response starts, so the stream holds its own connection
+    async with session_factory() as session:
+        result = await session.stream_scalars(statement.execution_options(yield_per=fetch_size))
+        try:
+            async for rows in result.partitions():
+                items = msgspec.convert(rows, type=list[schema_type], from_attributes=True)  # type: ignore[valid-type]
+                if export_format == "csv":
+                    yield _csv_chunk([row[column] for column in columns] for row in msgspec.to_builtins(items))
+                else:
+                    yield encoder.encode_lines(items)
+        finally:
+            await result.close()
+
+
+def stream_export(
+    session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+    statement: Select[Any],
+    *,
+    schema_type: type[msgspec.Struct],
+    export_format: ExportFormat,
+    fetch_size: int,
+    filename: str,
+) -> Stream:
+    """Stream the rows selected by ``statement`` as ``schema_type`` items.
+
+    Rows are read from a server-side cursor ``fetch_size`` at a time and each batch is sent as one chunk, so memory is
+    bounded by the fetch size rather than the result size.  When the client disconnects the stream is cancelled, which
+    cancels the running fetch, closes the cursor and returns the connection to the pool.
+
+    Args:
+        session_factory: Opens the session the rows are read with.
+        statement: The statement to stream, see :func:`export_statement`.
+        schema_type: The msgspec schema of the rows.
+        export_format: ``ndjson`` for one JSON object per line, ``csv`` for a header row and one row per item.
+        fetch_size: Rows fetched per round trip.
+        filename: Name of the downloaded file, without extension.
+
+    Returns:
+        The streaming response.
+    """
+    return Stream(
+        _encode(session_factory, statement, schema_type, export_format, fetch_size),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,125 @@
+"""Sparse fieldsets: a ``fields`` query parameter narrowing the selected columns and the encoded struct."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+import msgspec
+from litestar.di import Provide
+from litestar.exceptions import ValidationException
+from litestar.params import Parameter
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+    from sqlalchemy.orm.interfaces import ORMOption
+
+__all__ = ("FIELDS_DEPENDENCY_KEY", "FieldSet", "create_fields_dependency")
+
+FIELDS_DEPENDENCY_KEY = "fields"
+
+
+def _copy_field(field: msgspec.structs.FieldInfo) -> Any:
+    if field.default_factory is not msgspec.NODEFAULT:
+        return msgspec.field(default_factory=field.default_factory, name=field.encode_name)
+    return msgspec.field(default=field.default, name=field.encode_name)
+
+
+@cache
+def _trimmed_struct(schema_type: type[msgspec.Struct], names: tuple[str, ...]) -> type[msgspec.Struct]:
+    fields = {field.name: field for field in msgspec.structs.fields(schema_type)}
+    return msgspec.defstruct(
+        f"{schema_type.__name__}Fields",
+        [(name, fields[name].type, _copy_field(fields[name])) for name in names],
+    )
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """The fields of ``schema_type`` requested by a client."""
+
+    schema_type: type[msgspec.Struct]
+    names: tuple[str, ...]
+    """Attribute names of the requested fields, in declaration order."""
+    requires: Mapping[str, Sequence[str]]
+    """Model columns needed by fields that are not columns themselves, e.g. hybrid properties."""
+
+    @classmethod
+    def parse(
+        cls, value: str, schema_type: type[msgspec.Struct], requires: Mapping[str, Sequence[str]] | None = None
+    ) -> FieldSet:
+        """Parse a comma separated list of encoded field names.
+
+        Raises:
+            ValidationException: A name is not a field of ``schema_type``.
+        """
+        by_encode_name = {field.encode_name: field.name for field in msgspec.structs.fields(schema_type)}
+        requested = {name.strip() for name in value.split(",") if name.strip()}
+        if unknown := sorted(requested - by_encode_name.keys()):
+            msg = f"Unknown fields: {', '.join(unknown)}"
+            raise ValidationException(detail=msg)
+        if not requested:
+            msg = "No fields requested"
+            raise ValidationException(detail=msg)
+        names = tuple(name for encode_name, name in by_encode_name.items() if encode_name in requested)
+        return cls(schema_type=schema_type, names=names, requires=requires or {})
+
+    @property
+    def struct(self) -> type[msgspec.Struct]:
+        """A struct with only the requested fields of ``schema_type``."""
+        return _trimmed_struct(self.schema_type, self.names)
+
+    def load(self, model: type[Any], *also: str) -> ORMOption | None:
+        """Build the loader option selecting only the columns of the requested fields.
+
+        Args:
+            model: The model the fields are read from.
+            *also: Further attributes the caller reads, e.g. the sort field of a cursor.
+
+        Returns:
+            A ``load_only`` option, or ``None`` when a field cannot be mapped to columns.
+        """
+        columns = inspect(model).columns
+        attributes: list[str] = []
+        for name in (*self.names, *also):
+            if name in self.requires:
+                attributes.extend(self.requires[name])
+            elif name in columns:
+                attributes.append(name)
+            else:
+                return None
+        return load_only(*(getattr(model, name) for name in dict.fromkeys(attributes)))
+
+    def __repr__(self) -> str:
+        return f"FieldSet({','.join(self.names)})"
+
+
+def create_fields_dependency(
+    schema_type: type[msgspec.Struct], requires: Mapping[str, Sequence[str]] | None = None
+) -> dict[str, Provide]:
+    """Create the dependency of a ``fields`` query parameter selecting fields of ``schema_type``.
+
+    Args:
+        schema_type: The response struct.
+        requires: Model columns needed by fields that are not columns themselves.
+
+    Returns:
+        dict[str, Provide]: The provider of a :class:`FieldSet`, ``None`` when every field is requested.
+    """
+
+    def provide_fields(
+        field_names: str | None = Parameter(
+            title="Fields",
+            query="fields",
+            description="Comma separated fields to include in the response.",
+            default=None,
+            required=False,
+        ),
+    ) -> FieldSet | None:
+        return None if field_names is None else FieldSet.parse(field_names, schema_type, requires)
+
+    return {FIELDS_DEPENDENCY_KEY: Provide(provide_fields, sync_to_thread=False)}
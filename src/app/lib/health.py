@@ -0,0 +1,213 @@
+"""Background health checks.
+
+The :data:`health_monitor` probes the registered components concurrently, on an interval and with a timeout per
+probe, from a task of the application lifespan.  Health endpoints serve its last results without touching the
+components.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
+from functools import partial
+from typing import TYPE_CHECKING, Any, Literal
+
+import structlog
+from sqlalchemy import text
+
+from app.config.base import get_settings
+from app.lib.cache import cache_manager
+from app.lib.crypt import get_hashing_executor
+from app.lib.exceptions import HealthCheckConfigurationError
+from app.lib.metrics import LatencyHistogram, metrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Awaitable, Callable
+
+    from litestar import Litestar
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from app.config.base import HealthSettings
+
+__all__ = ("ComponentHealth", "HealthMonitor", "HealthStatus", "health_lifespan", "health_monitor")
+
+logger = structlog.get_logger()
+
+HealthStatus = Literal["online", "offline"]
+
+
+class ComponentHealth:
+    """Result of the latest probe of a component, and the latency of all its probes."""
+
+    __slots__ = ("checked_at", "critical", "error", "failures", "latency", "name", "probe", "status")
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[Any]], critical: bool) -> None:
+        self.name = name
+        self.probe = probe
+        self.critical = critical
+        self.status: HealthStatus = "offline"
+        self.error: str | None = None
+        self.checked_at: float | None = None
+        self.failures = 0
+        self.latency = LatencyHistogram()
+
+    def record(self, seconds: float, error: str | None) -> None:
+        self.status = "offline" if error else "online"
+        self.error = error
+        self.checked_at = time.monotonic()
+        self.failures = self.failures + 1 if error else 0
+        self.latency.observe(seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "critical": self.critical,
+            "error": self.error,
+            "consecutive_failures": self.failures,
+            "age_s": None if self.checked_at is None else round(time.monotonic() - self.checked_at, 3),
+            "latency": self.latency.snapshot(),
+        }
+
+
+class HealthMonitor:
+    """Probes the components of the application in the background.
+
+    The application is ready once every critical component answered its latest probe, and that probe is not older
+    than ``stale_after`` seconds, so a stuck monitor does not keep reporting a stale success.  It is not ready either
+    while a startup task holds it, see :meth:`hold`.
+    """
+
+    __slots__ = ("components", "interval", "rounds", "stale_after", "starting_tasks", "timeout")
+
+    def __init__(self, interval: float = 5, timeout: float = 2, stale_after: float = 30) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.rounds = 0
+        self.components: dict[str, ComponentHealth] = {}
+        self.starting_tasks: set[str] = set()
+
+    @classmethod
+    def from_settings(cls, settings: HealthSettings) -> HealthMonitor:
+        return cls(settings.CHECK_INTERVAL, settings.CHECK_TIMEOUT, settings.STALE_AFTER)
+
+    def register(self, name: str, probe: Callable[[], Awaitable[Any]], critical: bool = True) -> None:
+        """Probe a component.
+
+        Args:
+            name: Name of the component in the health results.
+            probe: Raises, or hangs past the timeout, when the component is unavailable.
+            critical: Whether the application is ready only while the component is online.
+
+        Raises:
+            HealthCheckConfigurationError: A component with this name is already registered.
+        """
+        if name in self.components:
+            msg = f"A health check named {name} is already registered."
+            raise HealthCheckConfigurationError(detail=msg)
+        self.components[name] = ComponentHealth(name, probe, critical)
+
+    def unregister(self, name: str) -> None:
+        self.components.pop(name, None)
+
+    def status(self, name: str) -> HealthStatus:
+        component = self.components.get(name)
+        return "offline" if component is None else component.status
+
+    def hold(self, name: str) -> None:
+        """Report the application not ready until the startup task ``name`` is released."""
+        self.starting_tasks.add(name)
+
+    def release(self, name: str) -> None:
+        self.starting_tasks.discard(name)
+
+    @property
+    def ready(self) -> bool:
+        now = time.monotonic()
+        return not self.starting_tasks and all(
+            component.status == "online"
+            and component.checked_at is not None
+            and now - component.checked_at <= self.stale_after
+            for component in self.components.values()
+            if component.critical
+        )
+
+    async def _probe(self, component: ComponentHealth) -> None:
+        started = time.perf_counter()
+        error: str | None = None
+        try:
+            async with asyncio.timeout(self.timeout):
+                await component.probe()
+        except TimeoutError:
+            error = f"Timed out after {self.timeout}s"
+        except Exception as exc:  # noqa: BLE001
+            error = f"{type(exc).__name__}: {exc}"
+        if error and component.status == "online":
+            await logger.awarning("Health check failed", component=component.name, error=error)
+        component.record(time.perf_counter() - started, error)
+
+    async def probe_all(self) -> None:
+        """Probe every component concurrently."""
+        await asyncio.gather(*(self._probe(component) for component in self.components.values()))
+        self.rounds += 1
+
+    async def run(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "rounds": self.rounds,
+            "starting": sorted(self.starting_tasks),
+            "components": {name: component.stats() for name, component in self.components.items()},
+        }
+
+
+health_monitor = HealthMonitor.from_settings(get_settings().health)
+
+
+async def _ping_database(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("select 1"))
+
+
+async def _ping_hashing_executor() -> None:
+    if (executor := get_hashing_executor()) is not None:
+        await executor.run(abs, 0)
+
+
+def _application_probes() -> dict[str, tuple[Callable[[], Awaitable[Any]], bool]]:
+    db = get_settings().db
+    probes: dict[str, tuple[Callable[[], Awaitable[Any]], bool]] = {
+        "database": (partial(_ping_database, db.get_engine()), True),
+        "cache": (cache_manager.backend.ping, True),
+        "hashing": (_ping_hashing_executor, False),
+    }
+    for index, engine in enumerate(db.get_replica_engines(), start=1):
+        probes[f"replica-{index}"] = (partial(_ping_database, engine), False)
+    return probes
+
+
+@asynccontextmanager
+async def health_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Probe the application components in the background for the lifetime of the application worker.
+
+    The first probes start with the worker, without delaying its startup: until they answer, the worker is not ready.
+    """
+    probes = _application_probes()
+    for name, (probe, critical) in probes.items():
+        health_monitor.register(name, probe, critical=critical)
+    metrics.register("health", health_monitor.stats)
+    task = asyncio.create_task(health_monitor.run())
+    try:
+        yield
+    finally:
+        metrics.unregister("health")
+        for name in probes:
+            health_monitor.unregister(name)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
@@ -0,0 +1,95 @@
+"""In-process metrics primitives.
+
+Components register a collector callable with :data:`metrics`; the system
+metrics endpoint renders whatever the collectors return at scrape time.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+from .utils.singleton import SingletonMeta
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+__all__ = ("DEFAULT_LATENCY_BUCKETS_MS", "LatencyHistogram", "MetricsRegistry", "metrics")
+
+DEFAULT_LATENCY_BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+"""Default histogram bucket upper bounds, in milliseconds."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("buckets", "count", "counts", "max", "total")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record a single observation.
+
+        Args:
+            seconds: The observed duration in seconds.
+        """
+        value = seconds * 1000
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile from the bucket counts.
+
+        Args:
+            q: The quantile to estimate, between 0 and 1.
+
+        Returns:
+            The upper bound of the bucket holding the quantile, in milliseconds.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON serializable summary of the histogram."""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {f"le_{bound:g}": count for bound, count in zip(self.buckets, self.counts, strict=False)}
+            | {"le_inf": self.counts[-1]},
+        }
+
+
+class MetricsRegistry(metaclass=SingletonMeta):
+    """Registry of named metric collectors for the current worker."""
+
+    def __init__(self) -> None:
+        self.collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+    def register(self, name: str, collector: Callable[[], dict[str, Any]]) -> None:
+        self.collectors[name] = collector
+
+    def unregister(self, name: str) -> None:
+        self.collectors.pop(name, None)
+
+    def collect(self) -> dict[str, dict[str, Any]]:
+        return {name: collector() for name, collector in self.collectors.items()}
+
+
+metrics = MetricsRegistry()
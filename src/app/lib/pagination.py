@@ -0,0 +1,301 @@
+"""Keyset (cursor) pagination and total count strategies.
+
+Pages are addressed by an opaque cursor encoding the sort value and id of the row
+at the page boundary, so fetching a page seeks through the ``(sort_field, id)``
+index instead of scanning and discarding ``OFFSET`` rows.  ``NULL`` sort values
+are ordered last in ascending and first in descending order.
+
+The total of a listing is counted with one of the :data:`CountStrategy` options,
+trading accuracy for the cost of counting every matching row.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from collections.abc import Sequence  # noqa: TC003
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Generic, Literal, TypeVar
+
+import msgspec
+from advanced_alchemy.filters import LimitOffset, OrderBy, PaginationFilter
+from advanced_alchemy.service import find_filter
+from litestar.exceptions import ValidationException
+from sqlalchemy import and_, literal_column, or_, select, text
+
+from app.lib.schema import CamelizedBaseStruct
+
+if TYPE_CHECKING:
+    from advanced_alchemy.filters import FilterTypes, StatementFilter
+    from advanced_alchemy.repository import LoadSpec
+    from advanced_alchemy.service import SQLAlchemyAsyncRepositoryService
+    from sqlalchemy import ColumnElement, Select, StatementLambdaElement
+    from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session
+    from sqlalchemy.orm import InstrumentedAttribute
+
+__all__ = (
+    "COUNT_STRATEGY_HEADER",
+    "CountStrategy",
+    "CursorDirection",
+    "CursorPagination",
+    "LimitCursor",
+    "estimate_count",
+    "list_and_count",
+    "to_cursor_pagination",
+)
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT")
+CursorDirection = Literal["next", "prev"]
+CountStrategy = Literal["exact", "window", "estimate", "none"]
+"""How the total of a listing is counted.
+
+- ``exact``: a separate ``count(*)`` of the matching rows.
+- ``window``: a ``count(*) OVER ()`` column on the page query, in a single round trip.
+- ``estimate``: the planner's row estimate, on PostgreSQL.
+- ``none``: the total is not counted.  Offset pages then report the size of the page.
+"""
+
+COUNT_STRATEGY_HEADER = "X-Count-Strategy"
+"""Response header naming the count strategy used for the total of a listing."""
+ESTIMATE_EXACT_BELOW = 10_000
+"""Planner estimates below this many rows are replaced by an exact count, which is cheap at that size."""
+
+
+class CursorPagination(CamelizedBaseStruct, Generic[T]):
+    """Container for data returned using cursor pagination."""
+
+    items: Sequence[T]
+    """List of data being sent as part of the response."""
+    limit: int
+    """Maximal number of items to send."""
+    next_cursor: str | None
+    """Cursor of the following page, ``None`` on the last page."""
+    prev_cursor: str | None
+    """Cursor of the preceding page, ``None`` on the first page."""
+    total: int | None = None
+    """Total number of items, when counted."""
+
+
+@dataclass
+class LimitCursor(PaginationFilter):
+    """Data required to seek a page of rows ordered by ``(field_name, id_field)``."""
+
+    limit: int
+    """Maximal number of items in the page."""
+    field_name: str
+    """Name of the model attribute to sort on."""
+    sort_order: Literal["asc", "desc"] = "asc"
+    """Sort ascending or descending."""
+    id_field: str = "id"
+    """Unique attribute breaking ties between equal sort values."""
+    after: tuple[Any, Any] | None = None
+    """``(sort value, id)`` of the row the page starts after, ``None`` for the first page."""
+    direction: CursorDirection = "next"
+    """Whether the page follows or precedes ``after``."""
+
+    @classmethod
+    def from_cursor(
+        cls,
+        cursor: str | None,
+        limit: int,
+        field_name: str,
+        sort_order: Literal["asc", "desc"] = "asc",
+        id_field: str = "id",
+    ) -> LimitCursor:
+        """Decode a cursor issued for the same ordering.
+
+        Raises:
+            ValidationException: The cursor is malformed or was issued for a different ordering.
+        """
+        if not cursor:
+            return cls(limit=limit, field_name=field_name, sort_order=sort_order, id_field=id_field)
+        try:
+            direction, cursor_field, cursor_order, value, id_value = msgspec.msgpack.decode(
+                base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            )
+        except (binascii.Error, msgspec.DecodeError, TypeError, ValueError) as exc:
+            msg = "Invalid pagination cursor"
+            raise ValidationException(detail=msg) from exc
+        if direction not in {"next", "prev"} or (cursor_field, cursor_order) != (field_name, sort_order):
+            msg = "Pagination cursor does not match the requested ordering"
+            raise ValidationException(detail=msg)
+        return cls(
+            limit=limit,
+            field_name=field_name,
+            sort_order=sort_order,
+            id_field=id_field,
+            after=(value, id_value),
+            direction=direction,
+        )
+
+    def cursor(self, item: Any, direction: CursorDirection) -> str:
+        """Encode the cursor of the page following or preceding ``item``."""
+        raw = msgspec.msgpack.encode(
+            (direction, self.field_name, self.sort_order, getattr(item, self.field_name), getattr(item, self.id_field))
+        )
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @property
+    def _ascending(self) -> bool:
+        # a preceding page is read backwards and reversed afterwards
+        return (self.sort_order == "asc") is (self.direction == "next")
+
+    def _seek(
+        self, sort_field: InstrumentedAttribute[Any], id_field: InstrumentedAttribute[Any]
+    ) -> ColumnElement[bool]:
+        value, id_value = self.after  # type: ignore[misc]
+        if self._ascending:
+            if value is None:
+                return and_(sort_field.is_(None), id_field > id_value)
+            return or_(sort_field > value, and_(sort_field == value, id_field > id_value), sort_field.is_(None))
+        if value is None:
+            return or_(sort_field.is_not(None), id_field < id_value)
+        return or_(sort_field < value, and_(sort_field == value, id_field < id_value))
+
+    def _clauses(self, model: Any) -> tuple[ColumnElement[bool] | None, tuple[Any, ...]]:
+        sort_field = self._get_instrumented_attr(model, self.field_name)
+        id_field = self._get_instrumented_attr(model, self.id_field)
+        if self._ascending:
+            ordering = (sort_field.asc().nulls_last(), id_field.asc())
+        else:
+            ordering = (sort_field.desc().nulls_first(), id_field.desc())
+        return (None if self.after is None else self._seek(sort_field, id_field)), ordering
+
+    def append_to_statement(self, statement: Select[tuple[ModelT]], model: type[ModelT]) -> Select[tuple[ModelT]]:
+        seek, ordering = self._clauses(model)
+        if seek is not None:
+            statement = statement.where(seek)
+        # one extra row tells whether another page follows
+        return statement.order_by(*ordering).limit(self.limit + 1)
+
+    def append_to_lambda_statement(
+        self,
+        statement: StatementLambdaElement,
+        model: type[ModelT],
+    ) -> StatementLambdaElement:
+        seek, (sort_key, id_key) = self._clauses(model)
+        limit = self.limit + 1
+        if seek is not None:
+            statement += lambda s: s.where(seek)  # pyright: ignore[reportUnknownLambdaType,reportUnknownMemberType]
+        statement += lambda s: s.order_by(sort_key, id_key).limit(limit)  # pyright: ignore[reportUnknownLambdaType,reportUnknownMemberType]
+        return statement
+
+    def paginate(self, rows: Sequence[T], total: int | None = None) -> CursorPagination[T]:
+        """Build the page from the rows selected with this filter."""
+        items = list(rows[: self.limit])
+        more = len(rows) > self.limit
+        if self.direction == "prev":
+            items.reverse()
+        has_next = more if self.direction == "next" else self.after is not None
+        has_prev = more if self.direction == "prev" else self.after is not None
+        return CursorPagination(
+            items=items,
+            limit=self.limit,
+            next_cursor=self.cursor(items[-1], "next") if items and has_next else None,
+            prev_cursor=self.cursor(items[0], "prev") if items and has_prev else None,
+            total=total,
+        )
+
+
+def to_cursor_pagination(
+    data: Sequence[Any],
+    limit_cursor: LimitCursor,
+    *,
+    schema_type: type[T],
+    total: int | None = None,
+) -> CursorPagination[T]:
+    """Convert the rows selected with ``limit_cursor`` into a page of ``schema_type`` items.
+
+    Args:
+        data: Rows returned by the repository, including the look-ahead row.
+        limit_cursor: The filter the rows were selected with.
+        schema_type: The msgspec schema of the items.
+        total: The total number of items, when counted.
+
+    Returns:
+        The cursor page.
+    """
+    page = limit_cursor.paginate(data, total=total)
+    page.items = msgspec.convert(page.items, type=list[schema_type], from_attributes=True)  # type: ignore[valid-type]
+    return page
+
+
+async def estimate_count(
+    session: AsyncSession | async_scoped_session[AsyncSession], model: type[Any], *filters: StatementFilter
+) -> int | None:
+    """Estimate the number of rows matching ``filters`` from the planner statistics.
+
+    Pagination and ordering are ignored.  Unfiltered tables are estimated from ``pg_class.reltuples``, filtered ones
+    from the row estimate of the ``EXPLAIN`` of the query.
+
+    Returns:
+        The estimated row count, or ``None`` when the database is not PostgreSQL or the table was never analyzed.
+    """
+    connection = await session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    filters = tuple(filter_ for filter_ in filters if not isinstance(filter_, PaginationFilter | OrderBy))
+    if not filters:
+        reltuples = await connection.scalar(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": model.__table__.fullname},
+        )
+        # `-1` before the first `ANALYZE`
+        return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+    statement: Select[Any] = select(literal_column("1")).select_from(model)
+    for filter_ in filters:
+        statement = filter_.append_to_statement(statement, model)
+    compiled = statement.order_by(None).compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    parameters = compiled.construct_params()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}",
+        tuple(parameters[name] for name in compiled.positiontup or ()),
+    )
+    plan = result.scalar_one()
+    if isinstance(plan, str | bytes):
+        plan = msgspec.json.decode(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def list_and_count(
+    service: SQLAlchemyAsyncRepositoryService[Any],
+    *filters: FilterTypes | LimitCursor,
+    count_strategy: CountStrategy = "exact",
+    total: int | None = None,
+    load: LoadSpec | None = None,
+) -> tuple[Sequence[Any], int | None, CountStrategy]:
+    """List the rows matching ``filters`` and count their total with ``count_strategy``.
+
+    A ``total`` already counted is returned as the exact count it is.  Strategies that cannot answer fall back to an
+    exact count: estimates on other databases or below :data:`ESTIMATE_EXACT_BELOW` rows, window counts of cursor
+    pages, whose seek predicate narrows the window, and of pages past the last row, which have no row to carry the
+    count.
+
+    Args:
+        service: The service of the listed model.
+        *filters: The statement filters of the listing.
+        count_strategy: How to count the total.
+        total: An exact total already counted for ``filters``, reused instead of counting again.
+        load: Loader options of the listed rows.
+
+    Returns:
+        The rows, the total and the strategy actually used.
+    """
+    if count_strategy == "none":
+        return await service.list(*filters, load=load), None, "none"
+    if total is not None:
+        return await service.list(*filters, load=load), total, "exact"
+    results: Sequence[Any] | None = None
+    if count_strategy == "window" and find_filter(LimitCursor, filters) is None:
+        results, window_total = await service.list_and_count(*filters, load=load)
+        limit_offset = find_filter(LimitOffset, filters)
+        if results or limit_offset is None or not limit_offset.offset:
+            return results, window_total, "window"
+    if count_strategy == "estimate":
+        model = service.repository.model_type
+        estimate = await estimate_count(service.repository.session, model, *filters)
+        if estimate is not None and estimate >= ESTIMATE_EXACT_BELOW:
+            return await service.list(*filters, load=load), estimate, "estimate"
+    total = await service.count(*filters)
+    return (await service.list(*filters, load=load) if results is None else results), total, "exact"
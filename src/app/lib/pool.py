@@ -0,0 +1,255 @@
+"""Connection pool telemetry.
+
+:func:`instrument_engine` hooks the pool events of an engine and keeps a :class:`PoolMonitor` per engine: checkout
+wait and hold histograms, connection lifetimes, and the in-use, idle and overflow gauges read from the pool when the
+metrics are collected.  :func:`warm_pool` opens the connections of a pool up front.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from typing import TYPE_CHECKING, Any, cast
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.lib.metrics import LatencyHistogram, metrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Awaitable, Callable
+
+    from litestar import Litestar
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+    from sqlalchemy.pool import ConnectionPoolEntry, Pool
+
+__all__ = (
+    "InstrumentedAsyncQueuePool",
+    "PoolMonitor",
+    "instrument_engine",
+    "pool_monitors",
+    "pool_telemetry_lifespan",
+    "warm_pool",
+)
+
+logger = structlog.get_logger()
+
+LIFETIME_BUCKETS_MS: tuple[float, ...] = (1000, 10000, 60000, 300000, 900000, 1800000, 3600000)
+"""Connection lifetime histogram bucket upper bounds, in milliseconds."""
+
+_WAIT_KEY = "pool_checkout_wait"
+_CONNECTED_AT_KEY = "pool_connected_at"
+_CHECKED_OUT_AT_KEY = "pool_checked_out_at"
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection.
+
+    The wait, including the time spent opening a new connection, is handed to the ``checkout`` event through the
+    connection record.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        record = super()._do_get()
+        record.info[_WAIT_KEY] = time.perf_counter() - started
+        return record
+
+
+class PoolMonitor:
+    """Telemetry of the connection pool of an engine."""
+
+    __slots__ = (
+        "checkout_hold",
+        "checkout_wait",
+        "checkouts",
+        "connects",
+        "engine",
+        "invalidations",
+        "lifetime",
+        "max_in_use",
+        "max_overflow",
+        "name",
+        "overflow_checkouts",
+        "overflow_connects",
+    )
+
+    def __init__(self, engine: AsyncEngine, name: str) -> None:
+        self.engine = engine
+        self.name = name
+        self.checkout_wait = LatencyHistogram()
+        self.checkout_hold = LatencyHistogram()
+        self.lifetime = LatencyHistogram(LIFETIME_BUCKETS_MS)
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.overflow_checkouts = 0
+        self.overflow_connects = 0
+        self.max_in_use = 0
+        self.max_overflow = 0
+
+    @property
+    def pool(self) -> Pool:
+        # the engine replaces its pool when disposed
+        return self.engine.pool
+
+    def attach(self) -> None:
+        target = self.engine.sync_engine
+        event.listen(target, "connect", self._on_connect)
+        event.listen(target, "checkout", self._on_checkout)
+        event.listen(target, "checkin", self._on_checkin)
+        event.listen(target, "invalidate", self._on_invalidate)
+        event.listen(target, "soft_invalidate", self._on_invalidate)
+        event.listen(target, "close", self._on_close)
+
+    def _overflow(self) -> int:
+        return max(self.pool.overflow(), 0) if isinstance(self.pool, QueuePool) else 0
+
+    def _on_connect(self, _dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        record.info[_CONNECTED_AT_KEY] = time.monotonic()
+        self.connects += 1
+        if self._overflow():
+            self.overflow_connects += 1
+
+    def _on_checkout(self, _dbapi_connection: Any, record: ConnectionPoolEntry, _proxy: Any) -> None:
+        if (wait := record.info.pop(_WAIT_KEY, None)) is not None:
+            self.checkout_wait.observe(wait)
+        record.info[_CHECKED_OUT_AT_KEY] = time.perf_counter()
+        self.checkouts += 1
+        overflow = self._overflow()
+        if overflow:
+            self.overflow_checkouts += 1
+        self.max_overflow = max(self.max_overflow, overflow)
+        self.max_in_use = max(self.max_in_use, self._in_use())
+
+    def _on_checkin(self, _dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        if (checked_out_at := record.info.pop(_CHECKED_OUT_AT_KEY, None)) is not None:
+            self.checkout_hold.observe(time.perf_counter() - checked_out_at)
+
+    def _on_invalidate(self, _dbapi_connection: Any, _record: ConnectionPoolEntry, _exception: Any) -> None:
+        self.invalidations += 1
+
+    def _on_close(self, _dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        if (connected_at := record.info.pop(_CONNECTED_AT_KEY, None)) is not None:
+            self.lifetime.observe(time.monotonic() - connected_at)
+
+    def _in_use(self) -> int:
+        return self.pool.checkedout() if isinstance(self.pool, QueuePool) else 0
+
+    def gauges(self) -> dict[str, int]:
+        """Current state of the pool."""
+        pool = self.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        return {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": self._overflow(),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pool": type(self.pool).__name__,
+            **self.gauges(),
+            "max_in_use": self.max_in_use,
+            "max_overflow": self.max_overflow,
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "invalidations": self.invalidations,
+            "checkout_wait": self.checkout_wait.snapshot(),
+            "checkout_hold": self.checkout_hold.snapshot(),
+            "connection_lifetime": self.lifetime.snapshot(),
+        }
+
+    def summary(self) -> dict[str, Any]:
+        """A flat summary of the pool, for structured logs."""
+        return {
+            "pool": self.name,
+            **self.gauges(),
+            "max_in_use": self.max_in_use,
+            "max_overflow": self.max_overflow,
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "invalidations": self.invalidations,
+            "wait_p99_ms": self.checkout_wait.quantile(0.99),
+            "wait_max_ms": round(self.checkout_wait.max, 3),
+            "hold_p99_ms": self.checkout_hold.quantile(0.99),
+        }
+
+
+pool_monitors: dict[str, PoolMonitor] = {}
+"""Monitors of the instrumented engines, by name."""
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> PoolMonitor:
+    """Record the pool telemetry of ``engine`` under ``name``.
+
+    Args:
+        engine: The engine to instrument.  Checkout waits are only recorded by an
+            :class:`InstrumentedAsyncQueuePool`.
+        name: The name of the pool in the metrics and logs.
+
+    Returns:
+        The monitor of the engine.
+    """
+    monitor = PoolMonitor(engine, name)
+    monitor.attach()
+    pool_monitors[name] = monitor
+    return monitor
+
+
+async def warm_pool(
+    engine: AsyncEngine, size: int, prime: Callable[[AsyncConnection], Awaitable[Any]] | None = None
+) -> None:
+    """Open ``size`` connections of the pool of ``engine`` at once, and return them to the pool.
+
+    Args:
+        engine: The engine to warm up.
+        size: The number of connections to open, usually the size of the pool, so none is closed on checkin.
+        prime: Run on each connection before it is returned, to prepare the statements the application runs most.
+    """
+    async with AsyncExitStack() as stack:
+        # every connection opened is closed by the stack, even when another one fails
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(size)), return_exceptions=True
+        )
+        if errors := [result for result in opened if isinstance(result, BaseException)]:
+            raise errors[0]
+        connections = cast("list[AsyncConnection]", opened)
+        if prime is not None:
+            await asyncio.gather(*(prime(connection) for connection in connections))
+
+
+def _collect_pool_stats() -> dict[str, Any]:
+    return {name: monitor.stats() for name, monitor in pool_monitors.items()}
+
+
+async def _log_pool_summaries(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        for monitor in pool_monitors.values():
+            await logger.ainfo("Connection pool", **monitor.summary())
+
+
+@asynccontextmanager
+async def pool_telemetry_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Publish the pool metrics, and log a summary of each pool periodically, for the lifetime of the worker."""
+    # the settings build their engines with this module
+    from app.config.base import get_settings
+
+    interval = get_settings().db.POOL_LOG_INTERVAL
+    metrics.register("db_pools", _collect_pool_stats)
+    task = asyncio.create_task(_log_pool_summaries(interval)) if interval > 0 else None
+    try:
+        yield
+    finally:
+        metrics.unregister("db_pools")
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
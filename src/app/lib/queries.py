@@ -0,0 +1,225 @@
+"""Per-request database query accounting.
+
+:class:`QueryCountMiddleware` counts the statements each request executes, on any engine, and their time.  It
+warns about statements repeated within a request, the usual sign of an N+1 pattern, and enforces the query
+budget a route handler declares with the ``query_budget`` option.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, cast
+
+import structlog
+from litestar import Request
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.base import get_settings
+from app.config.constants import QUERY_BUDGET_KEY
+from app.lib.exceptions import QueryBudgetExceededError, exception_to_http_response
+from app.lib.metrics import metrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from litestar import Litestar
+    from litestar.types import HTTPScope, Message, Receive, Scope, Send
+    from sqlalchemy.engine import Connection, ExecutionContext
+
+    from app.config.base import DatabaseSettings
+
+__all__ = (
+    "QueryCountMiddleware",
+    "QueryCounter",
+    "RequestQueries",
+    "current_route",
+    "query_counter",
+    "query_counter_lifespan",
+)
+
+logger = structlog.get_logger()
+
+_STARTED_AT_KEY = "query_started_at"
+_request_queries: ContextVar[RequestQueries | None] = ContextVar("request_queries", default=None)
+
+
+class RequestQueries:
+    """The statements executed while handling a request."""
+
+    __slots__ = ("route", "seconds", "statements")
+
+    def __init__(self, route: str = "") -> None:
+        self.route = route
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def count(self) -> int:
+        return self.statements.total()
+
+    def repeated(self, limit: int) -> dict[str, int]:
+        """The statements executed at least ``limit`` times."""
+        return {statement: count for statement, count in self.statements.items() if count >= limit}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Connection, _cursor: Any, statement: str, _parameters: Any, _context: ExecutionContext, _many: bool
+) -> None:
+    if (queries := _request_queries.get()) is not None:
+        queries.statements[statement] += 1
+        conn.info[_STARTED_AT_KEY] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Connection, _cursor: Any, _statement: str, _parameters: Any, _context: ExecutionContext, _many: bool
+) -> None:
+    queries = _request_queries.get()
+    started = conn.info.pop(_STARTED_AT_KEY, None)
+    if queries is not None and started is not None:
+        queries.seconds += time.perf_counter() - started
+
+
+def current_route() -> str | None:
+    """The route of the request being handled, if any."""
+    queries = _request_queries.get()
+    return None if queries is None else queries.route
+
+
+class RouteQueries:
+    """Queries of the requests handled by a route."""
+
+    __slots__ = ("max_queries", "over_budget", "queries", "repeated", "requests", "seconds")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.max_queries = 0
+        self.over_budget = 0
+        self.repeated = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "max_queries": self.max_queries,
+            "db_ms": round(self.seconds * 1000, 3),
+            "over_budget": self.over_budget,
+            "repeated": self.repeated,
+        }
+
+
+class QueryCounter:
+    """Counts the statements executed for the request being handled.
+
+    Statements are told apart by their SQL, so the same query run with different parameters counts as repeated.
+    Statements executed outside of a request are not counted.
+    """
+
+    __slots__ = ("repeat_limit", "routes", "strict")
+
+    def __init__(self, repeat_limit: int = 3, strict: bool = False) -> None:
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+        self.routes: dict[str, RouteQueries] = {}
+
+    @classmethod
+    def from_settings(cls, settings: DatabaseSettings) -> QueryCounter:
+        return cls(repeat_limit=settings.QUERY_REPEAT_LIMIT, strict=settings.QUERY_BUDGET_STRICT)
+
+    async def check(self, queries: RequestQueries, budget: int | None) -> None:
+        """Record the queries of a request, and report its repeated statements and budget overrun.
+
+        Raises:
+            QueryBudgetExceededError: The request exceeded the budget of its route, in strict mode.
+        """
+        route = queries.route
+        totals = self.routes.setdefault(route, RouteQueries())
+        count = queries.count
+        totals.requests += 1
+        totals.queries += count
+        totals.seconds += queries.seconds
+        totals.max_queries = max(totals.max_queries, count)
+        await logger.adebug("Request queries", route=route, queries=count, db_ms=round(queries.seconds * 1000, 3))
+        if repeated := queries.repeated(self.repeat_limit):
+            totals.repeated += 1
+            for statement, times in repeated.items():
+                await logger.awarning("Repeated query", route=route, statement=statement, times=times)
+        if budget is not None and count > budget:
+            totals.over_budget += 1
+            msg = f"{route} executed {count} queries, over its budget of {budget}."
+            if self.strict:
+                raise QueryBudgetExceededError(detail=msg)
+            await logger.awarning("Query budget exceeded", route=route, queries=count, budget=budget)
+
+    def stats(self) -> dict[str, Any]:
+        return {route: totals.stats() for route, totals in self.routes.items()}
+
+
+query_counter = QueryCounter.from_settings(get_settings().db)
+
+
+class QueryCountMiddleware(AbstractMiddleware):
+    """Count the queries of each request against the budget of its route handler.
+
+    The budget is checked when the response starts, before it is sent, so in strict mode a request over its budget
+    gets an error response in its place, and its transaction is not committed.  Statements executed while a streamed
+    body is sent are not counted against the budget.
+    """
+
+    scopes = {ScopeType.HTTP}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        http_scope = cast("HTTPScope", scope)
+        route_handler = http_scope["route_handler"]
+        budget = route_handler.opt.get(QUERY_BUDGET_KEY)
+        queries = RequestQueries(f"{http_scope['method']} {route_handler.name or route_handler.handler_name}")
+        checked = rejected = False
+
+        async def send_checked(message: Message) -> None:
+            nonlocal checked, rejected
+            if rejected:
+                return
+            if message["type"] == "http.response.start" and not checked:
+                checked = True
+                try:
+                    await query_counter.check(queries, budget)
+                except QueryBudgetExceededError as exc:
+                    # The response has been marked as started, so the error cannot go through the exception handlers
+                    # any more: send it in place of the response held back, and drop the body that follows.
+                    rejected = True
+                    await self._send_error(exc, scope, receive, send)
+                    return
+            await send(message)
+
+        token = _request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            _request_queries.reset(token)
+        if not checked:
+            await query_counter.check(queries, budget)
+
+    @staticmethod
+    async def _send_error(exc: QueryBudgetExceededError, scope: Scope, receive: Receive, send: Send) -> None:
+        request: Request[Any, Any, Any] = Request(scope)
+        response = exception_to_http_response(request, exc)
+        await response.to_asgi_response(app=None, request=request)(scope, receive, send)
+
+
+@asynccontextmanager
+async def query_counter_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Publish the query counts of the routes for the lifetime of the application worker."""
+    metrics.register("queries", query_counter.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("queries")
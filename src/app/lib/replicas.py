@@ -0,0 +1,233 @@
+"""Routing of database reads to read replicas.
+
+Sessions created with :class:`RoutingSession` read from a replica while a request routed by
+:class:`ReplicaRoutingMiddleware` is handled, and write to the primary.  Safe methods are routed by default, route
+handlers opt in or out with the ``read_replica`` option.
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import TYPE_CHECKING, Any, Literal, cast
+
+import structlog
+from litestar import Request
+from litestar.datastructures import Cookie, MutableScopeHeaders
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.config.base import get_settings
+from app.config.constants import READ_REPLICA_KEY
+from app.lib.metrics import metrics
+from app.lib.transactions import SAFE_METHODS, in_read_only_transaction, read_only_bind
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Iterator, Sequence
+
+    from litestar import Litestar
+    from litestar.types import HTTPScope, Message, Receive, Scope, Send
+    from sqlalchemy.engine import Connection, ExceptionContext
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from app.config.base import DatabaseSettings
+
+__all__ = (
+    "PRIMARY_COOKIE",
+    "PRIMARY_HEADER",
+    "ReplicaRoutingMiddleware",
+    "ReplicaSelection",
+    "ReplicaSet",
+    "RoutingSession",
+    "read_from_primary",
+    "replicas",
+    "replicas_lifespan",
+)
+
+logger = structlog.get_logger()
+
+PRIMARY_COOKIE = "db-primary"
+"""Cookie set after a write, which routes the client's reads to the primary until it expires."""
+PRIMARY_HEADER = "x-read-primary"
+"""Request header routing the reads of the request to the primary."""
+
+ReplicaSelection = Literal["round_robin", "least_busy"]
+
+_REPLICA_INFO_KEY = "read_replica"
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+class ReplicaSet:
+    """Read replicas of the primary database.
+
+    A replica whose connection fails is skipped for ``retry_after`` seconds, reads fall back to the other replicas
+    and, once none is left, to the primary.
+    """
+
+    __slots__ = ("_failed_until", "_turn", "engines", "failures", "fallbacks", "retry_after", "selection")
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        selection: ReplicaSelection = "round_robin",
+        retry_after: int = 30,
+    ) -> None:
+        self.engines = list(engines)
+        self.selection = selection
+        self.retry_after = retry_after
+        self.failures = 0
+        self.fallbacks = 0
+        self._failed_until: dict[AsyncEngine, float] = {}
+        self._turn = itertools.count()
+        for engine in self.engines:
+            event.listen(engine.sync_engine, "handle_error", partial(self._on_error, engine))
+
+    @classmethod
+    def from_settings(cls, settings: DatabaseSettings) -> ReplicaSet:
+        selection: ReplicaSelection = "least_busy" if settings.REPLICA_SELECTION == "least_busy" else "round_robin"
+        return cls(settings.get_replica_engines(), selection=selection, retry_after=settings.REPLICA_RETRY_AFTER)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def healthy(self) -> list[AsyncEngine]:
+        """The replicas not skipped after a failure."""
+        now = time.monotonic()
+        return [engine for engine in self.engines if self._failed_until.get(engine, 0) <= now]
+
+    def choose(self) -> AsyncEngine | None:
+        """Pick the replica of a session.
+
+        Returns:
+            A healthy replica, or ``None`` when reads must go to the primary.
+        """
+        candidates = self.healthy()
+        if not candidates:
+            self.fallbacks += 1
+            return None
+        if self.selection == "least_busy":
+            return min(candidates, key=_checked_out)
+        return candidates[next(self._turn) % len(candidates)]
+
+    def mark_failed(self, engine: AsyncEngine) -> None:
+        self.failures += 1
+        self._failed_until[engine] = time.monotonic() + self.retry_after
+        logger.warning(
+            "Read replica failed, skipping it", replica=engine.url.render_as_string(), seconds=self.retry_after
+        )
+
+    def _on_error(self, engine: AsyncEngine, context: ExceptionContext) -> None:
+        # connection attempts that fail have no connection
+        if context.is_disconnect or context.connection is None:
+            self.mark_failed(engine)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": len(self.engines),
+            "healthy": len(self.healthy()),
+            "selection": self.selection,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "checked_out": [_checked_out(engine) for engine in self.engines],
+        }
+
+
+replicas = ReplicaSet.from_settings(get_settings().db)
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica while the request is routed to one.
+
+    The replica is picked once per session, so all the reads of a request see the same snapshot.  Flushes and
+    ``INSERT``, ``UPDATE`` and ``DELETE`` statements always go to the primary.  The transactions of read-only
+    requests are started ``READ ONLY``, see :mod:`app.lib.transactions`.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine | Connection:
+        bind = self._route(mapper, clause, **kwargs)
+        return read_only_bind(bind) if in_read_only_transaction() and isinstance(bind, Engine) else bind
+
+    def _route(self, mapper: Any, clause: Any, **kwargs: Any) -> Engine | Connection:
+        if _use_replica.get() and not self._flushing and not isinstance(clause, UpdateBase):
+            if _REPLICA_INFO_KEY not in self.info:
+                self.info[_REPLICA_INFO_KEY] = replicas.choose()
+            if (replica := self.info[_REPLICA_INFO_KEY]) is not None:
+                return replica.sync_engine  # type: ignore[no-any-return]
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class ReplicaRoutingMiddleware(AbstractMiddleware):
+    """Route the reads of safe requests to a replica.
+
+    After a successful unsafe request the client gets the :data:`PRIMARY_COOKIE`, and its reads go to the primary
+    until it expires, so it reads its own writes.
+    """
+
+    scopes = {ScopeType.HTTP}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not replicas.enabled:
+            await self.app(scope, receive, send)
+            return
+        http_scope = cast("HTTPScope", scope)
+        safe = http_scope["method"] in SAFE_METHODS
+        marked = http_scope["route_handler"].opt.get(READ_REPLICA_KEY)
+        use_replica = marked is not False if safe else bool(marked)
+        if use_replica:
+            request: Request[Any, Any, Any] = Request(scope)
+            use_replica = PRIMARY_COOKIE not in request.cookies and PRIMARY_HEADER not in request.headers
+        sticky_seconds = get_settings().db.REPLICA_STICKY_SECONDS
+        if not safe and sticky_seconds > 0:
+            send = partial(_pin_to_primary, send, sticky_seconds)
+        token = _use_replica.set(use_replica)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _use_replica.reset(token)
+
+
+@contextmanager
+def read_from_primary() -> Iterator[None]:
+    """Route the reads of the block to the primary.
+
+    Reads that fill a cache go to the primary, so a lagging replica does not store stale data in it for its whole
+    lifetime.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+async def _pin_to_primary(send: Send, seconds: int, message: Message) -> None:
+    if message["type"] == "http.response.start" and message["status"] < 400:
+        cookie = Cookie(key=PRIMARY_COOKIE, value="1", max_age=seconds, httponly=True, samesite="lax")
+        MutableScopeHeaders.from_message(message).add("set-cookie", cookie.to_header(header=""))
+    await send(message)
+
+
+@asynccontextmanager
+async def replicas_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Publish the replica metrics and close the replica pools for the lifetime of the application worker."""
+    if replicas.enabled:
+        metrics.register("replicas", replicas.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("replicas")
+        for engine in replicas.engines:
+            await engine.dispose()
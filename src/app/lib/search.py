@@ -0,0 +1,158 @@
+"""Search filters backing the ``search_mode`` of the filter dependencies.
+
+- ``ilike``: ``LIKE``/``ILIKE '%term%'`` on every search field.
+- ``trigram``: case insensitive substring or word similarity matches, both served by
+  ``pg_trgm`` GIN indexes.
+- ``fts``: full text search of a generated ``tsvector`` column, ranked by ``ts_rank``.
+
+The PostgreSQL operators compile to a case insensitive ``LIKE`` on other databases.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import TYPE_CHECKING, Any, Literal
+
+from advanced_alchemy.filters import SearchFilter
+from sqlalchemy import ColumnElement, cast, column, func, literal, literal_column, null, or_, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.visitors import InternalTraversal
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection, Dialect, Select, StatementLambdaElement, Table
+    from sqlalchemy.sql.compiler import DDLCompiler, SQLCompiler
+
+__all__ = (
+    "FTS_CONFIG",
+    "FullTextSearchFilter",
+    "SearchMode",
+    "TrigramSearchFilter",
+    "pg_trgm_available",
+    "search_document",
+)
+
+SearchMode = Literal["ilike", "trigram", "fts"]
+FTS_CONFIG = "simple"
+"""Text search configuration of search documents.  ``simple`` neither stems nor drops stop words, which suits names."""
+
+ModelT = Any
+
+
+class _PostgresOr(ColumnElement[Any]):
+    """An expression compiled to ``postgresql`` on PostgreSQL and to ``default`` on other databases."""
+
+    inherit_cache = True
+    _traverse_internals = [
+        ("postgresql", InternalTraversal.dp_clauseelement),
+        ("default", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, postgresql: ColumnElement[Any], default: ColumnElement[Any]) -> None:
+        self.postgresql = postgresql
+        self.default = default
+        self.type = postgresql.type
+
+
+@compiles(_PostgresOr)
+def _compile_default(element: _PostgresOr, compiler: SQLCompiler, **kw: Any) -> str:
+    return compiler.process(element.default, **kw)
+
+
+@compiles(_PostgresOr, "postgresql")
+def _compile_postgresql(element: _PostgresOr, compiler: SQLCompiler, **kw: Any) -> str:
+    return compiler.process(element.postgresql, **kw)
+
+
+def _fts_config() -> ColumnElement[Any]:
+    return cast(literal_column(f"'{FTS_CONFIG}'"), REGCONFIG)
+
+
+def _join_words(left: ColumnElement[Any], right: ColumnElement[Any]) -> ColumnElement[Any]:
+    return left.op("||")(literal_column("' '")).op("||")(right)
+
+
+def search_document(*column_names: str) -> ColumnElement[Any]:
+    """Build the expression of a generated search document column.
+
+    A ``tsvector`` of the columns on PostgreSQL, their lower cased text elsewhere.
+    """
+    words: list[ColumnElement[Any]] = [func.coalesce(column(name), literal_column("''")) for name in column_names]
+    document = reduce(_join_words, words)
+    return _PostgresOr(func.to_tsvector(_fts_config(), document), func.lower(document))
+
+
+def pg_trgm_available(
+    ddl: Any,
+    target: Any,
+    bind: Connection | None,
+    tables: list[Table] | None = None,
+    state: Any | None = None,
+    *,
+    dialect: Dialect | None = None,
+    compiler: DDLCompiler | None = None,
+    checkfirst: bool = False,
+) -> bool:
+    """DDL condition creating trigram objects only on PostgreSQL servers that ship ``pg_trgm``."""
+    if bind is None or bind.dialect.name != "postgresql":
+        return False
+    return bool(bind.scalar(text("SELECT true FROM pg_available_extensions WHERE name = 'pg_trgm'")))
+
+
+@dataclass
+class TrigramSearchFilter(SearchFilter):
+    """Data required to construct a ``WHERE field ILIKE '%' || :value || '%' OR field %> :value`` clause.
+
+    ``%>`` matches fields containing a word similar to the value, which tolerates typos.
+    """
+
+    def get_search_clauses(self, model: type[ModelT]) -> list[Any]:
+        search_clause: list[Any] = []
+        for field_name in self.normalized_field_names:
+            field = self._get_instrumented_attr(model, field_name)
+            substring = field.ilike(f"%{self.value}%")
+            search_clause.append(_PostgresOr(or_(substring, field.op("%>")(self.value)), substring))
+        return search_clause
+
+
+@dataclass
+class FullTextSearchFilter(SearchFilter):
+    """Data required to construct a ``WHERE vector @@ websearch_to_tsquery(:value)`` clause.
+
+    Other databases match the search fields with ``ILIKE '%' || :value || '%'``.
+    """
+
+    vector_field: str = "search_vector"
+    """Name of the generated ``tsvector`` attribute."""
+    rank: bool = False
+    """Order the matches by ``ts_rank`` before any other ordering."""
+
+    def _query(self) -> ColumnElement[Any]:
+        return func.websearch_to_tsquery(_fts_config(), literal(self.value))
+
+    def get_search_clauses(self, model: type[ModelT]) -> list[Any]:
+        vector = self._get_instrumented_attr(model, self.vector_field)
+        fallback = or_(
+            *(self._get_instrumented_attr(model, name).ilike(f"%{self.value}%") for name in self.normalized_field_names)
+        )
+        return [_PostgresOr(vector.bool_op("@@")(self._query()), fallback)]
+
+    def _rank(self, model: type[ModelT]) -> ColumnElement[Any]:
+        vector = self._get_instrumented_attr(model, self.vector_field)
+        return _PostgresOr(func.ts_rank(vector, self._query()), null()).desc()
+
+    def append_to_statement(self, statement: Select[tuple[ModelT]], model: type[ModelT]) -> Select[tuple[ModelT]]:
+        statement = super().append_to_statement(statement, model)
+        return statement.order_by(self._rank(model)) if self.rank else statement
+
+    def append_to_lambda_statement(
+        self,
+        statement: StatementLambdaElement,
+        model: type[ModelT],
+    ) -> StatementLambdaElement:
+        statement = super().append_to_lambda_statement(statement, model)
+        if self.rank:
+            rank = self._rank(model)
+            statement += lambda s: s.order_by(rank)  # pyright: ignore[reportUnknownLambdaType,reportUnknownMemberType]
+        return statement
@@ -0,0 +1,224 @@
+"""Slow query log.
+
+Statements slower than ``DATABASE_SLOW_QUERY_MS`` are logged with their normalized SQL, the shape of their
+parameters, their duration and the route that ran them, and the slowest are kept by :data:`slow_query_log`.  A sample
+of them is explained on a separate connection, in the background, without delaying the request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.base import get_settings
+from app.lib.metrics import metrics
+from app.lib.queries import current_route
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from litestar import Litestar
+    from sqlalchemy.engine import Connection, ExecutionContext
+
+    from app.config.base import DatabaseSettings
+
+__all__ = (
+    "SlowQuery",
+    "SlowQueryLog",
+    "normalize_statement",
+    "parameters_shape",
+    "slow_query_lifespan",
+    "slow_query_log",
+)
+
+logger = structlog.get_logger()
+
+_STARTED_AT_KEY = "slow_query_started_at"
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\$\d+|\?|%s|:\w+)\s*,)+\s*(?:\$\d+|\?|%s|:\w+)\s*\)")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse the whitespace of a statement, and its lists of placeholders, which vary with the number of values."""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe the types of the parameters of a statement, without their values."""
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} x {parameters_shape(rows[0])}" if rows else "0 x ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, list | tuple):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+@dataclass(slots=True)
+class SlowQuery:
+    """A statement slower than the threshold of the slow query log."""
+
+    statement: str
+    parameters: str
+    duration_ms: float
+    route: str | None
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    plan: Any = None
+    """The ``EXPLAIN`` output of the statement, when it was sampled."""
+
+
+class SlowQueryLog:
+    """The slowest recent statements of the worker.
+
+    The last ``size`` slow statements are kept in a ring buffer.  One in ``explain_every`` of them is explained on a
+    separate connection, so its plan is logged and kept with it.
+    """
+
+    __slots__ = ("_explains", "entries", "explain_every", "explained", "recorded", "threshold_ms")
+
+    def __init__(self, threshold_ms: int, size: int = 100, explain_every: int = 0) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain_every = explain_every
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self.recorded = 0
+        self.explained = 0
+        self._explains: set[asyncio.Task[None]] = set()
+
+    @classmethod
+    def from_settings(cls, settings: DatabaseSettings) -> SlowQueryLog:
+        return cls(
+            settings.SLOW_QUERY_MS,
+            size=settings.SLOW_QUERY_LOG_SIZE,
+            explain_every=settings.SLOW_QUERY_EXPLAIN_EVERY,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def record(self, statement: str, parameters: Any, seconds: float, executemany: bool = False) -> SlowQuery | None:
+        """Keep and log a statement if it is slow.
+
+        Returns:
+            The entry of the statement, or ``None`` when it was fast enough.
+        """
+        duration_ms = seconds * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return None
+        entry = SlowQuery(
+            statement=normalize_statement(statement),
+            parameters=parameters_shape(parameters, executemany),
+            duration_ms=round(duration_ms, 3),
+            route=current_route(),
+        )
+        self.entries.append(entry)
+        self.recorded += 1
+        logger.warning(
+            "Slow query",
+            statement=entry.statement,
+            parameters=entry.parameters,
+            duration_ms=entry.duration_ms,
+            route=entry.route,
+        )
+        return entry
+
+    def should_explain(self, conn: Connection, statement: str, executemany: bool) -> bool:
+        return (
+            self.explain_every > 0
+            and self.recorded % self.explain_every == 0
+            and not executemany
+            and conn.dialect.name == "postgresql"
+            and statement.lstrip().upper().startswith(_EXPLAINABLE)
+        )
+
+    def explain(self, engine: Engine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        """Explain a slow statement in the background."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # a fresh context, so the explain is not counted as a query of the request
+        task = loop.create_task(self._explain(engine, entry, statement, parameters), context=contextvars.Context())
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, engine: Engine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            async with AsyncEngine(engine).connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}", parameters)
+                plan = result.scalar()
+            entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as exc:  # noqa: BLE001
+            await logger.awarning("Slow query not explained", statement=entry.statement, error=str(exc))
+            return
+        self.explained += 1
+        await logger.ainfo("Slow query plan", statement=entry.statement, route=entry.route, plan=entry.plan)
+
+    def top(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """The kept statements, slowest first."""
+        entries = sorted(self.entries, key=lambda entry: entry.duration_ms, reverse=True)
+        return [asdict(entry) for entry in entries[:limit]]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "recorded": self.recorded,
+            "explained": self.explained,
+            "kept": len(self.entries),
+            "slowest_ms": max((entry.duration_ms for entry in self.entries), default=0),
+        }
+
+    async def close(self) -> None:
+        """Cancel the explains still running."""
+        tasks = list(self._explains)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+slow_query_log = SlowQueryLog.from_settings(get_settings().db)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Connection, _cursor: Any, _statement: str, _parameters: Any, _context: ExecutionContext, _many: bool
+) -> None:
+    if slow_query_log.enabled:
+        conn.info[_STARTED_AT_KEY] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Connection, _cursor: Any, statement: str, parameters: Any, _context: ExecutionContext, executemany: bool
+) -> None:
+    if (started := conn.info.pop(_STARTED_AT_KEY, None)) is None:
+        return
+    entry = slow_query_log.record(statement, parameters, time.perf_counter() - started, executemany)
+    if entry is not None and slow_query_log.should_explain(conn, statement, executemany):
+        slow_query_log.explain(conn.engine, entry, statement, parameters)
+
+
+@asynccontextmanager
+async def slow_query_lifespan(_: Litestar) -> AsyncGenerator[None, None]:
+    """Publish the slow query metrics for the lifetime of the application worker."""
+    metrics.register("slow_queries", slow_query_log.stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("slow_queries")
+        await slow_query_log.close()
@@ -0,0 +1,85 @@
+"""Read-only transactions for requests that only read.
+
+While a request routed by :class:`ReadOnlyTransactionMiddleware` is handled, sessions created with
+:class:`~app.lib.replicas.RoutingSession` run their transactions ``READ ONLY``, and :func:`before_send_handler` ends
+them with a rollback rather than a commit.  Safe methods are read-only by default, route handlers opt in or out with
+the ``read_only`` option.
+
+Sessions are created lazily and connect on their first statement, so requests that never query the database never
+check out a connection.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, cast
+
+from advanced_alchemy.extensions.litestar import (
+    async_autocommit_before_send_handler,
+    async_default_before_send_handler,
+)
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+
+from app.config.constants import READ_ONLY_KEY
+
+if TYPE_CHECKING:
+    from litestar.types import HTTPScope, Message, Receive, Scope, Send
+    from sqlalchemy.engine import Engine
+
+__all__ = (
+    "SAFE_METHODS",
+    "ReadOnlyTransactionMiddleware",
+    "before_send_handler",
+    "in_read_only_transaction",
+    "read_only_bind",
+)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+_read_only_binds: dict[Engine, Engine] = {}
+
+
+def in_read_only_transaction() -> bool:
+    """Whether the request being handled runs its transactions read-only."""
+    return _read_only.get()
+
+
+def read_only_bind(engine: Engine) -> Engine:
+    """The engine whose connections start their transactions ``READ ONLY``.
+
+    The connections are shared with ``engine``, and reset when returned to its pool.  Dialects without read-only
+    transactions ignore the option.
+    """
+    if (bind := _read_only_binds.get(engine)) is None:
+        bind = _read_only_binds[engine] = engine.execution_options(postgresql_readonly=True)
+    return bind
+
+
+class ReadOnlyTransactionMiddleware(AbstractMiddleware):
+    """Run the transactions of requests that only read as read-only transactions.
+
+    Writes made by a read-only request fail instead of being silently rolled back.
+    """
+
+    scopes = {ScopeType.HTTP}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        http_scope = cast("HTTPScope", scope)
+        marked = http_scope["route_handler"].opt.get(READ_ONLY_KEY)
+        read_only = marked is not False if http_scope["method"] in SAFE_METHODS else bool(marked)
+        token = _read_only.set(read_only)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _read_only.reset(token)
+
+
+async def before_send_handler(message: Message, scope: Scope) -> None:
+    """Commit the session of the request once its response starts, or close it when the request is read-only.
+
+    Closing the session returns its connections to the pool, which rolls their transactions back.
+    """
+    handler: Any = async_default_before_send_handler if _read_only.get() else async_autocommit_before_send_handler
+    await handler(message, scope)
@@ -3,11 +3,12 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, TypeVar
 
-from litestar.config.response_cache import default_cache_key_builder
+from litestar.config.response_cache import ResponseCacheConfig, default_cache_key_builder
 from litestar.di import Provide
 from litestar.openapi.config import OpenAPIConfig
 from litestar.openapi.plugins import ScalarRenderPlugin
 from litestar.plugins import CLIPluginProtocol, InitPluginProtocol
+from litestar.stores.registry import StoreRegistry
 
 if TYPE_CHECKING:
     from click import Group
@@ -53,14 +54,24 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
         from app.__about__ import __version__ as current_version
         from app.config import app as config
         from app.config import get_settings
+        from app.config.constants import RESPONSE_CACHE_STORE
         from app.db import models as m
         from app.domain.accounts import signals as account_signals
         from app.domain.accounts.controllers import AccessController, UserController
-        from app.domain.accounts.deps import provide_user
+        from app.domain.accounts.deps import login_admission_lifespan, pool_warmup_lifespan, provide_user
         from app.domain.accounts.guards import auth as jwt_auth
         from app.domain.accounts.services import UserService
         from app.domain.system.controllers import SystemController
+        from app.lib.admission import AdmissionController
+        from app.lib.cache import cache_lifespan, response_cache
+        from app.lib.crypt import hashing_lifespan
         from app.lib.exceptions import ApplicationError, exception_to_http_response
+        from app.lib.health import health_lifespan
+        from app.lib.pool import pool_telemetry_lifespan
+        from app.lib.queries import QueryCountMiddleware, query_counter_lifespan
+        from app.lib.replicas import ReplicaRoutingMiddleware, RoutingSession, replicas_lifespan
+        from app.lib.slow_queries import slow_query_lifespan
+        from app.lib.transactions import ReadOnlyTransactionMiddleware, before_send_handler
         from app.server import plugins
 
         settings = get_settings()
@@ -77,8 +88,24 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
         )
         # jwt auth (updates openapi config)
         app_config = jwt_auth.on_app_init(app_config)
+        # read replicas, routed ahead of authentication so its user lookup reads from them too
+        config.alchemy.session_config.sync_session_class = RoutingSession
+        app_config.middleware.insert(0, ReplicaRoutingMiddleware)
+        # read-only transactions, also ahead of authentication so the request uses a single connection
+        if settings.db.READ_ONLY_TRANSACTIONS:
+            config.alchemy.before_send_handler = before_send_handler
+            app_config.middleware.insert(0, ReadOnlyTransactionMiddleware)
+        # query budgets, counted around authentication so its user lookup is included
+        app_config.middleware.insert(0, QueryCountMiddleware)
         # security
         app_config.cors_config = config.cors
+        # response cache, shared by the workers with the `file` and `redis` cache backends
+        app_config.response_cache_config = ResponseCacheConfig(
+            default_expiration=settings.cache.RESPONSE_TTL,
+            key_builder=self._cache_key_builder,
+            store=RESPONSE_CACHE_STORE,
+        )
+        app_config.stores = StoreRegistry({RESPONSE_CACHE_STORE: response_cache})
         # plugins
         app_config.plugins.extend(
             [
@@ -106,6 +133,7 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
                 "m": m,
                 "UUID": UUID,
                 "UserService": UserService,
+                "AdmissionController": AdmissionController,
             },
         )
         # exception handling
@@ -118,16 +146,42 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
         app_config.dependencies.update(dependencies)
         # listeners
         app_config.listeners.extend([account_signals.user_created_event_handler])
+        # lifespan
+        app_config.lifespan.extend(
+            [
+                cache_lifespan,
+                hashing_lifespan,
+                login_admission_lifespan,
+                replicas_lifespan,
+                pool_telemetry_lifespan,
+                query_counter_lifespan,
+                slow_query_lifespan,
+                health_lifespan,
+                pool_warmup_lifespan,
+            ]
+        )
         return app_config
 
     def _cache_key_builder(self, request: Request) -> str:
         """App name prefixed cache key builder.
 
+        Conditional requests are keyed by their ``If-None-Match`` header.  Tags listed in the route handler's
+        ``cache_tags`` option are formatted with the path parameters and attached to the key, so the response can be
+        purged by tag.
+
         Args:
             request (Request): Current request instance.
 
         Returns:
             str: App slug prefixed cache key.
         """
-
-        return f"{self.app_slug}:{default_cache_key_builder(request)}"
+        from app.config.constants import CACHE_TAGS_KEY
+        from app.lib.cache import response_cache
+
+        key = f"{self.app_slug}:{default_cache_key_builder(request)}"
+        if if_none_match := request.headers.get("if-none-match"):
+            # conditional requests answer `304` for matching tags, so they are cached apart
+            key = f"{key}|{if_none_match}"
+        if tags := request.route_handler.opt.get(CACHE_TAGS_KEY):
+            response_cache.tag(key, (tag.format(**request.path_params) for tag in tags))
+        return key
@@ -15,8 +15,11 @@ from sqlalchemy.pool import NullPool
 
 from app.config import app as config
 from app.db.models import User
+from app.domain.accounts.cache import user_cache
 from app.domain.accounts.guards import auth
 from app.domain.accounts.services import UserService
+from app.lib.cache import response_cache
+from app.lib.queries import query_counter
 
 here = Path(__file__).parent
 pytestmark = pytest.mark.anyio
@@ -86,6 +89,13 @@ async def _seed_db(
     yield
 
 
+@pytest.fixture(autouse=True)
+async def _clear_user_cache() -> None:
+    """Users are reseeded for every test, so drop any snapshot or response cached by a previous one."""
+    await user_cache.clear()
+    await response_cache.delete_all()
+
+
 @pytest.fixture(autouse=True)
 def _patch_db(
     app: "Litestar",
@@ -97,6 +107,13 @@ def _patch_db(
     monkeypatch.setattr(config.alchemy, "engine_instance", engine)
 
 
+@pytest.fixture(autouse=True)
+def _strict_query_budgets(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fail the requests executing more queries than the budget of their route."""
+    monkeypatch.setattr(query_counter, "strict", True)
+    monkeypatch.setattr(query_counter, "routes", {})
+
+
 @pytest.fixture(name="client")
 async def fx_client(app: Litestar) -> AsyncIterator[AsyncClient]:
     """Async client that calls requests on the app.
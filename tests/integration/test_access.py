@@ -1,5 +1,7 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 pytestmark = pytest.mark.anyio
 
@@ -17,3 +19,37 @@ pytestmark = pytest.mark.anyio
 async def test_user_login(client: AsyncClient, username: str, password: str, expected_status_code: int) -> None:
     response = await client.post("/api/access/login", data={"username": username, "password": password})
     assert response.status_code == expected_status_code
+
+
+async def test_claims_mode_login(client: AsyncClient, engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.domain.accounts import guards
+    from app.domain.accounts.claims import token_revocations
+
+    monkeypatch.setattr(guards.settings.auth, "CLAIMS_MODE", True)
+    await token_revocations.clear()
+    credentials = {"username": "user@example.com", "password": "Test_Password2!"}
+    response = await client.post("/api/access/login", data=credentials)
+    assert response.status_code == 201
+    headers = {"Authorization": response.headers["Authorization"]}
+
+    checkouts: list[object] = []
+
+    def _on_checkout(*args: object) -> None:
+        checkouts.append(args)
+
+    event.listen(engine.sync_engine, "checkout", _on_checkout)
+    try:
+        response = await client.get("/api/me", headers=headers)
+    finally:
+        event.remove(engine.sync_engine, "checkout", _on_checkout)
+    assert response.status_code == 200
+    assert response.json()["email"] == "user@example.com"
+    assert response.json()["hasPassword"] is True
+    assert not checkouts
+
+    # a password change invalidates tokens issued for the previous password
+    user_id = response.json()["id"]
+    response = await client.patch(f"/api/users/{user_id}", json={"password": "Changed!1"}, headers=headers)
+    assert response.status_code == 200
+    response = await client.get("/api/me", headers=headers)
+    assert response.status_code == 401
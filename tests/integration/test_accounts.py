@@ -1,9 +1,13 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import pytest
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from httpx import AsyncClient
+    from litestar import Litestar
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 pytestmark = pytest.mark.anyio
 
@@ -57,9 +61,434 @@ async def test_accounts_update(client: "AsyncClient", user_token_headers: dict[s
     assert response.json()["name"] == "Name Changed"
 
 
+async def test_accounts_update_single_statement(
+    client: "AsyncClient", user_token_headers: dict[str, str], engine: "AsyncEngine"
+) -> None:
+    from sqlalchemy import event
+
+    updates: list[str] = []
+
+    def _on_execute(_conn: object, _cursor: object, statement: str, *args: object) -> None:
+        if not statement.lstrip().upper().startswith(("SELECT", "BEGIN", "COMMIT")):
+            updates.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        response = await client.patch(
+            "/api/users/3", json={"surname": "Changed", "password": "N3w_Password!"}, headers=user_token_headers
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _on_execute)
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": 3,
+        "email": "test@test.com",
+        "name": "Test User",
+        "surname": "Changed",
+        "hasPassword": True,
+    }
+    assert len(updates) == 1
+    assert "RETURNING" in updates[0]
+    response = await client.post("/api/access/login", data={"username": "test@test.com", "password": "N3w_Password!"})
+    assert response.status_code == 201
+
+
 async def test_accounts_delete(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
     response = await client.delete(
         "/api/users/2",
         headers=user_token_headers,
     )
     assert response.status_code == 204
+
+
+async def test_accounts_get_served_from_user_cache(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
+    from app.domain.accounts.cache import user_cache
+    from app.lib.cache import response_cache
+
+    response = await client.get("/api/users/1", headers=user_token_headers)
+    assert response.status_code == 200
+    hits = user_cache.stats()["hits"]
+    await response_cache.delete_all()
+    response = await client.get("/api/users/1", headers=user_token_headers)
+    assert response.status_code == 200
+    # both the token lookup and the user lookup are hits
+    assert user_cache.stats()["hits"] == hits + 2
+
+    response = await client.patch("/api/users/1", json={"name": "Name Changed"}, headers=user_token_headers)
+    assert response.status_code == 200
+    response = await client.get("/api/users/1", headers=user_token_headers)
+    assert response.json()["name"] == "Name Changed"
+
+
+async def test_accounts_get_query_count(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
+    from app.lib.queries import query_counter
+
+    response = await client.get("/api/users/1", headers=user_token_headers)
+    assert response.status_code == 200
+    # user cache is empty, so both the token lookup and the user lookup query the database
+    assert query_counter.stats()["GET get_user"]["queries"] == 2
+    response = await client.get("/api/users/1", headers=user_token_headers)
+    assert response.status_code == 200
+    assert query_counter.stats()["GET get_user"]["max_queries"] == 2
+    assert query_counter.stats()["GET get_user"]["repeated"] == 0
+
+
+async def test_accounts_list_uses_one_connection(
+    client: "AsyncClient", user_token_headers: dict[str, str], engine: "AsyncEngine"
+) -> None:
+    from sqlalchemy import event
+
+    checkouts: list[object] = []
+
+    def _on_checkout(*args: object) -> None:
+        checkouts.append(args)
+
+    event.listen(engine.sync_engine, "checkout", _on_checkout)
+    try:
+        # user cache is empty, so authentication queries the database as well
+        response = await client.get("/api/users", headers=user_token_headers)
+    finally:
+        event.remove(engine.sync_engine, "checkout", _on_checkout)
+    assert response.status_code == 200
+    assert len(checkouts) == 1
+
+
+async def test_accounts_list_cached_in_shared_store(
+    app: "Litestar", client: "AsyncClient", user_token_headers: dict[str, str]
+) -> None:
+    from app.config import get_settings
+    from app.config.constants import RESPONSE_CACHE_STORE
+
+    store = app.stores.get(RESPONSE_CACHE_STORE)
+    await store.delete_all()
+    response = await client.get("/api/users", headers=user_token_headers)
+    assert response.status_code == 200
+    # keys are prefixed with the app slug
+    assert await store.exists(f"{get_settings().app.slug}:GET/api/users")
+
+
+async def test_accounts_cached_responses_purged_on_write(
+    client: "AsyncClient", user_token_headers: dict[str, str]
+) -> None:
+    from app.lib.cache import response_cache
+
+    response = await client.get("/api/users", headers=user_token_headers)
+    total = response.json()["total"]
+    response = await client.get("/api/users/2", headers=user_token_headers)
+    assert response.json()["name"] != "Name Changed"
+    hits = response_cache.stats()["hits"]
+    await client.get("/api/users", headers=user_token_headers)
+    await client.get("/api/users/2", headers=user_token_headers)
+    assert response_cache.stats()["hits"] == hits + 2
+
+    response = await client.patch("/api/users/2", json={"name": "Name Changed"}, headers=user_token_headers)
+    assert response.status_code == 200
+    response = await client.get("/api/users/2", headers=user_token_headers)
+    assert response.json()["name"] == "Name Changed"
+
+    response = await client.post(
+        "/api/users",
+        json={"name": "A User", "email": "cached@example.com", "password": "S3cret!"},
+        headers=user_token_headers,
+    )
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+    response = await client.get("/api/users", headers=user_token_headers)
+    assert response.json()["total"] == total + 1
+    response = await client.get(f"/api/users/{user_id}", headers=user_token_headers)
+    assert response.status_code == 200
+
+    response = await client.delete(f"/api/users/{user_id}", headers=user_token_headers)
+    assert response.status_code == 204
+    response = await client.get(f"/api/users/{user_id}", headers=user_token_headers)
+    assert response.status_code == 404
+    response = await client.get("/api/users", headers=user_token_headers)
+    assert response.json()["total"] == total
+
+
+async def test_accounts_conditional_get(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
+    response = await client.get("/api/users", headers=user_token_headers)
+    assert response.status_code == 200
+    list_etag = response.headers["etag"]
+    response = await client.get("/api/users", headers={"If-None-Match": list_etag, **user_token_headers})
+    assert response.status_code == 304
+    assert response.headers["etag"] == list_etag
+    assert not response.content
+
+    user_id = 2
+    response = await client.get(f"/api/users/{user_id}", headers=user_token_headers)
+    assert response.status_code == 200
+    user_etag = response.headers["etag"]
+    response = await client.get(
+        f"/api/users/{user_id}", headers={"If-None-Match": f"W/{user_etag}", **user_token_headers}
+    )
+    assert response.status_code == 304
+
+    response = await client.patch(f"/api/users/{user_id}", json={"name": "Etagged"}, headers=user_token_headers)
+    assert response.status_code == 200
+    response = await client.get(f"/api/users/{user_id}", headers={"If-None-Match": user_etag, **user_token_headers})
+    assert response.status_code == 200
+    assert response.headers["etag"] != user_etag
+    response = await client.get("/api/users", headers={"If-None-Match": list_etag, **user_token_headers})
+    assert response.status_code == 200
+    assert response.headers["etag"] != list_etag
+
+
+async def test_accounts_sparse_fields(
+    client: "AsyncClient", user_token_headers: dict[str, str], engine: "AsyncEngine"
+) -> None:
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def _on_execute(conn: object, cursor: object, statement: str, *args: object) -> None:
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        response = await client.get("/api/users", params={"fields": "id,email"}, headers=user_token_headers)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _on_execute)
+    assert response.status_code == 200
+    assert all(set(item) == {"id", "email"} for item in response.json()["items"])
+    listing = next(statement for statement in statements if "LIMIT" in statement)
+    assert "user_account.email" in listing
+    assert "user_account.surname" not in listing
+
+    response = await client.get("/api/users/2", params={"fields": "hasPassword"}, headers=user_token_headers)
+    assert response.status_code == 200
+    assert response.json() == {"hasPassword": True}
+    response = await client.get("/api/users", params={"fields": "email,password"}, headers=user_token_headers)
+    assert response.status_code == 400
+
+
+async def test_accounts_export(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
+    import csv
+    import json
+
+    response = await client.get("/api/users", params={"pageSize": 100}, headers=user_token_headers)
+    listed = response.json()["items"]
+    response = await client.get("/api/users/export", params={"pageSize": 1}, headers=user_token_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    # pagination is ignored, the ordering is kept
+    assert [json.loads(line) for line in response.text.splitlines()] == listed
+
+    response = await client.get(
+        "/api/users/export", params={"format": "csv", "fields": "id,email"}, headers=user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    rows = list(csv.reader(response.text.splitlines()))
+    assert rows == [["id", "email"], *([str(item["id"]), item["email"]] for item in listed)]
+    response = await client.get(
+        "/api/users/export",
+        params={"format": "csv", "createdBefore": "2000-01-01T00:00:00Z"},
+        headers=user_token_headers,
+    )
+    assert response.text.splitlines() == ["id,email,name,surname,hasPassword"]
+
+
+async def test_accounts_list_count_strategy(
+    client: "AsyncClient",
+    user_token_headers: dict[str, str],
+    engine: "AsyncEngine",
+    monkeypatch: "pytest.MonkeyPatch",
+) -> None:
+    from sqlalchemy import text
+
+    from app.lib import pagination
+    from app.lib.cache import CacheBackend
+
+    # small estimates are replaced by an exact count
+    response = await client.get("/api/users", headers=user_token_headers)
+    assert response.headers[pagination.COUNT_STRATEGY_HEADER] == "exact"
+    assert response.json()["total"] == 4
+
+    monkeypatch.setattr(pagination, "ESTIMATE_EXACT_BELOW", 0)
+    # the total counted for the ETag of a backend that does not broadcast is returned instead of an estimate
+    response = await client.get("/api/users?pageSize=1", headers=user_token_headers)
+    assert response.headers[pagination.COUNT_STRATEGY_HEADER] == "exact"
+    monkeypatch.setattr(CacheBackend, "broadcasts", property(lambda _: True))
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE user_account"))
+    response = await client.get("/api/users?pageSize=1", headers=user_token_headers)
+    assert response.headers[pagination.COUNT_STRATEGY_HEADER] == "estimate"
+    assert response.json()["total"] == 4
+    params = {"createdAfter": "2000-01-01T00:00:00Z", "updatedBefore": "2100-01-01T00:00:00Z"}
+    response = await client.get("/api/users", params=params, headers=user_token_headers)
+    assert response.headers[pagination.COUNT_STRATEGY_HEADER] == "estimate"
+    assert response.json()["total"] >= 1
+
+
+async def test_list_and_count_strategies(sessionmaker: "async_sessionmaker[AsyncSession]") -> None:
+    from advanced_alchemy.filters import LimitOffset
+
+    from app.domain.accounts.services import UserService
+    from app.lib.pagination import LimitCursor, list_and_count
+
+    async with sessionmaker() as session, UserService.new(session) as users_service:
+        results, total, counted = await list_and_count(users_service, LimitOffset(2, 0), count_strategy="window")
+        assert (len(results), total, counted) == (2, 4, "window")
+        # a page past the end has no row to carry the window count
+        results, total, counted = await list_and_count(users_service, LimitOffset(2, 8), count_strategy="window")
+        assert (len(results), total, counted) == (0, 4, "exact")
+        cursor = LimitCursor.from_cursor(None, 2, "name")
+        results, total, counted = await list_and_count(users_service, cursor, count_strategy="window")
+        assert (len(results), total, counted) == (3, 4, "exact")
+        results, total, counted = await list_and_count(users_service, LimitOffset(2, 0), count_strategy="none")
+        assert (len(results), total, counted) == (2, None, "none")
+
+
+async def test_estimate_count_ignores_ordering(
+    engine: "AsyncEngine", sessionmaker: "async_sessionmaker[AsyncSession]"
+) -> None:
+    from advanced_alchemy.filters import LimitOffset, OrderBy
+    from sqlalchemy import event, text
+
+    from app.db import models as m
+    from app.lib.pagination import estimate_count
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE user_account"))
+    statements: list[str] = []
+
+    def _record(_conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        statements.append(statement)
+
+    # the default page and order of a listing leave the table unfiltered, estimated without an `EXPLAIN`
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        async with sessionmaker() as session:
+            filters = (LimitOffset(2, 0), OrderBy(field_name="name", sort_order="asc"))
+            assert await estimate_count(session, m.User, *filters) == 4
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+    assert [statement for statement in statements if "pg_class" in statement]
+    assert not [statement for statement in statements if statement.startswith("EXPLAIN")]
+
+
+async def test_accounts_search_modes(sessionmaker: "async_sessionmaker[AsyncSession]") -> None:
+    from sqlalchemy import text
+
+    from app.domain.accounts.services import UserService
+    from app.lib.search import FullTextSearchFilter, TrigramSearchFilter
+
+    fields = {"name", "surname", "email"}
+    async with sessionmaker() as session, UserService.new(session) as users_service:
+        results = await users_service.list(FullTextSearchFilter(field_name=fields, value="super", rank=True))
+        assert [user.email for user in results] == ["superuser@example.com"]
+        results = await users_service.list(FullTextSearchFilter(field_name=fields, value="example -super"))
+        assert "superuser@example.com" not in {user.email for user in results}
+
+        if not await session.scalar(text("SELECT true FROM pg_extension WHERE extname = 'pg_trgm'")):
+            pytest.skip("pg_trgm is not installed")
+        results = await users_service.list(TrigramSearchFilter(field_name=fields, value="SUPER"))
+        assert [user.email for user in results] == ["superuser@example.com"]
+        # word similarity tolerates a typo
+        results = await users_service.list(TrigramSearchFilter(field_name=fields, value="Supr User"))
+        assert "superuser@example.com" in {user.email for user in results}
+
+
+async def test_import_users(sessionmaker: "async_sessionmaker[AsyncSession]", tmp_path: "Path") -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.domain.accounts.importer import ImportCheckpoint, import_users, read_user_records
+    from app.domain.accounts.services import UserService
+    from app.lib import crypt
+
+    source = tmp_path / "users.csv"
+    source.write_text(
+        "email,name,surname,password\n"
+        "imported-1@example.com,Imported,One,S3cret!\n"
+        "imported-2@example.com,Imported,Two,\n"
+        "user@example.com,Renamed,User,\n"
+    )
+    checkpoint = ImportCheckpoint.for_source(source)
+    # a previous run committed the first record
+    checkpoint.save(1)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        progress = await import_users(
+            read_user_records(source), sessionmaker, executor, workers=2, chunk_size=1, checkpoint=checkpoint
+        )
+        assert (progress.position, progress.read, progress.written) == (3, 2, 1)
+        assert not checkpoint.path.exists()
+        async with sessionmaker() as session, UserService.new(session) as users_service:
+            assert await users_service.get_one_or_none(email="imported-1@example.com") is None
+            assert (await users_service.get_one(email="user@example.com")).name == "Example User"
+
+        progress = await import_users(
+            read_user_records(source), sessionmaker, executor, workers=2, on_conflict="update", checkpoint=checkpoint
+        )
+        assert progress.written == 3
+    async with sessionmaker() as session, UserService.new(session) as users_service:
+        imported = await users_service.get_one(email="imported-1@example.com")
+        assert await crypt.verify_password("S3cret!", imported.hashed_password or "")
+        assert (await users_service.get_one(email="imported-2@example.com")).hashed_password is None
+        updated = await users_service.get_one(email="user@example.com")
+        # the existing password is kept when the row has none
+        assert (updated.name, updated.hashed_password is not None) == ("Renamed", True)
+
+
+async def test_accounts_batch(client: "AsyncClient", user_token_headers: dict[str, str]) -> None:
+    response = await client.get("/api/users/batch", params={"id": [1, 2, 999]}, headers=user_token_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [1, 2]
+    assert body["errors"] == [{"index": 2, "detail": "User not found.", "id": 999}]
+
+    response = await client.post(
+        "/api/users/batch",
+        json=[
+            {"email": "batch-1@example.com", "password": "S3cret!", "name": "Batch"},
+            {"email": "user@example.com", "password": "S3cret!"},
+            {"email": "batch-1@example.com", "password": "S3cret!"},
+        ],
+        headers=user_token_headers,
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert [item["email"] for item in body["items"]] == ["batch-1@example.com"]
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (1, "A user with this email already exists."),
+        (2, "Duplicate of item 0."),
+    ]
+    created_id = body["items"][0]["id"]
+
+    response = await client.patch(
+        "/api/users/batch",
+        json=[
+            {"id": created_id, "surname": "Updated"},
+            {"id": 2, "name": "Renamed", "email": "renamed@example.com"},
+            {"id": 3, "email": "superuser@example.com"},
+            {"id": 999, "name": "Nobody"},
+        ],
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["id"], item["name"], item["surname"]) for item in body["items"]] == [
+        (created_id, "Batch", "Updated"),
+        (2, "Renamed", "Example User Surname"),
+    ]
+    assert [(error["index"], error["id"]) for error in body["errors"]] == [(2, 3), (3, 999)]
+    response = await client.get("/api/users/2", headers=user_token_headers)
+    assert response.json()["email"] == "renamed@example.com"
+
+    response = await client.delete("/api/users/batch", params={"id": [created_id, 999]}, headers=user_token_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [created_id]
+    assert [error["id"] for error in body["errors"]] == [999]
+    response = await client.get(f"/api/users/{created_id}", headers=user_token_headers)
+    assert response.status_code == 404
+
+
+async def test_accounts_batch_max_size(
+    client: "AsyncClient", user_token_headers: dict[str, str], monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    from app.domain.accounts.controllers import users
+
+    monkeypatch.setattr(users.settings.app, "BATCH_MAX_SIZE", 2)
+    response = await client.get("/api/users/batch", params={"id": [1, 2, 3]}, headers=user_token_headers)
+    assert response.status_code == 400
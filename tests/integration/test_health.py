@@ -19,3 +19,23 @@ async def test_health(client: AsyncClient, valkey_service: None) -> None:
     }
 
     assert response.json() == expected
+
+
+async def test_liveness(client: AsyncClient) -> None:
+    response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+async def test_metrics_require_an_admin(
+    client: AsyncClient, user_token_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.domain.accounts import guards
+
+    response = await client.get("/metrics")
+    assert response.status_code == 401
+    response = await client.get("/metrics", headers=user_token_headers)
+    assert response.status_code == 403
+    monkeypatch.setattr(guards.settings.auth, "ADMIN_EMAILS", "admin@example.com, User@example.com")
+    response = await client.get("/metrics", headers=user_token_headers)
+    assert response.status_code == 200
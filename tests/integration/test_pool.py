@@ -0,0 +1,84 @@
+import pytest
+from pytest_databases.docker.postgres import PostgresService
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.lib.pool import InstrumentedAsyncQueuePool, PoolMonitor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pool_monitor(postgres_service: PostgresService) -> None:
+    engine = create_async_engine(
+        URL.create(
+            drivername="postgresql+asyncpg",
+            username=postgres_service.user,
+            password=postgres_service.password,
+            host=postgres_service.host,
+            port=postgres_service.port,
+            database=postgres_service.database,
+        ),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=1,
+    )
+    monitor = PoolMonitor(engine, "test")
+    monitor.attach()
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("select 1"))
+            await second.execute(text("select 1"))
+            assert monitor.gauges() == {"size": 1, "in_use": 2, "idle": 0, "overflow": 1}
+        async with engine.connect() as third:
+            await third.execute(text("select 1"))
+    finally:
+        await engine.dispose()
+
+    stats = monitor.stats()
+    assert (stats["checkouts"], stats["connects"]) == (3, 2)
+    assert (stats["max_in_use"], stats["max_overflow"]) == (2, 1)
+    assert (stats["overflow_checkouts"], stats["overflow_connects"]) == (1, 1)
+    assert stats["checkout_wait"]["count"] == 3
+    assert stats["checkout_hold"]["count"] == 3
+    # the overflow connection is closed on checkin, the other one on dispose
+    assert stats["connection_lifetime"]["count"] == 2
+
+
+async def test_warm_pool(postgres_service: PostgresService) -> None:
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+    from app.domain.accounts.services import UserService
+    from app.lib.pool import warm_pool
+
+    engine = create_async_engine(
+        URL.create(
+            drivername="postgresql+asyncpg",
+            username=postgres_service.user,
+            password=postgres_service.password,
+            host=postgres_service.host,
+            port=postgres_service.port,
+            database=postgres_service.database,
+        ),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=2,
+    )
+    monitor = PoolMonitor(engine, "test")
+    monitor.attach()
+    primed: list[AsyncConnection] = []
+
+    async def _prime(connection: AsyncConnection) -> None:
+        async with AsyncSession(bind=connection) as session:
+            await UserService(session=session).prime_statements()
+        primed.append(connection)
+
+    try:
+        await warm_pool(engine, 2, _prime)
+        assert len(primed) == 2
+        assert monitor.gauges() == {"size": 2, "in_use": 0, "idle": 2, "overflow": 0}
+        async with engine.connect() as connection:
+            await connection.execute(text("select 1"))
+    finally:
+        await engine.dispose()
+    # the later checkout reused a warm connection
+    assert monitor.stats()["connects"] == 2
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.lib import slow_queries
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_slow_query_explained(engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = slow_queries.SlowQueryLog(threshold_ms=10, explain_every=1)
+    monkeypatch.setattr(slow_queries, "slow_query_log", log)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_sleep(0.05) WHERE 1 = :one"), {"one": 1})
+    await asyncio.gather(*log._explains)
+
+    [entry] = log.top()
+    assert entry["statement"].startswith("SELECT pg_sleep(0.05)")
+    assert entry["parameters"] == "(int)"
+    assert entry["duration_ms"] >= 10
+    assert entry["plan"][0]["Plan"]["Node Type"] == "Result"
+    assert log.stats()["explained"] == 1
+
+
+async def test_slow_queries_require_an_admin(
+    client: AsyncClient, user_token_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.domain.accounts import guards
+
+    response = await client.get("/slow-queries", headers=user_token_headers)
+    assert response.status_code == 403
+    monkeypatch.setattr(guards.settings.auth, "ADMIN_EMAILS", "user@example.com")
+    response = await client.get("/slow-queries", headers=user_token_headers)
+    assert response.status_code == 200
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.lib import admission
+from app.lib.exceptions import ServiceOverloadedError, TooManyRequestsError
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_admission_rejects_when_wait_queue_full() -> None:
+    """Test that requests beyond the wait queue are shed with a 429."""
+    controller = admission.AdmissionController(max_concurrency=1, max_waiting=0, wait_timeout=1, retry_after=2)
+    async with controller.admit():
+        with pytest.raises(TooManyRequestsError) as exc_info:
+            async with controller.admit():
+                pass
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 2
+    assert controller.stats()["rejected_queue_full"] == 1
+
+
+async def test_admission_rejects_after_deadline() -> None:
+    """Test that queued requests give up with a 503 once the deadline passes."""
+    controller = admission.AdmissionController(max_concurrency=1, max_waiting=1, wait_timeout=0.01)
+    async with controller.admit():
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            async with controller.admit():
+                pass
+    assert exc_info.value.status_code == 503
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["waiting"] == 0
+    assert stats["running"] == 0
+
+
+async def test_admission_admits_waiting_request() -> None:
+    """Test that a queued request runs once a slot is released."""
+    controller = admission.AdmissionController(max_concurrency=1, max_waiting=1, wait_timeout=1)
+
+    async def _hold() -> None:
+        async with controller.admit():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(_hold(), _hold())
+    assert controller.stats()["admitted"] == 2
+
+
+def test_concurrency_for_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that concurrency is derived from the memory share and capped by the ceiling."""
+    monkeypatch.setattr(admission, "available_memory", lambda: 1024 * 1024 * 1024)
+    assert admission.concurrency_for_memory(64 * 1024 * 1024, memory_percent=50) == 8
+    assert admission.concurrency_for_memory(64 * 1024 * 1024, memory_percent=50, ceiling=4) == 4
+    assert admission.concurrency_for_memory(2 * 1024 * 1024 * 1024, memory_percent=50) == 1
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.db import models as m
+from app.domain.accounts.cache import UserCache
+from app.lib import cache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+pytestmark = pytest.mark.anyio
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    ttl_cache: cache.TTLCache[str, int] = cache.TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    assert ttl_cache.get("a") == 1
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("c") == 3
+    stats = ttl_cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    ttl_cache: cache.TTLCache[str, int] = cache.TTLCache(maxsize=2, ttl=10)
+    ttl_cache.set("a", 1)
+    now += 11
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.stats()["expirations"] == 1
+
+
+async def test_lru_memory_store_evicts_least_recently_used() -> None:
+    store = cache.LRUMemoryStore(maxsize=2)
+    await store.set("a", b"1")
+    await store.set("b", b"2")
+    assert await store.get("a") == b"1"
+    await store.set("c", b"3")
+    assert await store.get("b") is None
+    assert await store.get("a") == b"1"
+    assert store.evictions == 1
+
+
+async def test_user_cache_invalidates_both_keys() -> None:
+    user_cache = UserCache(cache.CacheManager(cache.CacheBackend()).cache("users", maxsize=10), ttl=60)
+    snapshot = await user_cache.add(m.User(id=1, email="user@example.com", name="User"))
+    assert snapshot.name == "User"
+    cached = await user_cache.get_by_id(1)
+    assert cached is not None
+    assert cached.name == "User"
+    cached = await user_cache.get_by_email("user@example.com")
+    assert cached is not None
+    assert cached.id == 1
+
+    await user_cache.invalidate(user_id=1)
+    assert await user_cache.get_by_id(1) is None
+    assert await user_cache.get_by_email("user@example.com") is None
+
+
+async def test_user_cache_keeps_no_password_hash() -> None:
+    from app.domain.accounts.claims import token_version
+
+    user_cache = UserCache(cache.CacheManager(cache.CacheBackend()).cache("users", maxsize=10), ttl=60)
+    stored_hash = "$argon2id$v=19$m=65536,t=3,p=4$c2FsdA$aGFzaA"
+    await user_cache.add(m.User(id=1, email="user@example.com", hashed_password=stored_hash))
+    cached = await user_cache.get_by_id(1)
+    assert cached is not None
+    assert cached.hashed_password != stored_hash
+    assert cached.has_password
+    assert token_version(cached.hashed_password) == token_version(stored_hash)
+
+
+async def test_user_cache_disabled() -> None:
+    user_cache = UserCache(cache.CacheManager(cache.CacheBackend()).cache("users", maxsize=10), ttl=0)
+    await user_cache.add(m.User(id=1, email="user@example.com"))
+    assert await user_cache.get_by_id(1) is None
+
+
+async def test_file_backend_is_shared(tmp_path: Path) -> None:
+    first = cache.CacheManager(cache.CacheBackend(kind="file", path=str(tmp_path))).cache("users", maxsize=10)
+    second = cache.CacheManager(cache.CacheBackend(kind="file", path=str(tmp_path))).cache("users", maxsize=10)
+    await first.set("key", b"value", expires_in=60)
+    assert await second.get("key") == b"value"
+    await second.delete("key")
+    assert await first.get("key") is None
+
+
+async def test_redis_backend_broadcasts_invalidations() -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    workers = [
+        cache.CacheManager(cache.CacheBackend(kind="redis", redis=fakeredis.FakeAsyncRedis(server=server)))
+        for _ in range(2)
+    ]
+    first, second = (worker.cache("users", maxsize=10) for worker in workers)
+    for worker in workers:
+        await worker.start()
+    try:
+        await first.set("key", b"value", expires_in=60)
+        assert await second.get("key") == b"value"
+        assert await second.get("key") == b"value"
+        assert second.stats()["local_hits"] == 1
+
+        await first.delete("key")
+        for _ in range(50):
+            if await second.get("key") is None:
+                break
+            await asyncio.sleep(0.01)
+        assert await second.get("key") is None
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+async def test_tagged_store_purge() -> None:
+    store = cache.TaggedStore(cache.LRUMemoryStore(maxsize=10))
+    store.tag("users", ["users:list"])
+    assert await store.get("users") is None
+    await store.set("users", b"cached")
+    store.tag("users", ["users:list"])
+    assert await store.get("users") == b"cached"
+
+    # purged between the lookup and storing the response, so the entry is already stale
+    store.tag("users", ["users:list"])
+    await store.delete("users")
+    assert await store.get("users") is None
+    await store.purge("users:list")
+    await store.set("users", b"stale")
+    store.tag("users", ["users:list"])
+    assert await store.get("users") is None
+    assert store.stats()["stale"] == 1
@@ -1,6 +1,7 @@
 # pylint: disable=protected-access
 from __future__ import annotations
 
+import asyncio
 import base64
 
 import pytest
@@ -52,3 +53,101 @@ async def test_verify_password(valid_password: str, tested_password: str, expect
     is_valid = await crypt.verify_password(tested_password, secret_str_hash)
 
     assert is_valid == expected_result
+
+
+async def test_hashing_executor_rejects_when_queue_full() -> None:
+    """Test that jobs beyond the worker and queue capacity are shed."""
+    import threading
+
+    from app.lib.exceptions import ServiceOverloadedError
+
+    release = threading.Event()
+    executor = crypt.HashingExecutor(kind="thread", max_workers=1, max_queue=0, retry_after=3)
+    executor.start()
+    try:
+        blocked = asyncio.create_task(executor.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            await executor.run(crypt._hash, "password")
+        assert exc_info.value.retry_after == 3
+        assert executor.stats()["in_flight"] == 1
+        release.set()
+        await blocked
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+    assert stats["latency"]["count"] == 1
+
+
+async def test_password_hash_uses_installed_executor(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that hashing goes through the executor owned by the application lifespan."""
+    executor = crypt.HashingExecutor(kind="thread", max_workers=1, max_queue=1)
+    monkeypatch.setattr(crypt, "_hashing_executor", executor)
+    try:
+        hashed = await crypt.get_password_hash("This is a password!")
+        assert await crypt.verify_password("This is a password!", hashed)
+    finally:
+        executor.shutdown()
+    assert executor.stats()["completed"] == 2
+
+
+async def test_get_password_hashes_splits_across_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a batch of passwords is hashed in one job per worker, keeping its order."""
+    executor = crypt.HashingExecutor(kind="thread", max_workers=2, max_queue=0)
+    monkeypatch.setattr(crypt, "_hashing_executor", executor)
+    passwords = ["first", "second", "third"]
+    try:
+        hashes = await crypt.get_password_hashes(passwords)
+    finally:
+        executor.shutdown()
+    assert executor.stats()["completed"] == 2
+    pairs = zip(passwords, hashes, strict=True)
+    verified = [await crypt.verify_password(password, hashed) for password, hashed in pairs]
+    assert verified == [True, True, True]
+    assert await crypt.get_password_hashes([]) == []
+
+
+async def test_verify_and_update_password_migrates_profile(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that hashes from an older profile are replaced after a successful verify."""
+    old_profile = crypt.HashingProfile(time_cost=1, memory_cost=8192, parallelism=1)
+    new_profile = crypt.HashingProfile(time_cost=2, memory_cost=8192, parallelism=1)
+    monkeypatch.setattr(crypt, "password_crypt_context", crypt.create_crypt_context(old_profile))
+    old_hash = await crypt.get_password_hash("SuperS3cret!")
+    monkeypatch.setattr(crypt, "password_crypt_context", crypt.create_crypt_context(new_profile))
+
+    assert await crypt.verify_and_update_password("Invalid!!", old_hash) == (False, None)
+    valid, new_hash = await crypt.verify_and_update_password("SuperS3cret!", old_hash)
+    assert valid
+    assert new_hash is not None
+    assert "m=8192,t=2,p=1" in new_hash
+    assert await crypt.verify_and_update_password("SuperS3cret!", new_hash) == (True, None)
+
+
+async def test_verify_and_update_password_migrates_parallelism(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that hashes differing from the profile only by their parallelism are replaced."""
+    old_profile = crypt.HashingProfile(time_cost=1, memory_cost=8192, parallelism=1)
+    new_profile = crypt.HashingProfile(time_cost=1, memory_cost=8192, parallelism=2)
+    monkeypatch.setattr(crypt, "password_crypt_context", crypt.create_crypt_context(old_profile))
+    old_hash = await crypt.get_password_hash("SuperS3cret!")
+    monkeypatch.setattr(crypt, "password_crypt_context", crypt.create_crypt_context(new_profile))
+
+    valid, new_hash = await crypt.verify_and_update_password("SuperS3cret!", old_hash)
+    assert valid
+    assert new_hash is not None
+    assert "m=8192,t=1,p=2" in new_hash
+    assert await crypt.verify_and_update_password("SuperS3cret!", new_hash) == (True, None)
+
+
+def test_calibrate_hashing_profile() -> None:
+    """Test that calibration respects the memory bounds it is given."""
+    profile, p99_ms = crypt.calibrate_hashing_profile(
+        target_ms=10_000,
+        max_memory_cost=8192,
+        parallelism=1,
+        samples=1,
+        max_time_cost=2,
+    )
+    assert profile == crypt.HashingProfile(time_cost=2, memory_cost=8192, parallelism=1)
+    assert p99_ms > 0
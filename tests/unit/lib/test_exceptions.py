@@ -9,6 +9,7 @@ from litestar.status_codes import (
     HTTP_404_NOT_FOUND,
     HTTP_409_CONFLICT,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 from litestar.testing import RequestFactory, create_test_client
 
@@ -91,3 +92,11 @@ def test_exception_serves_debug_middleware_response(
     request = RequestFactory(app=app, server="testserver").get("/wherever")
     response = fn(request, exc)
     assert response.content == expected_message.decode()
+
+
+def test_service_overloaded_error_sets_retry_after() -> None:
+    app = Litestar(route_handlers=[])
+    request = RequestFactory(app=app, server="testserver").get("/wherever")
+    response = exceptions.exception_to_http_response(request, exceptions.ServiceOverloadedError(retry_after=5))
+    assert response.status_code == HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "5"
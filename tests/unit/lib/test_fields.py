@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import msgspec
+import pytest
+from litestar.exceptions import ValidationException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import models as m
+from app.domain.accounts.schemas import User
+from app.lib.fields import FieldSet
+
+REQUIRES = {"has_password": ("hashed_password",)}
+
+
+def test_parse_encoded_names_in_declaration_order() -> None:
+    fields = FieldSet.parse("hasPassword, email,id", User, REQUIRES)
+    assert fields.names == ("id", "email", "has_password")
+    assert msgspec.json.decode(msgspec.json.encode(fields.struct(id=1, email="a@example.com"))) == {
+        "id": 1,
+        "email": "a@example.com",
+        "hasPassword": False,
+    }
+    with pytest.raises(ValidationException):
+        FieldSet.parse("email,hashedPassword", User)
+    with pytest.raises(ValidationException):
+        FieldSet.parse(",", User)
+
+
+def test_load_selects_only_requested_columns() -> None:
+    engine = create_engine("sqlite://")
+    m.User.metadata.create_all(engine, tables=[m.User.__table__])  # type: ignore[list-item]
+    with Session(engine) as session:
+        session.add(m.User(email="a@example.com", name="Ada", hashed_password="secret"))  # noqa: S106
+        session.commit()
+        session.expunge_all()
+
+        load = FieldSet.parse("hasPassword", User, REQUIRES).load(m.User, "name")
+        assert load is not None
+        statement = select(m.User).options(load)
+        assert "surname" not in str(statement)
+        user = session.scalars(statement).one()
+        assert user.has_password
+        assert user.name == "Ada"
+        # a field without a column of its own and no requirement cannot be narrowed
+        assert FieldSet.parse("hasPassword", User).load(m.User) is None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.lib import health
+from app.lib.exceptions import HealthCheckConfigurationError
+
+pytestmark = pytest.mark.anyio
+
+
+async def _online() -> None:
+    return None
+
+
+async def _offline() -> None:
+    msg = "connection refused"
+    raise ConnectionRefusedError(msg)
+
+
+async def _hanging() -> None:
+    await asyncio.sleep(10)
+
+
+async def test_health_monitor_probes_components() -> None:
+    monitor = health.HealthMonitor(timeout=0.05)
+    monitor.register("database", _online)
+    monitor.register("cache", _hanging)
+    monitor.register("replica-1", _offline, critical=False)
+    assert not monitor.ready
+
+    await monitor.probe_all()
+    assert monitor.status("database") == "online"
+    assert monitor.status("cache") == "offline"
+    assert monitor.status("replica-1") == "offline"
+    assert not monitor.ready
+
+    monitor.unregister("cache")
+    assert monitor.ready
+    stats = monitor.stats()
+    assert stats["rounds"] == 1
+    assert stats["components"]["database"]["latency"]["count"] == 1
+    assert stats["components"]["replica-1"]["error"] == "ConnectionRefusedError: connection refused"
+    assert stats["components"]["replica-1"]["consecutive_failures"] == 1
+
+
+async def test_health_monitor_stale_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(health.time, "monotonic", lambda: now)
+    monitor = health.HealthMonitor(stale_after=30)
+    monitor.register("database", _online)
+    await monitor.probe_all()
+    assert monitor.ready
+    now += 31
+    assert not monitor.ready
+
+
+def test_health_monitor_rejects_duplicate_checks() -> None:
+    monitor = health.HealthMonitor()
+    monitor.register("database", _online)
+    with pytest.raises(HealthCheckConfigurationError):
+        monitor.register("database", _online)
+
+
+async def test_health_monitor_held_by_startup_tasks() -> None:
+    monitor = health.HealthMonitor()
+    monitor.register("database", _online)
+    monitor.hold("pool_warmup")
+    await monitor.probe_all()
+    assert not monitor.ready
+    assert monitor.stats()["starting"] == ["pool_warmup"]
+    monitor.release("pool_warmup")
+    assert monitor.ready
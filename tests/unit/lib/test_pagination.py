@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from litestar.exceptions import ValidationException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import models as m
+from app.lib.pagination import LimitCursor
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class UserRepository(SQLAlchemySyncRepository[m.User]):
+    model_type = m.User
+
+
+@pytest.fixture(name="repository")
+def fx_repository() -> Iterator[UserRepository]:
+    engine = create_engine("sqlite://")
+    m.User.metadata.create_all(engine, tables=[m.User.__table__])  # type: ignore[list-item]
+    names = ["b", None, "a", "b", "c", None, "a"]
+    with Session(engine) as session:
+        session.add_all(m.User(id=i + 1, email=f"{i}@example.com", name=name) for i, name in enumerate(names))
+        session.commit()
+        yield UserRepository(session=session)
+
+
+def _walk(repository: UserRepository, sort_order: str) -> list[int]:
+    ids: list[int] = []
+    limit_cursor = LimitCursor.from_cursor(None, 3, "name", sort_order)  # type: ignore[arg-type]
+    while True:
+        page = limit_cursor.paginate(repository.list(limit_cursor))
+        ids.extend(user.id for user in page.items)
+        if page.next_cursor is None:
+            return ids
+        limit_cursor = LimitCursor.from_cursor(page.next_cursor, 3, "name", sort_order)  # type: ignore[arg-type]
+
+
+def test_cursor_pages_forward_in_sort_order(repository: UserRepository) -> None:
+    assert _walk(repository, "asc") == [3, 7, 1, 4, 5, 2, 6]
+    assert _walk(repository, "desc") == [6, 2, 5, 4, 1, 7, 3]
+
+
+def test_cursor_pages_backward(repository: UserRepository) -> None:
+    first = LimitCursor.from_cursor(None, 3, "name")
+    page = first.paginate(repository.list(first))
+    assert page.prev_cursor is None
+    second = LimitCursor.from_cursor(page.next_cursor, 3, "name")
+    page = second.paginate(repository.list(second))
+    assert [user.id for user in page.items] == [4, 5, 2]
+    previous = LimitCursor.from_cursor(page.prev_cursor, 3, "name")
+    page = previous.paginate(repository.list(previous))
+    assert [user.id for user in page.items] == [3, 7, 1]
+    assert page.prev_cursor is None
+    assert page.next_cursor is not None
+
+
+def test_cursor_rejects_other_ordering(repository: UserRepository) -> None:
+    first = LimitCursor.from_cursor(None, 3, "name")
+    page = first.paginate(repository.list(first))
+    with pytest.raises(ValidationException):
+        LimitCursor.from_cursor(page.next_cursor, 3, "email")
+    with pytest.raises(ValidationException):
+        LimitCursor.from_cursor("not-a-cursor", 3, "name")
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from app.lib.exceptions import QueryBudgetExceededError
+from app.lib.queries import QueryCounter, RequestQueries
+
+pytestmark = pytest.mark.anyio
+
+
+def _queries(route: str, *statements: str) -> RequestQueries:
+    queries = RequestQueries(route)
+    queries.statements.update(statements)
+    return queries
+
+
+async def test_query_counter_flags_repeated_statements() -> None:
+    counter = QueryCounter(repeat_limit=3)
+    by_id = "SELECT * FROM user_account WHERE id = $1"
+    await counter.check(_queries("GET list", by_id, by_id, "SELECT 1"), budget=None)
+    await counter.check(_queries("GET list", by_id, by_id, by_id), budget=None)
+    assert counter.stats()["GET list"] == {
+        "requests": 2,
+        "queries": 6,
+        "max_queries": 3,
+        "db_ms": 0,
+        "over_budget": 0,
+        "repeated": 1,
+    }
+
+
+async def test_query_counter_budget() -> None:
+    counter = QueryCounter()
+    await counter.check(_queries("GET detail", "SELECT 1", "SELECT 2"), budget=1)
+    assert counter.stats()["GET detail"]["over_budget"] == 1
+
+    counter.strict = True
+    await counter.check(_queries("GET detail", "SELECT 1"), budget=1)
+    with pytest.raises(QueryBudgetExceededError) as exc_info:
+        await counter.check(_queries("GET detail", "SELECT 1", "SELECT 2"), budget=1)
+    assert exc_info.value.detail == "GET detail executed 2 queries, over its budget of 1."
+
+
+async def test_query_count_middleware_strict_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    from litestar import Litestar, get
+    from litestar.testing import AsyncTestClient
+    from sqlalchemy import create_engine, text
+
+    from app.config.constants import QUERY_BUDGET_KEY
+    from app.lib import queries
+
+    engine = create_engine("sqlite://")
+
+    def _select(times: int) -> int:
+        with engine.connect() as conn:
+            return sum(conn.execute(text(f"SELECT {n}")).scalar_one() for n in range(times))
+
+    @get("/within", opt={QUERY_BUDGET_KEY: 1}, sync_to_thread=False)
+    def within() -> int:
+        return _select(1)
+
+    @get("/over", opt={QUERY_BUDGET_KEY: 1}, sync_to_thread=False)
+    def over() -> int:
+        return _select(2)
+
+    counter = QueryCounter(strict=True)
+    monkeypatch.setattr(queries, "query_counter", counter)
+    app = Litestar([within, over], middleware=[queries.QueryCountMiddleware])
+    async with AsyncTestClient(app=app) as client:
+        assert (await client.get("/within")).status_code == 200
+        response = await client.get("/over")
+    assert response.status_code == 500
+    assert counter.stats()["GET over"]["over_budget"] == 1
+    assert counter.stats()["GET within"]["max_queries"] == 1
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db import models as m
+from app.lib import replicas
+
+pytestmark = pytest.mark.anyio
+
+
+def _engine(host: str) -> AsyncEngine:
+    return create_async_engine(f"postgresql+asyncpg://app:app@{host}:5432/app")
+
+
+def test_replica_set_round_robin() -> None:
+    first, second = _engine("replica-1"), _engine("replica-2")
+    replica_set = replicas.ReplicaSet([first, second])
+    assert [replica_set.choose() for _ in range(4)] == [first, second, first, second]
+
+
+def test_replica_set_skips_failed_replicas(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(replicas.time, "monotonic", lambda: now)
+    first, second = _engine("replica-1"), _engine("replica-2")
+    replica_set = replicas.ReplicaSet([first, second], retry_after=30)
+    replica_set.mark_failed(first)
+    assert {replica_set.choose() for _ in range(3)} == {second}
+    replica_set.mark_failed(second)
+    assert replica_set.choose() is None
+    now += 31
+    assert replica_set.healthy() == [first, second]
+    stats = replica_set.stats()
+    assert (stats["failures"], stats["fallbacks"]) == (2, 1)
+
+
+def test_replica_set_least_busy(monkeypatch: pytest.MonkeyPatch) -> None:
+    first, second = _engine("replica-1"), _engine("replica-2")
+    monkeypatch.setattr(first.pool, "checkedout", lambda: 3)
+    monkeypatch.setattr(second.pool, "checkedout", lambda: 1)
+    replica_set = replicas.ReplicaSet([first, second], selection="least_busy")
+    assert replica_set.choose() is second
+
+
+def test_routing_session_reads_from_replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    primary, replica = _engine("primary"), _engine("replica")
+    monkeypatch.setattr(replicas, "replicas", replicas.ReplicaSet([replica]))
+    session = replicas.RoutingSession(bind=primary.sync_engine)
+    read, write = select(m.User), update(m.User).values(name="x")
+
+    assert session.get_bind(clause=read) is primary.sync_engine
+    token = replicas._use_replica.set(True)
+    try:
+        assert session.get_bind(clause=read) is replica.sync_engine
+        assert session.get_bind(clause=write) is primary.sync_engine
+        with replicas.read_from_primary():
+            assert session.get_bind(clause=read) is primary.sync_engine
+        assert session.get_bind(clause=read) is replica.sync_engine
+    finally:
+        replicas._use_replica.reset(token)
+
+
+async def test_routing_middleware_pins_writers_to_primary(monkeypatch: pytest.MonkeyPatch) -> None:
+    from litestar import Litestar, get, post
+    from litestar.testing import AsyncTestClient
+
+    from app.config.constants import READ_REPLICA_KEY
+
+    monkeypatch.setattr(replicas, "replicas", replicas.ReplicaSet([_engine("replica")]))
+
+    @get("/read", sync_to_thread=False)
+    def read() -> bool:
+        return replicas._use_replica.get()
+
+    @get("/primary", opt={READ_REPLICA_KEY: False}, sync_to_thread=False)
+    def read_primary() -> bool:
+        return replicas._use_replica.get()
+
+    @post("/write", sync_to_thread=False)
+    def write() -> bool:
+        return replicas._use_replica.get()
+
+    app = Litestar([read, read_primary, write], middleware=[replicas.ReplicaRoutingMiddleware])
+    async with AsyncTestClient(app=app) as client:
+        assert (await client.get("/read")).json() is True
+        assert (await client.get("/primary")).json() is False
+        assert (await client.get("/read", headers={replicas.PRIMARY_HEADER: "1"})).json() is False
+        response = await client.post("/write")
+        assert response.json() is False
+        assert replicas.PRIMARY_COOKIE in response.cookies
+        # the client now carries the cookie
+        assert (await client.get("/read")).json() is False
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db import models as m
+from app.lib.search import FullTextSearchFilter, TrigramSearchFilter
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+FIELDS = {"name", "surname", "email"}
+
+
+class UserRepository(SQLAlchemySyncRepository[m.User]):
+    model_type = m.User
+
+
+@pytest.fixture(name="repository")
+def fx_repository() -> Iterator[UserRepository]:
+    engine = create_engine("sqlite://")
+    m.User.metadata.create_all(engine, tables=[m.User.__table__])  # type: ignore[list-item]
+    with Session(engine) as session:
+        session.add_all(
+            [
+                m.User(email="ada@example.com", name="Ada", surname="Lovelace"),
+                m.User(email="alan@example.com", name="Alan", surname="Turing"),
+            ]
+        )
+        session.commit()
+        yield UserRepository(session=session)
+
+
+def test_search_falls_back_to_like_on_sqlite(repository: UserRepository) -> None:
+    assert [user.name for user in repository.list(TrigramSearchFilter(field_name=FIELDS, value="LOVE"))] == ["Ada"]
+    fts = FullTextSearchFilter(field_name=FIELDS, value="turing", rank=True)
+    assert [user.name for user in repository.list(fts)] == ["Alan"]
+
+
+def test_search_compiles_to_postgres_operators() -> None:
+    trigram = TrigramSearchFilter(field_name="name", value="ada").append_to_statement(select(m.User), m.User)
+    assert "%>" in str(trigram.compile(dialect=postgresql.dialect()))
+    assert "%>" not in str(trigram)
+    fts = FullTextSearchFilter(field_name=FIELDS, value="ada", rank=True).append_to_statement(select(m.User), m.User)
+    sql = str(fts.compile(dialect=postgresql.dialect()))
+    assert "user_account.search_vector @@ websearch_to_tsquery" in sql
+    assert "ORDER BY ts_rank(" in sql
@@ -10,3 +10,16 @@ def test_app_slug() -> None:
     settings = get_settings()
     settings.app.NAME = "My Application!"
     assert settings.app.slug == "my-application"
+
+
+def test_cache_route_ttl() -> None:
+    settings = get_settings()
+    settings.cache.RESPONSE_ROUTE_TTLS = "ListUsers=60, GetUser=0"
+    settings.cache.BACKEND = "redis"
+    assert settings.cache.route_ttl("ListUsers") == 60
+    assert settings.cache.route_ttl("GetUser") == 0
+    assert settings.cache.route_ttl("UpdateUser") == 0
+    # purges of the memory backend stay in their worker
+    settings.cache.BACKEND = "memory"
+    settings.cache.LOCAL_TTL = 5
+    assert settings.cache.route_ttl("ListUsers") == 5
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import pytest
+
+from app.lib.slow_queries import SlowQueryLog, normalize_statement, parameters_shape
+
+pytestmark = pytest.mark.anyio
+
+
+def test_normalize_statement() -> None:
+    statement = """SELECT user_account.id
+    FROM user_account
+    WHERE user_account.id IN ($1, $2, $3)"""
+    assert normalize_statement(statement) == "SELECT user_account.id FROM user_account WHERE user_account.id IN (...)"
+
+
+def test_parameters_shape() -> None:
+    assert parameters_shape((1, "a", None)) == "(int, str, NoneType)"
+    assert parameters_shape({"id": 1}) == "{id: int}"
+    assert parameters_shape([(1, "a"), (2, "b")], executemany=True) == "2 x (int, str)"
+
+
+def test_slow_query_log_keeps_the_last_slow_statements() -> None:
+    log = SlowQueryLog(threshold_ms=100, size=2)
+    assert log.record("SELECT 1", (), 0.05) is None
+    log.record("SELECT 2", (), 0.2)
+    log.record("SELECT 3", (), 0.5)
+    log.record("SELECT 4", (), 0.3)
+    assert [entry["statement"] for entry in log.top()] == ["SELECT 3", "SELECT 4"]
+    assert log.stats() == {
+        "threshold_ms": 100,
+        "recorded": 3,
+        "explained": 0,
+        "kept": 2,
+        "slowest_ms": 500,
+    }
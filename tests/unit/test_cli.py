@@ -1,7 +1,39 @@
+from pathlib import Path
+
 import pytest
 from click.testing import CliRunner
+from dotenv import dotenv_values
 
 
 @pytest.fixture()
 def cli_runner() -> CliRunner:
     return CliRunner()
+
+
+def test_calibrate_hashing_writes_profile(cli_runner: CliRunner, tmp_path: Path) -> None:
+    from app.cli.commands import user_management_group
+
+    env_file = tmp_path / ".env"
+    result = cli_runner.invoke(
+        user_management_group,
+        [
+            "calibrate-hashing",
+            "--target-ms",
+            "10000",
+            "--max-memory",
+            "8",
+            "--parallelism",
+            "1",
+            "--samples",
+            "1",
+            "--concurrency",
+            "1",
+            "--env-file",
+            str(env_file),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    written = dotenv_values(env_file)
+    assert written["HASHING_MEMORY_COST"] == "8192"
+    assert written["HASHING_PARALLELISM"] == "1"
+    assert int(written["HASHING_TIME_COST"] or 0) >= 1